@@ -1,25 +1,242 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Blueprint, render_template, request, jsonify, Response, g, send_file, url_for, abort, current_app
+from werkzeug.security import safe_join
 import smtplib
+import socket
+import email.policy
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.utils import formatdate
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 import mysql.connector
 from dotenv import load_dotenv
 import os
 import logging
-from datetime import datetime
+import logging.handlers
+from datetime import datetime, timedelta
 import re
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+import threading
+import time
+import uuid
+import base64
+import csv
+import io
+import json
+import hashlib
+import gzip
+import queue
+import mimetypes
+import atexit
+import contextvars
+import copy
+from collections import deque
+from contextlib import contextmanager
 
 # Cargar variables del .env
 load_dotenv()
 
-app = Flask(__name__)
+# Id de correlación de la petición (o del lote de correos) en curso
+peticion_id_actual = contextvars.ContextVar('peticion_id', default='-')
+PATRON_PETICION_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+class FiltroCorrelacion(logging.Filter):
+    """Añade a cada registro el id de correlación del contexto actual"""
+
+    def filter(self, record):
+        record.peticion_id = peticion_id_actual.get()
+        return True
+
+class ManejadorCola(logging.handlers.QueueHandler):
+    """En el hilo que loguea solo se resuelve el mensaje y se encola; el resto lo hace el listener"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+# Atributos propios de LogRecord; los demás vienen de extra={...}
+ATRIBUTOS_LOG = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'peticion_id'}
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro, para el pipeline de logs"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'peticion_id': getattr(record, 'peticion_id', '-'),
+            'hilo': record.threadName,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in ATRIBUTOS_LOG:
+                datos[clave] = valor
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+_listener_logging = None
+
+def configurar_logging():
+    """Logging asíncrono: los hilos solo encolan y un QueueListener escribe en stderr
+
+    LOG_FORMATO=json emite una línea JSON por registro; LOG_NIVEL fija el nivel.
+    Se llama desde create_app(), no al importar. Con gunicorn --preload la app se
+    crea en el master: el hilo del listener no sobrevive al fork y cada worker
+    arranca el suyo (register_at_fork).
+    """
+    global _listener_logging
+    if _listener_logging:
+        return _listener_logging
+    salida = logging.StreamHandler()
+    if os.getenv('LOG_FORMATO', 'texto').lower() == 'json':
+        salida.setFormatter(FormateadorJSON())
+    else:
+        salida.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(peticion_id)s] %(message)s'
+        ))
+    cola = queue.SimpleQueue()
+    manejador = ManejadorCola(cola)
+    manejador.addFilter(FiltroCorrelacion())
+    raiz = logging.getLogger()
+    raiz.handlers[:] = [manejador]
+    raiz.setLevel(os.getenv('LOG_NIVEL', 'INFO').upper())
+    _listener_logging = logging.handlers.QueueListener(cola, salida)
+    _listener_logging.start()
+    return _listener_logging
+
+def _reiniciar_logging():
+    """En el hijo tras un fork: el listener heredado no tiene hilo"""
+    global _listener_logging
+    if _listener_logging:
+        _listener_logging = None
+        configurar_logging()
+
+def _detener_logging():
+    if _listener_logging:
+        _listener_logging.stop()
+
+os.register_at_fork(after_in_child=_reiniciar_logging)
+atexit.register(_detener_logging)
+
+logger = logging.getLogger(__name__)
+
+# Las rutas se registran en la aplicación desde create_app()
+bp = Blueprint('inscripciones', __name__)
+
+class Metricas:
+    """Registro de métricas en memoria exportable en formato de texto de Prometheus"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tipos = {}
+        self._ayuda = {}
+        self._valores = {}
+        self._histogramas = {}
+
+    def describir(self, nombre, tipo, ayuda):
+        self._tipos[nombre] = tipo
+        self._ayuda[nombre] = ayuda
+
+    @staticmethod
+    def _clave(nombre, etiquetas):
+        return nombre, tuple(sorted(etiquetas.items()))
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        """Sumar a un contador o gauge"""
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        """Registrar una observación en un histograma"""
+        clave = self._clave(nombre, etiquetas)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = [[0] * len(self.BUCKETS), 0.0, 0]
+            for i, limite in enumerate(self.BUCKETS):
+                if valor <= limite:
+                    histograma[0][i] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    @contextmanager
+    def medir(self, fase):
+        """Medir la duración de una fase (db_connect, db_query, smtp_send, ...) y contar sus errores"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incrementar('fase_errores_total', fase=fase)
+            raise
+        finally:
+            self.observar('fase_duracion_segundos', time.perf_counter() - inicio, fase=fase)
+
+    @staticmethod
+    def _etiquetas(etiquetas, extra=()):
+        pares = list(etiquetas) + list(extra)
+        if not pares:
+            return ''
+        texto = ','.join(
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in pares
+        )
+        return '{' + texto + '}'
+
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus (0.0.4)"""
+        with self._lock:
+            valores = dict(self._valores)
+            histogramas = {k: (list(v[0]), v[1], v[2]) for k, v in self._histogramas.items()}
+
+        por_nombre = {}
+        for (nombre, etiquetas), valor in valores.items():
+            por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+        for (nombre, etiquetas), valor in histogramas.items():
+            por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+
+        lineas = []
+        for nombre in sorted(por_nombre):
+            tipo = self._tipos.get(nombre, 'untyped')
+            if nombre in self._ayuda:
+                lineas.append(f"# HELP {nombre} {self._ayuda[nombre]}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in sorted(por_nombre[nombre], key=lambda x: x[0]):
+                if tipo == 'histogram':
+                    cubetas, suma, cuenta = valor
+                    for limite, n in zip(self.BUCKETS, cubetas):
+                        lineas.append(f"{nombre}_bucket{self._etiquetas(etiquetas, [('le', limite)])} {n}")
+                    lineas.append(f"{nombre}_bucket{self._etiquetas(etiquetas, [('le', '+Inf')])} {cuenta}")
+                    lineas.append(f"{nombre}_sum{self._etiquetas(etiquetas)} {suma}")
+                    lineas.append(f"{nombre}_count{self._etiquetas(etiquetas)} {cuenta}")
+                else:
+                    lineas.append(f"{nombre}{self._etiquetas(etiquetas)} {valor}")
+        return '\n'.join(lineas) + '\n'
+
+# Métricas del proceso (con gunicorn, cada worker expone las suyas)
+metricas = Metricas()
+metricas.describir('http_request_duracion_segundos', 'histogram', 'Duración de las peticiones HTTP por ruta')
+metricas.describir('http_requests_total', 'counter', 'Peticiones HTTP por ruta, método y código')
+metricas.describir('http_requests_en_curso', 'gauge', 'Peticiones HTTP en curso por ruta')
+metricas.describir('fase_duracion_segundos', 'histogram', 'Duración por fase (db_connect, db_query, db_commit, template_render, smtp_connect, smtp_send)')
+metricas.describir('fase_errores_total', 'counter', 'Errores por fase')
+metricas.describir('db_pool_conexiones', 'gauge', 'Conexiones del pool MySQL por estado')
+metricas.describir('db_pool_esperando', 'gauge', 'Peticiones esperando una conexión del pool')
+metricas.describir('sse_conexiones', 'gauge', 'Conexiones abiertas a /eventos')
+metricas.describir('db_replica_expulsiones_total', 'counter', 'Réplicas de lectura sacadas de la rotación por errores')
 
 # Configuración base de datos
 db_config = {
@@ -32,34 +249,779 @@ db_config = {
     'autocommit': True
 }
 
+class PoolConexiones:
+    """Pool de conexiones MySQL compartido y de tamaño limitado"""
+
+    def __init__(self, config, tamano=5, timeout=10):
+        self.config = config
+        self.tamano = tamano
+        self.timeout = timeout
+        self._libres = deque()
+        self._creadas = 0
+        self._lock = threading.Condition()
+        self._en_uso = 0
+        self._esperando = 0
+        self._total_prestamos = 0
+        self._total_esperas = 0
+        self._tiempo_espera_total = 0.0
+        self._tiempo_espera_max = 0.0
+        self._reconexiones = 0
+        self._timeouts = 0
+
+    def _crear_conexion(self):
+        return mysql.connector.connect(**self.config)
+
+    def _validar(self, conn):
+        """Verificar la conexión al prestarla y reconectar si MySQL se reinició"""
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except mysql.connector.Error:
+            pass
+        try:
+            conn.ping(reconnect=True, attempts=2, delay=0)
+            self._reconexiones += 1
+            return conn
+        except mysql.connector.Error:
+            self._cerrar(conn)
+            nueva = self._crear_conexion()
+            self._reconexiones += 1
+            return nueva
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def obtener(self):
+        """Tomar una conexión del pool, esperando si todas están en uso"""
+        with metricas.medir('db_connect'):
+            return self._obtener()
+
+    def _obtener(self):
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        with self._lock:
+            espero = False
+            while not self._libres and self._creadas >= self.tamano:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._timeouts += 1
+                    if espero:
+                        self._esperando -= 1
+                    raise mysql.connector.errors.PoolError(
+                        f"No hay conexiones libres en el pool tras {self.timeout}s"
+                    )
+                if not espero:
+                    espero = True
+                    self._esperando += 1
+                self._lock.wait(restante)
+            if espero:
+                self._esperando -= 1
+                espera = time.monotonic() - inicio
+                self._total_esperas += 1
+                self._tiempo_espera_total += espera
+                self._tiempo_espera_max = max(self._tiempo_espera_max, espera)
+            conn = self._libres.pop() if self._libres else None
+            if conn is None:
+                self._creadas += 1
+            self._en_uso += 1
+            self._total_prestamos += 1
+
+        try:
+            conn = self._validar(conn) if conn is not None else self._crear_conexion()
+        except Exception:
+            with self._lock:
+                self._creadas -= 1
+                self._en_uso -= 1
+                self._lock.notify()
+            raise
+        return conn
+
+    def devolver(self, conn, descartar=False):
+        """Devolver una conexión al pool (o descartarla si quedó en mal estado)"""
+        if not descartar:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                descartar = True
+        with self._lock:
+            self._en_uso -= 1
+            if descartar:
+                self._creadas -= 1
+            else:
+                self._libres.append(conn)
+            self._lock.notify()
+        if descartar:
+            self._cerrar(conn)
+
+    @contextmanager
+    def conexion(self):
+        """Context manager para usar una conexión y devolverla siempre"""
+        conn = self.obtener()
+        try:
+            yield conn
+        except mysql.connector.errors.OperationalError:
+            self.devolver(conn, descartar=True)
+            raise
+        except BaseException:
+            self.devolver(conn)
+            raise
+        else:
+            self.devolver(conn)
+
+    def tras_fork(self):
+        """En el hijo tras un fork: empezar vacío sin tocar las conexiones del padre"""
+        # Comparten socket con el padre: cerrarlas enviaría QUIT por su conexión,
+        # así que solo se apartan (y se mantienen referenciadas)
+        self._heredadas = list(self._libres)
+        self._libres = deque()
+        self._creadas = 0
+        self._en_uso = 0
+        self._esperando = 0
+        self._lock = threading.Condition()
+
+    def estadisticas(self):
+        """Estadísticas del pool (por proceso / worker de gunicorn)"""
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "tamano": self.tamano,
+                "creadas": self._creadas,
+                "libres": len(self._libres),
+                "en_uso": self._en_uso,
+                "esperando": self._esperando,
+                "total_prestamos": self._total_prestamos,
+                "total_esperas": self._total_esperas,
+                "tiempo_espera_promedio_ms": round(
+                    self._tiempo_espera_total / self._total_esperas * 1000, 2
+                ) if self._total_esperas else 0.0,
+                "tiempo_espera_max_ms": round(self._tiempo_espera_max * 1000, 2),
+                "reconexiones": self._reconexiones,
+                "timeouts": self._timeouts
+            }
+
+class CacheTTL:
+    """Caché en memoria con expiración por tiempo"""
+
+    def __init__(self, ttl=30, max_entradas=10000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def leer(self, clave):
+        """Valor vigente en caché o None"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > time.monotonic():
+                return entrada[1]
+        return None
+
+    def guardar(self, clave, valor):
+        ahora = time.monotonic()
+        with self._lock:
+            if len(self._datos) >= self.max_entradas:
+                # Descartar entradas vencidas y, si no alcanza, las más antiguas
+                self._datos = {k: v for k, v in self._datos.items() if v[0] > ahora}
+                while len(self._datos) >= self.max_entradas:
+                    self._datos.pop(next(iter(self._datos)))
+            self._datos[clave] = (ahora + self.ttl, valor)
+
+    def obtener(self, clave, calcular):
+        """Devolver el valor en caché o calcularlo si expiró"""
+        valor = self.leer(clave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def invalidar(self):
+        with self._lock:
+            self._datos.clear()
+
+class RouterLecturas:
+    """Reparte los SELECT entre réplicas (round-robin) y expulsa temporalmente las que fallan
+
+    Sin réplicas, o si todas están expulsadas, las lecturas van al primario.
+    """
+
+    def __init__(self, primario, replicas=(), expulsion_seg=30):
+        self.primario = primario
+        self.replicas = list(replicas)
+        self.expulsion_seg = expulsion_seg
+        self._siguiente = 0
+        self._expulsada_hasta = [0.0] * len(self.replicas)
+        self._expulsiones = [0] * len(self.replicas)
+        self._lock = threading.Lock()
+
+    def _elegir(self):
+        ahora = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                i = self._siguiente % len(self.replicas)
+                self._siguiente += 1
+                if self._expulsada_hasta[i] <= ahora:
+                    return i
+        return None
+
+    def expulsar(self, pool, error):
+        """Sacar una réplica de la rotación durante expulsion_seg"""
+        i = self.replicas.index(pool)
+        with self._lock:
+            self._expulsada_hasta[i] = time.monotonic() + self.expulsion_seg
+            self._expulsiones[i] += 1
+        metricas.incrementar('db_replica_expulsiones_total', replica=pool.config['host'])
+        logger.warning("⚠️ Réplica %s expulsada por %ss: %s", pool.config['host'], self.expulsion_seg, error)
+
+    def obtener(self, primario=False):
+        """Conexión de lectura; devuelve (pool, conn) para devolverla con pool.devolver"""
+        if not primario:
+            while self.replicas:
+                i = self._elegir()
+                if i is None:
+                    break
+                pool = self.replicas[i]
+                try:
+                    return pool, pool.obtener()
+                except mysql.connector.errors.PoolError:
+                    # Pool de la réplica saturado: no es un fallo de salud
+                    break
+                except mysql.connector.Error as e:
+                    self.expulsar(pool, e)
+        return self.primario, self.primario.obtener()
+
+    @contextmanager
+    def conexion(self, primario=False):
+        """Como PoolConexiones.conexion, pero en una réplica si hay alguna disponible"""
+        pool, conn = self.obtener(primario)
+        try:
+            yield conn
+        except mysql.connector.errors.OperationalError as e:
+            pool.devolver(conn, descartar=True)
+            if pool is not self.primario:
+                self.expulsar(pool, e)
+            raise
+        except BaseException:
+            pool.devolver(conn)
+            raise
+        else:
+            pool.devolver(conn)
+
+    def tras_fork(self):
+        for pool in self.replicas:
+            pool.tras_fork()
+        self._lock = threading.Lock()
+
+    def estadisticas(self):
+        ahora = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "host": pool.config['host'],
+                    "puerto": pool.config.get('port', 3306),
+                    "disponible": self._expulsada_hasta[i] <= ahora,
+                    "expulsada_seg": max(0, round(self._expulsada_hasta[i] - ahora, 1)),
+                    "expulsiones": self._expulsiones[i],
+                    "pool": pool.estadisticas()
+                }
+                for i, pool in enumerate(self.replicas)
+            ]
+
+def configs_replicas(hosts):
+    """DB_READ_HOSTS="host1,host2:3307" -> configs basadas en db_config"""
+    configs = []
+    for host in filter(None, (h.strip() for h in hosts.split(','))):
+        config = dict(db_config)
+        if ':' in host:
+            host, puerto = host.rsplit(':', 1)
+            config['port'] = int(puerto)
+        config['host'] = host
+        configs.append(config)
+    return configs
+
+# Pool compartido (uno por proceso; con gunicorn cada worker tiene el suyo)
+db_pool = PoolConexiones(
+    db_config,
+    tamano=int(os.getenv('DB_POOL_SIZE', '5')),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', '10'))
+)
+
+# Lecturas del listado, estadísticas y exportación (réplicas opcionales en DB_READ_HOSTS)
+db_lecturas = RouterLecturas(
+    db_pool,
+    [
+        PoolConexiones(
+            config,
+            tamano=int(os.getenv('DB_READ_POOL_SIZE', os.getenv('DB_POOL_SIZE', '5'))),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', '10'))
+        )
+        for config in configs_replicas(os.getenv('DB_READ_HOSTS', ''))
+    ],
+    expulsion_seg=int(os.getenv('DB_REPLICA_EXPULSION_SEG', '30'))
+)
+
+# Tras una escritura, el mismo cliente lee del primario durante este tiempo
+COOKIE_LEER_PRIMARIO = 'leer_primario'
+LEER_PRIMARIO_SEG = int(os.getenv('DB_LEER_PRIMARIO_SEG', '10'))
+
+# Caché de estadísticas del panel administrativo
+cache_estadisticas = CacheTTL(ttl=int(os.getenv('ESTADISTICAS_TTL_SEG', '30')))
+
+# Resultados recientes por clave de idempotencia (clave -> inscripcion_id)
+cache_idempotencia = CacheTTL(ttl=int(os.getenv('IDEMPOTENCIA_TTL_SEG', '600')))
+
+PATRON_EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PATRON_GRADO = re.compile(r'^(?:[1-9]|1[01])$')
+PATRON_ANO = re.compile(r'^\d{4}$')
+PATRON_TELEFONO = re.compile(r'^[0-9+()\s-]*$')
+
 def validar_email(email):
     """Validar formato de email"""
     if not email:
         return False
-    patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(patron, email) is not None
+    return PATRON_EMAIL.match(email) is not None
 
-def test_db_connection():
-    """Probar conexión a la base de datos"""
+class ErrorValidacion(ValueError):
+    """Datos de inscripción inválidos; `errores` tiene un mensaje por campo"""
+
+    def __init__(self, errores):
+        super().__init__('; '.join(errores))
+        self.errores = errores
+
+class Inscripcion:
+    """Inscripción tipada: se valida una sola vez al construirla desde el payload"""
+
+    # (atributo, campo del formulario, longitud máxima en la BD, obligatorio)
+    CAMPOS = (
+        ('nombres', 'nombres', 100, True),
+        ('apellidos', 'apellidos', 100, True),
+        ('grado', 'grado', 10, True),
+        ('ano_escolar', 'anoEscolar', 10, True),
+        ('padre_nombres', 'padreNombres', 150, False),
+        ('madre_nombres', 'madreNombres', 150, False),
+        ('padre_telefono', 'padreTelefono', 20, False),
+        ('madre_telefono', 'madreTelefono', 20, False),
+        ('email_padre', 'emailPadre', 100, False),
+        ('email_madre', 'emailMadre', 100, False),
+        ('direccion', 'direccion', 65535, True),
+        ('profesion', 'profesion', 100, False),
+    )
+
+    __slots__ = tuple(atributo for atributo, _, _, _ in CAMPOS) + (
+        'fecha_nacimiento', 'id', 'fecha_registro'
+    )
+
+    def __init__(self, **valores):
+        for atributo in self.__slots__:
+            setattr(self, atributo, valores.get(atributo))
+
+    @classmethod
+    def desde_dict(cls, data):
+        """Construir desde el JSON/CSV del formulario; ErrorValidacion con todos los errores"""
+        errores = []
+        valores = {}
+        for atributo, campo, maximo, obligatorio in cls.CAMPOS:
+            valor = data.get(campo)
+            valor = str(valor).strip() if valor is not None else ''
+            if not valor:
+                if obligatorio:
+                    errores.append(f"El campo {campo} es obligatorio")
+            elif len(valor) > maximo:
+                errores.append(f"El campo {campo} admite como máximo {maximo} caracteres")
+            valores[atributo] = valor
+
+        if valores['grado'] and not PATRON_GRADO.match(valores['grado']):
+            errores.append("El campo grado debe estar entre 1 y 11")
+        if valores['ano_escolar'] and not PATRON_ANO.match(valores['ano_escolar']):
+            errores.append("El campo anoEscolar debe ser un año (AAAA)")
+        for atributo, campo in (('padre_telefono', 'padreTelefono'), ('madre_telefono', 'madreTelefono')):
+            if not PATRON_TELEFONO.match(valores[atributo]):
+                errores.append(f"El campo {campo} no es un teléfono válido")
+        for atributo, campo in (('email_padre', 'emailPadre'), ('email_madre', 'emailMadre')):
+            if valores[atributo] and not validar_email(valores[atributo]):
+                errores.append(f"El campo {campo} no es un email válido")
+
+        fecha = str(data.get('fechaNacimiento') or '').strip()
+        if not fecha:
+            errores.append("El campo fechaNacimiento es obligatorio")
+        else:
+            try:
+                valores['fecha_nacimiento'] = datetime.strptime(fecha, '%Y-%m-%d').date()
+            except ValueError:
+                errores.append("El campo fechaNacimiento debe tener formato AAAA-MM-DD")
+
+        if errores:
+            raise ErrorValidacion(errores)
+        return cls(**valores)
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Construir desde una fila de la BD (cursor con dictionary=True)"""
+        return cls(**fila)
+
+    @property
+    def emails(self):
+        """Emails de los padres (ya validados)"""
+        return [e for e in (self.email_padre, self.email_madre) if e]
+
+    @property
+    def asunto(self):
+        return f"✅ Confirmación de Inscripción - {self.nombres} {self.apellidos} - Colegio XYZ"
+
+    def clave_idempotencia(self, clave_cliente=None):
+        """Clave de idempotencia: la enviada por el cliente o un hash de los datos del estudiante"""
+        if clave_cliente:
+            base = f"cliente|{clave_cliente.strip()}"
+        else:
+            campos = (self.nombres, self.apellidos, self.fecha_nacimiento.isoformat(), self.ano_escolar)
+            base = '|'.join(' '.join(c.split()).lower() for c in campos)
+        return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+    def valores(self, fecha_registro, clave=None):
+        """Tupla de valores para INSERT_INSCRIPCION"""
+        return (
+            self.nombres, self.apellidos, self.fecha_nacimiento, self.grado,
+            self.ano_escolar, self.padre_nombres, self.madre_nombres,
+            self.padre_telefono, self.madre_telefono, self.email_padre,
+            self.email_madre, self.direccion, self.profesion, fecha_registro,
+            clave or self.clave_idempotencia()
+        )
+
+    def contexto_correo(self):
+        """Variables de las plantillas de confirmación"""
+        return {
+            'nombres': self.nombres or 'N/A',
+            'apellidos': self.apellidos or 'N/A',
+            'fecha_nacimiento': self.fecha_nacimiento.strftime('%d/%m/%Y') if self.fecha_nacimiento else 'N/A',
+            'grado': self.grado or 'N/A',
+            'ano_escolar': self.ano_escolar or 'N/A',
+            'padre_nombres': self.padre_nombres or 'N/A',
+            'madre_nombres': self.madre_nombres or 'N/A',
+            'direccion': self.direccion or 'N/A',
+        }
+
+    def resumen(self):
+        """Representación JSON del listado (fechas formateadas)"""
+        return {
+            'id': self.id,
+            'nombres': self.nombres,
+            'apellidos': self.apellidos,
+            'fecha_nacimiento': self.fecha_nacimiento.strftime('%d/%m/%Y') if self.fecha_nacimiento else None,
+            'grado': self.grado,
+            'ano_escolar': self.ano_escolar,
+            'padre_nombres': self.padre_nombres,
+            'madre_nombres': self.madre_nombres,
+            'padre_telefono': self.padre_telefono,
+            'madre_telefono': self.madre_telefono,
+            'email_padre': self.email_padre,
+            'email_madre': self.email_madre,
+            'direccion': self.direccion,
+            'profesion': self.profesion,
+            'fecha_registro': self.fecha_registro.strftime('%d/%m/%Y %H:%M:%S') if self.fecha_registro else None,
+        }
+
+INSERT_INSCRIPCION = """
+    INSERT INTO inscripciones 
+    (nombres, apellidos, fecha_nacimiento, grado, ano_escolar, 
+     padre_nombres, madre_nombres, padre_telefono, madre_telefono, 
+     email_padre, email_madre, direccion, profesion, fecha_registro,
+     clave_idempotencia)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Código de MySQL para violación de índice único
+ER_DUP_ENTRY = 1062
+
+def buscar_por_clave(clave):
+    """ID de la inscripción ya registrada con esta clave de idempotencia"""
+    with db_pool.conexion() as conn:
+        cursor = conn.cursor()
+        with metricas.medir('db_query'):
+            cursor.execute("SELECT id FROM inscripciones WHERE clave_idempotencia = %s", (clave,))
+            fila = cursor.fetchone()
+        cursor.close()
+    return fila[0] if fila else None
+
+def codificar_cursor(fecha_registro, inscripcion_id):
+    """Cursor opaco de paginación a partir de (fecha_registro, id)"""
+    valor = f"{fecha_registro.isoformat()}|{inscripcion_id}"
+    return base64.urlsafe_b64encode(valor.encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor_pag):
     try:
-        conn = mysql.connector.connect(**db_config)
+        relleno = '=' * (-len(cursor_pag) % 4)
+        fecha, inscripcion_id = base64.urlsafe_b64decode(cursor_pag + relleno).decode().split('|')
+        return datetime.fromisoformat(fecha), int(inscripcion_id)
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+def construir_filtros(args):
+    """Traducir los filtros del listado a una cláusula WHERE y sus parámetros"""
+    condiciones = []
+    params = []
+
+    if args.get('grado'):
+        condiciones.append("grado = %s")
+        params.append(args['grado'])
+    if args.get('ano_escolar'):
+        condiciones.append("ano_escolar = %s")
+        params.append(args['ano_escolar'])
+    for campo, operador in (('desde', '>='), ('hasta', '<')):
+        if args.get(campo):
+            try:
+                fecha = datetime.strptime(args[campo], '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f"El filtro {campo} debe tener formato AAAA-MM-DD")
+            if campo == 'hasta':
+                # 'hasta' incluye el día completo
+                fecha += timedelta(days=1)
+            condiciones.append(f"fecha_registro {operador} %s")
+            params.append(fecha)
+    if args.get('nombre'):
+        prefijo = args['nombre'].strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        condiciones.append("(nombres LIKE %s OR apellidos LIKE %s)")
+        params.extend([prefijo, prefijo])
+
+    return condiciones, params
+
+# Solo el último correo de cada destinatario: un reenvío reemplaza al fallido
+SQL_ULTIMO_CORREO = """
+    NOT EXISTS (
+        SELECT 1 FROM cola_correos n
+        WHERE n.inscripcion_id = c.inscripcion_id
+          AND n.destinatario = c.destinatario AND n.id > c.id
+    )
+"""
+
+def calcular_estadisticas(condiciones, params, dias, primario=False):
+    """Agregados del panel calculados en MySQL con GROUP BY"""
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    and_where = f"AND {' AND '.join(condiciones)}" if condiciones else ""
+    desde_dia = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=dias - 1)
+
+    with db_lecturas.conexion(primario) as conn, metricas.medir('db_query'):
         cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
+        cursor.execute(f"SELECT COUNT(*) FROM inscripciones {where}", params)
+        total = cursor.fetchone()[0]
+
+        cursor.execute(f"""
+            SELECT DATE(fecha_registro) AS dia, COUNT(*)
+            FROM inscripciones
+            WHERE fecha_registro >= %s {and_where}
+            GROUP BY dia
+            ORDER BY dia
+        """, [desde_dia] + params)
+        por_dia = [{"fecha": dia.strftime('%d/%m/%Y'), "total": n} for dia, n in cursor.fetchall()]
+
+        cursor.execute(f"""
+            SELECT grado, COUNT(*) AS n
+            FROM inscripciones {where}
+            GROUP BY grado
+            ORDER BY n DESC
+        """, params)
+        por_grado = [{"grado": grado, "total": n} for grado, n in cursor.fetchall()]
+
+        # Mismo criterio que el listado (sql_resumen_correos)
+        cursor.execute(f"""
+            SELECT c.estado, COUNT(*)
+            FROM cola_correos c
+            JOIN inscripciones ON inscripciones.id = c.inscripcion_id
+            WHERE {SQL_ULTIMO_CORREO} {and_where}
+            GROUP BY c.estado
+        """, params)
+        correos = dict(cursor.fetchall())
         cursor.close()
-        conn.close()
+
+    return {
+        "total_inscripciones": total,
+        "por_dia": por_dia,
+        "por_grado": por_grado,
+        "correos": {
+            "enviados": correos.get('enviado', 0),
+            "pendientes": correos.get('pendiente', 0) + correos.get('enviando', 0),
+            "fallidos": correos.get('fallido', 0)
+        },
+        "generado": datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    }
+
+def test_db_connection():
+    """Probar conexión a la base de datos"""
+    try:
+        with db_pool.conexion() as conn:
+            cursor = conn.cursor()
+            with metricas.medir('db_query'):
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            cursor.close()
         logger.info("✅ Conexión a base de datos exitosa")
         return True
     except Exception as e:
-        logger.error(f"❌ Error conectando a base de datos: {e}")
+        logger.error("❌ Error conectando a base de datos: %s", e)
         return False
 
+# Errores que invalidan la sesión completa. Las SMTPException (destinatario
+# rechazado, error de datos...) también heredan de OSError, pero solo afectan
+# a un mensaje: se registran por destinatario y la sesión sigue en uso.
+ERRORES_SESION_SMTP = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+class SesionSMTP:
+    """Sesión SMTP autenticada y reutilizable"""
+
+    __slots__ = ('conectar', 'server', 'creada', 'ultimo_uso', 'mensajes')
+
+    def __init__(self, conectar):
+        self.conectar = conectar
+        self.server = None
+        self.reconectar()
+
+    def reconectar(self):
+        self.cerrar()
+        self.server = self.conectar()
+        self.creada = self.ultimo_uso = time.monotonic()
+        self.mensajes = 0
+
+    def activa(self):
+        """Comprobar la sesión con NOOP"""
+        try:
+            codigo, _ = self.server.noop()
+            return codigo == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def enviar(self, remitente, destinatario, datos):
+        """Enviar un mensaje ya codificado; si el servidor cerró la sesión, reconectar y reintentar una vez"""
+        try:
+            with metricas.medir('smtp_send'):
+                self.server.sendmail(remitente, [destinatario], datos)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.reconectar()
+            with metricas.medir('smtp_send'):
+                self.server.sendmail(remitente, [destinatario], datos)
+        self.mensajes += 1
+        self.ultimo_uso = time.monotonic()
+
+    def cerrar(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+        self.server = None
+
+class PoolSMTP:
+    """Pool pequeño de sesiones SMTP autenticadas de larga duración"""
+
+    def __init__(self, conectar, tamano=2, max_mensajes=100, noop_seg=30, timeout=60):
+        self.conectar = conectar
+        self.tamano = tamano
+        self.max_mensajes = max_mensajes
+        self.noop_seg = noop_seg
+        self.timeout = timeout
+        self._libres = deque()
+        self._creadas = 0
+        self._lock = threading.Condition()
+
+    def obtener(self):
+        """Tomar una sesión, verificándola con NOOP si estuvo inactiva"""
+        limite = time.monotonic() + self.timeout
+        with self._lock:
+            while not self._libres and self._creadas >= self.tamano:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise TimeoutError("No hay sesiones SMTP libres")
+                self._lock.wait(restante)
+            sesion = self._libres.pop() if self._libres else None
+            if sesion is None:
+                self._creadas += 1
+
+        try:
+            if sesion is None:
+                sesion = SesionSMTP(self.conectar)
+            elif time.monotonic() - sesion.ultimo_uso > self.noop_seg and not sesion.activa():
+                # El servidor cerró la sesión por inactividad
+                sesion.reconectar()
+        except Exception:
+            with self._lock:
+                self._creadas -= 1
+                self._lock.notify()
+            raise
+        return sesion
+
+    def devolver(self, sesion, descartar=False):
+        """Devolver una sesión; se cierra si falló o alcanzó el máximo de mensajes"""
+        descartar = descartar or sesion.mensajes >= self.max_mensajes
+        if descartar:
+            sesion.cerrar()
+        with self._lock:
+            if descartar:
+                self._creadas -= 1
+            else:
+                self._libres.append(sesion)
+            self._lock.notify()
+
+    @contextmanager
+    def sesion(self):
+        sesion = self.obtener()
+        try:
+            yield sesion
+        except ERRORES_SESION_SMTP:
+            self.devolver(sesion, descartar=True)
+            raise
+        except BaseException:
+            self.devolver(sesion)
+            raise
+        else:
+            self.devolver(sesion)
+
+    def cerrar_todas(self):
+        with self._lock:
+            while self._libres:
+                self._libres.pop().cerrar()
+                self._creadas -= 1
+
+class MensajePreparado:
+    """Mensaje MIME codificado una sola vez; solo cambia el encabezado To por destinatario"""
+
+    __slots__ = ('remitente', 'cuerpo')
+
+    def __init__(self, remitente, nombre_remitente, asunto, contenido_html, contenido_texto=None):
+        politica = email.policy.SMTP
+        mensaje = MIMEMultipart('alternative', policy=politica)
+        mensaje['From'] = f"{nombre_remitente} <{remitente}>"
+        mensaje['Subject'] = asunto
+        mensaje['Date'] = formatdate(localtime=True)
+        # La parte preferida (HTML) va al final
+        if contenido_texto:
+            mensaje.attach(MIMEText(contenido_texto, 'plain', 'utf-8', policy=politica))
+        mensaje.attach(MIMEText(contenido_html, 'html', 'utf-8', policy=politica))
+        self.remitente = remitente
+        self.cuerpo = mensaje.as_bytes()
+
+    def para(self, destinatario):
+        """Bytes listos para enviar a un destinatario"""
+        return f"To: {destinatario}\r\n".encode('ascii') + self.cuerpo
+
 class EmailService:
     """Servicio para envío de correos con Gmail"""
+
+    # Plantillas Jinja compiladas una vez y compartidas por todas las instancias
+    plantillas = Environment(
+        loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'email')),
+        autoescape=select_autoescape(['html']),
+        auto_reload=False
+    )
     
     def __init__(self):
-        self.smtp_server = 'smtp.gmail.com'
-        self.smtp_port = 587
+        self.smtp_server = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+        self.smtp_port = int(os.getenv('MAIL_PORT', '587'))
+        self.usar_tls = os.getenv('MAIL_TLS', 'true').lower() != 'false'
         self.username = os.getenv('MAIL_USER', '').strip()
         self.password = os.getenv('MAIL_PASS', '').strip()
         self.admin_email = os.getenv('MAIL_ADMIN', '').strip()
@@ -74,149 +1036,889 @@ class EmailService:
         if not validar_email(self.username):
             raise ValueError("MAIL_USER debe ser un email válido")
         
-        logger.info(f"✅ EmailService configurado para: {self.username}")
+        self.plantilla_html = self.plantillas.get_template('confirmacion.html')
+        self.plantilla_texto = self.plantillas.get_template('confirmacion.txt')
+        
+        self.pool_smtp = PoolSMTP(
+            self._conectar,
+            tamano=int(os.getenv('MAIL_POOL_SIZE', '2')),
+            max_mensajes=int(os.getenv('MAIL_MAX_MENSAJES_SESION', '100')),
+            noop_seg=int(os.getenv('MAIL_NOOP_SEG', '30'))
+        )
+        
+        logger.info("✅ EmailService configurado para: %s", self.username)
     
-    def test_smtp_connection(self):
-        """Probar conexión SMTP con Gmail"""
-        try:
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
+    def _conectar(self, timeout=30):
+        """Abrir una sesión SMTP autenticada"""
+        with metricas.medir('smtp_connect'):
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=timeout)
+            try:
+                if self.usar_tls:
+                    server.starttls()
                 server.login(self.username, self.password)
-                logger.info("✅ Conexión SMTP exitosa con Gmail")
-                return True
+            except Exception:
+                server.close()
+                raise
+        return server
+
+    def preparar_mensaje(self, asunto, contenido_html, contenido_texto=None):
+        return MensajePreparado(self.username, "Colegio XYZ", asunto, contenido_html, contenido_texto)
+
+    def test_smtp_connection(self, timeout=10):
+        """Probar conexión SMTP con Gmail
+
+        Usa una conexión propia y no el pool: los workers de la cola pueden tener
+        todas las sesiones ocupadas (y una sesión libre reciente se presta sin
+        tocar la red, así que no comprobaría nada).
+        """
+        server = None
+        try:
+            server = self._conectar(timeout=timeout)
+            codigo, _ = server.noop()
+            if codigo != 250:
+                raise smtplib.SMTPResponseException(codigo, b"NOOP rechazado")
+            logger.info("✅ Conexión SMTP exitosa con Gmail")
+            return True
         except Exception as e:
-            logger.error(f"❌ Error conectando a Gmail: {e}")
+            logger.error("❌ Error conectando a Gmail: %s", e)
             return False
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    server.close()
     
-    def crear_mensaje_inscripcion(self, data):
-        """Crear mensaje HTML para inscripción"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="es">
-        <head>
-            <meta charset="UTF-8">
-            <title>Confirmación de Inscripción</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; background: white; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }}
-                .content {{ padding: 30px; }}
-                .info-card {{ background: #f8f9ff; padding: 20px; border-radius: 8px; margin: 15px 0; }}
-                .footer {{ background: #f8f9fa; padding: 20px; text-align: center; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🎓 Colegio XYZ</h1>
-                    <h2>✅ Inscripción Confirmada</h2>
-                </div>
-                
-                <div class="content">
-                    <h2>Estimados Padres de Familia,</h2>
-                    <p>Nos complace confirmar que hemos recibido la inscripción de su hijo(a).</p>
-                    
-                    <div class="info-card">
-                        <h3>📋 Datos del Estudiante</h3>
-                        <p><strong>Nombre:</strong> {data.get('nombres', 'N/A')} {data.get('apellidos', 'N/A')}</p>
-                        <p><strong>Fecha de nacimiento:</strong> {data.get('fechaNacimiento', 'N/A')}</p>
-                        <p><strong>Grado:</strong> {data.get('grado', 'N/A')}°</p>
-                        <p><strong>Año escolar:</strong> {data.get('anoEscolar', 'N/A')}</p>
-                    </div>
-                    
-                    <div class="info-card">
-                        <h3>👨‍👩‍👧‍👦 Datos de los Padres</h3>
-                        <p><strong>Padre:</strong> {data.get('padreNombres', 'N/A')}</p>
-                        <p><strong>Madre:</strong> {data.get('madreNombres', 'N/A')}</p>
-                        <p><strong>Dirección:</strong> {data.get('direccion', 'N/A')}</p>
-                    </div>
-                    
-                    <div class="info-card">
-                        <h3>📞 Próximos Pasos</h3>
-                        <ul>
-                            <li>Recibirán una llamada en los próximos 2-3 días hábiles</li>
-                            <li>Se coordinará una visita a nuestras instalaciones</li>
-                            <li>Entrevista con el departamento académico</li>
-                        </ul>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <h3>Colegio XYZ</h3>
-                    <p>📧 {self.admin_email or 'admisiones@colegio-xyz.edu.pe'}</p>
-                    <p>📱 (01) 234-5678</p>
-                    <p>Enviado el {datetime.now().strftime('%d/%m/%Y a las %H:%M')}</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        return html_content
+    def crear_mensaje_inscripcion(self, inscripcion):
+        """Renderizar la confirmación de una Inscripcion; devuelve (html, texto)"""
+        contexto = inscripcion.contexto_correo()
+        contexto['admin_email'] = self.admin_email or 'admisiones@colegio-xyz.edu.pe'
+        contexto['fecha_envio'] = datetime.now().strftime('%d/%m/%Y a las %H:%M')
+        with metricas.medir('template_render'):
+            return self.plantilla_html.render(contexto), self.plantilla_texto.render(contexto)
     
-    def enviar_correo_masivo(self, destinatarios, asunto, contenido_html):
+    def enviar_correo_masivo(self, destinatarios, asunto, contenido_html, contenido_texto=None):
         """Enviar correo a múltiples destinatarios"""
+        exitos = []
+        errores = []
         try:
             destinatarios_validos = [email.strip() for email in destinatarios if validar_email(email.strip())]
             
             if not destinatarios_validos:
                 return {"exitos": [], "errores": [], "total_enviados": 0, "total_errores": 0}
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                
-                exitos = []
-                errores = []
-                
+            # El cuerpo se codifica una sola vez para todos los destinatarios
+            preparado = self.preparar_mensaje(asunto, contenido_html, contenido_texto)
+            
+            with self.pool_smtp.sesion() as sesion:
                 for destinatario in destinatarios_validos:
                     try:
-                        mensaje = MIMEMultipart('alternative')
-                        mensaje['From'] = f"Colegio XYZ <{self.username}>"
-                        mensaje['To'] = destinatario
-                        mensaje['Subject'] = asunto
-                        
-                        parte_html = MIMEText(contenido_html, 'html', 'utf-8')
-                        mensaje.attach(parte_html)
-                        
-                        server.send_message(mensaje)
+                        sesion.enviar(preparado.remitente, destinatario, preparado.para(destinatario))
                         exitos.append(destinatario)
-                        logger.info(f"✅ Correo enviado a: {destinatario}")
+                        logger.debug("✅ Correo enviado a: %s", destinatario)
                         
+                    except ERRORES_SESION_SMTP:
+                        raise
                     except Exception as e:
                         errores.append({"email": destinatario, "error": str(e)})
-                        logger.error(f"❌ Error enviando a {destinatario}: {e}")
-                
-                return {
-                    "exitos": exitos,
-                    "errores": errores,
-                    "total_enviados": len(exitos),
-                    "total_errores": len(errores)
-                }
+                        logger.error("❌ Error enviando a %s: %s", destinatario, e)
                 
         except Exception as e:
-            logger.error(f"❌ Error general en envío: {e}")
-            return {"exitos": [], "errores": [], "total_enviados": 0, "total_errores": len(destinatarios)}
+            logger.error("❌ Error general en envío: %s", e)
+            # Los ya enviados se conservan; los que faltaban cuentan como error
+            procesados = set(exitos) | {error["email"] for error in errores}
+            errores.extend(
+                {"email": d, "error": str(e)} for d in destinatarios if d.strip() not in procesados
+            )
+
+        logger.info("📬 Envío masivo: %d enviados, %d con error", len(exitos), len(errores),
+                    extra={'enviados': len(exitos), 'errores': len(errores)})
+        return {
+            "exitos": exitos,
+            "errores": errores,
+            "total_enviados": len(exitos),
+            "total_errores": len(errores)
+        }
+
+class LimitadorEnvios:
+    """Ritmo máximo de envíos SMTP de este proceso, compartido por los workers (límites de Gmail)
+
+    Cada proceso tiene el suyo: el límite global se reparte con por_minuto_por_proceso().
+    """
+
+    def __init__(self, por_minuto=0):
+        self.intervalo = 60.0 / por_minuto if por_minuto > 0 else 0.0
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def reservar(self):
+        """Reservar el siguiente turno de envío; devuelve los segundos que hay que esperar"""
+        if not self.intervalo:
+            return 0.0
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._proximo, ahora)
+            self._proximo = turno + self.intervalo
+        return turno - ahora
+
+class ColaCorreos:
+    """Cola persistente de correos (tabla cola_correos) con workers en segundo plano"""
+
+    # Correos que quedaron 'enviando' más de este tiempo se consideran abandonados
+    RECLAMO_EXPIRA_SEG = 600
+
+    # Sentencias compartidas con la cola asíncrona de app_async.py
+    SQL_ENCOLAR = """
+        INSERT INTO cola_correos (inscripcion_id, destinatario, asunto, contenido_html, contenido_texto)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    SQL_ENCOLAR_REENVIO = """
+        INSERT INTO cola_correos (inscripcion_id, destinatario, asunto, contenido_html, contenido_texto, reenvio)
+        VALUES (%s, %s, %s, %s, %s, 1)
+    """
+    SQL_RECLAMAR = """
+        UPDATE cola_correos
+        SET estado = 'enviando', reclamado_por = %s, fecha_reclamo = NOW(),
+            intentos = intentos + 1
+        WHERE estado = 'pendiente' AND proximo_intento <= NOW()
+        ORDER BY id
+        LIMIT %s
+    """
+    SQL_RECLAMADOS = """
+        SELECT id, inscripcion_id, destinatario, asunto, contenido_html, contenido_texto, intentos
+        FROM cola_correos
+        WHERE reclamado_por = %s AND estado = 'enviando'
+    """
+    SQL_RECUPERAR = """
+        UPDATE cola_correos
+        SET estado = 'pendiente', reclamado_por = NULL
+        WHERE estado = 'enviando'
+          AND fecha_reclamo < NOW() - INTERVAL %s SECOND
+    """
+    SQL_ENVIADO = """
+        UPDATE cola_correos
+        SET estado = 'enviado', fecha_envio = NOW(), ultimo_error = NULL
+        WHERE id = %s
+    """
+    SQL_REINTENTO = """
+        UPDATE cola_correos
+        SET estado = 'pendiente', reclamado_por = NULL, ultimo_error = %s,
+            proximo_intento = NOW() + INTERVAL %s SECOND
+        WHERE id = %s
+    """
+    SQL_FALLIDO = """
+        UPDATE cola_correos
+        SET estado = 'fallido', ultimo_error = %s
+        WHERE id = %s
+    """
+
+    def __init__(self, pool, servicio, workers=2, lote=20, intervalo=5,
+                 max_intentos=5, backoff_base=30, por_minuto=0):
+        self.pool = pool
+        self.servicio = servicio
+        self.workers = workers
+        self.limitador = LimitadorEnvios(por_minuto)
+        if por_minuto > 0:
+            # Un lote reclamado debe enviarse antes de que expire el reclamo
+            lote = max(1, min(lote, por_minuto * self.RECLAMO_EXPIRA_SEG // 120))
+        self.lote = lote
+        self.intervalo = intervalo
+        self.max_intentos = max_intentos
+        self.backoff_base = backoff_base
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilos = []
+
+    def encolar(self, cursor, inscripcion_id, destinatarios, asunto, contenido_html, contenido_texto=None):
+        """Insertar correos en la cola usando el cursor de la transacción actual"""
+        return self.encolar_lote(
+            cursor, [(inscripcion_id, d, asunto, contenido_html, contenido_texto) for d in destinatarios]
+        )
+
+    def encolar_lote(self, cursor, correos, reenvio=False):
+        """Insertar varios correos (inscripcion_id, destinatario, asunto, html, texto) en un solo INSERT"""
+        if not correos:
+            return 0
+        cursor.executemany(self.SQL_ENCOLAR_REENVIO if reenvio else self.SQL_ENCOLAR, correos)
+        return len(correos)
+
+    def notificar(self):
+        """Avisar a los workers que hay correos nuevos"""
+        self._despertar.set()
+
+    def iniciar(self):
+        if self._hilos:
+            return
+        for i in range(self.workers):
+            hilo = threading.Thread(
+                target=self._bucle, args=(i == 0,), name=f"cola-correos-{i}", daemon=True
+            )
+            hilo.start()
+            self._hilos.append(hilo)
+        logger.info("📬 Cola de correos iniciada con %s workers", self.workers)
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=5)
+        self._hilos = []
+
+    def _recuperar_abandonados(self):
+        """Devolver a 'pendiente' los reclamos de workers muertos; False si no se pudo"""
+        try:
+            with self.pool.conexion() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self.SQL_RECUPERAR, (self.RECLAMO_EXPIRA_SEG,))
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.error("❌ Error recuperando correos abandonados: %s", e)
+            return False
+
+    def _bucle(self, recuperar=False):
+        # La recuperación toca la base de datos: se hace en el worker, no al arrancar,
+        # y se repite (un worker de otro proceso puede morir en cualquier momento;
+        # si MySQL aún no respondía, se reintenta en la siguiente vuelta)
+        ultima_recuperacion = None
+        while not self._detener.is_set():
+            if recuperar and (ultima_recuperacion is None
+                              or time.monotonic() - ultima_recuperacion > self.RECLAMO_EXPIRA_SEG / 2):
+                if self._recuperar_abandonados():
+                    ultima_recuperacion = time.monotonic()
+            try:
+                procesados = self.procesar_lote()
+            except Exception as e:
+                logger.error("❌ Error en worker de correos: %s", e)
+                procesados = 0
+            if procesados < self.lote:
+                self._despertar.wait(self.intervalo)
+                self._despertar.clear()
+
+    def _reclamar(self):
+        """Marcar un lote de correos pendientes como 'enviando' para este worker"""
+        token = uuid.uuid4().hex
+        with self.pool.conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(self.SQL_RECLAMAR, (token, self.lote))
+            if cursor.rowcount == 0:
+                cursor.close()
+                return []
+            cursor.execute(self.SQL_RECLAMADOS, (token,))
+            correos = cursor.fetchall()
+            cursor.close()
+        return correos
+
+    def procesar_lote(self):
+        """Enviar un lote de la cola en una sola sesión SMTP; devuelve cuántos se procesaron"""
+        correos = self._reclamar()
+        if not correos:
+            return 0
+        # Los logs del lote comparten un identificador, como los de una petición;
+        # el hilo es reutilizado por el siguiente lote, así que se restaura al terminar
+        token = peticion_id_actual.set(f"correos-{uuid.uuid4().hex[:8]}")
+        try:
+            self._enviar_lote(correos)
+        finally:
+            peticion_id_actual.reset(token)
+        return len(correos)
+
+    def _enviar_lote(self, correos):
+        resultados = []
+        # Los correos con el mismo contenido (padre y madre) se codifican una sola vez
+        preparados = {}
+        try:
+            with self.servicio.pool_smtp.sesion() as sesion:
+                for correo in correos:
+                    try:
+                        clave = (correo['asunto'], correo['contenido_html'], correo['contenido_texto'])
+                        preparado = preparados.get(clave)
+                        if preparado is None:
+                            preparado = preparados[clave] = self.servicio.preparar_mensaje(*clave)
+                        destinatario = correo['destinatario']
+                        time.sleep(self.limitador.reservar())
+                        sesion.enviar(preparado.remitente, destinatario, preparado.para(destinatario))
+                        resultados.append((correo, None))
+                        logger.debug("✅ Correo enviado a: %s", destinatario)
+                    except ERRORES_SESION_SMTP:
+                        raise
+                    except Exception as e:
+                        resultados.append((correo, str(e)))
+                        logger.error("❌ Error enviando a %s: %s", correo['destinatario'], e,
+                                     extra={'correo_id': correo['id']})
+        except Exception as e:
+            # Falló la sesión SMTP: los correos restantes se reintentarán
+            logger.error("❌ Error en la sesión SMTP: %s", e)
+            procesados = {c['id'] for c, _ in resultados}
+            resultados += [(c, str(e)) for c in correos if c['id'] not in procesados]
+
+        self._registrar_resultados(resultados)
+        self.resumir_lote(resultados)
+
+    def clasificar_resultados(self, resultados):
+        """Separar [(correo, error)] en parámetros para SQL_ENVIADO, SQL_REINTENTO y SQL_FALLIDO"""
+        enviados = [(c['id'],) for c, error in resultados if error is None]
+        reintentos = []
+        fallidos = []
+        for correo, error in resultados:
+            if error is None:
+                continue
+            if correo['intentos'] >= self.max_intentos:
+                fallidos.append((error[:500], correo['id']))
+            else:
+                espera = self.backoff_base * 2 ** (correo['intentos'] - 1)
+                reintentos.append((error[:500], espera, correo['id']))
+        return enviados, reintentos, fallidos
+
+    def resumir_lote(self, resultados):
+        """Una sola línea INFO por lote; el detalle por destinatario queda en DEBUG"""
+        enviados, reintentos, fallidos = self.clasificar_resultados(resultados)
+        logger.info("📬 Lote de correos: %d enviados, %d para reintentar, %d fallidos",
+                    len(enviados), len(reintentos), len(fallidos),
+                    extra={'enviados': len(enviados), 'reintentos': len(reintentos), 'fallidos': len(fallidos)})
+
+    def eventos_resultados(self, resultados):
+        """Eventos del panel para los correos que llegaron a un estado final"""
+        eventos = []
+        for correo, error in resultados:
+            if error is None:
+                estado = 'enviado'
+            elif correo['intentos'] >= self.max_intentos:
+                estado = 'fallido'
+            else:
+                continue
+            eventos.append(('correo', correo['inscripcion_id'], {
+                'inscripcion_id': correo['inscripcion_id'],
+                'destinatario': correo['destinatario'],
+                'estado': estado
+            }))
+        return eventos
+
+    def _registrar_resultados(self, resultados):
+        enviados, reintentos, fallidos = self.clasificar_resultados(resultados)
+        # Los estados y sus eventos se guardan en la misma transacción
+        with self.pool.conexion() as conn:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            for sql, parametros in ((self.SQL_ENVIADO, enviados),
+                                    (self.SQL_REINTENTO, reintentos),
+                                    (self.SQL_FALLIDO, fallidos)):
+                if parametros:
+                    cursor.executemany(sql, parametros)
+            DifusorEventos.registrar(cursor, self.eventos_resultados(resultados))
+            conn.commit()
+            cursor.close()
+        if difusor_eventos:
+            difusor_eventos.notificar()
+
+    def estado_inscripcion(self, inscripcion_id):
+        """Estado de entrega de cada correo de una inscripción"""
+        with self.pool.conexion() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT destinatario, estado, intentos, ultimo_error, fecha_creacion, fecha_envio
+                FROM cola_correos
+                WHERE inscripcion_id = %s
+                ORDER BY id
+            """, (inscripcion_id,))
+            correos = cursor.fetchall()
+            cursor.close()
+        return correos
+
+class DifusorEventos:
+    """Eventos del panel (tabla eventos) repartidos a los clientes SSE
+
+    Las escrituras registran el evento en su misma transacción; un solo hilo por
+    proceso lee los nuevos cada `intervalo` segundos y los reparte a todas las
+    conexiones /eventos abiertas, así N pantallas no cuestan N consultas. Sin
+    conexiones abiertas no se consulta MySQL: la posición se vuelve a fijar
+    cuando llega el primer suscriptor.
+    """
+
+    SQL_REGISTRAR = "INSERT INTO eventos (tipo, inscripcion_id, datos) VALUES (%s, %s, %s)"
+    SQL_DESDE = """
+        SELECT id, tipo, datos
+        FROM eventos
+        WHERE id > %s AND id <= %s
+        ORDER BY id
+        LIMIT %s
+    """
+    SQL_ULTIMO = "SELECT COALESCE(MAX(id), 0), COALESCE(MIN(id), 0) FROM eventos"
+    SQL_PURGAR = "DELETE FROM eventos WHERE fecha < NOW() - INTERVAL %s HOUR LIMIT 5000"
+    SQL_PASO = "SELECT @@auto_increment_increment"
 
-# Intentar inicializar el servicio de email
+    def __init__(self, pool, intervalo=1.0, hueco_seg=2.0, retencion_horas=24, lote=500):
+        self.pool = pool
+        self.intervalo = intervalo
+        self.hueco_seg = hueco_seg
+        self.retencion_horas = retencion_horas
+        self.lote = lote
+        self.ultimo = None
+        # Distancia entre ids consecutivos (auto_increment_increment del servidor)
+        self.paso = None
+        self._hueco_desde = None
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        # Serializa la lectura del hilo con el reposicionamiento al suscribirse
+        self._lock_lectura = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    @staticmethod
+    def fila(tipo, inscripcion_id, datos):
+        """Parámetros de SQL_REGISTRAR"""
+        return (tipo, inscripcion_id, json.dumps(datos, ensure_ascii=False, default=str))
+
+    @classmethod
+    def registrar(cls, cursor, eventos):
+        """Insertar eventos [(tipo, inscripcion_id, datos)] con el cursor de la transacción actual"""
+        if eventos:
+            cursor.executemany(cls.SQL_REGISTRAR, [cls.fila(*e) for e in eventos])
+
+    def notificar(self):
+        """Leer ya en lugar de esperar al siguiente intervalo (escrituras de este proceso)"""
+        self._despertar.set()
+
+    def suscribir(self):
+        cola = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._suscriptores.add(cola)
+            metricas.fijar('sse_conexiones', len(self._suscriptores))
+        with self._lock_lectura:
+            if self.ultimo is None:
+                try:
+                    self._posicionar()
+                except Exception as e:
+                    # El hilo lo reintentará; mientras tanto el cliente recibe 'recargar'
+                    logger.error("❌ Error leyendo eventos: %s", e)
+        return cola
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+            metricas.fijar('sse_conexiones', len(self._suscriptores))
+
+    def suscrito(self, cola):
+        with self._lock:
+            return cola in self._suscriptores
+
+    def pendientes_desde(self, desde, maximo):
+        """Eventos (id, tipo, datos) posteriores a `desde` ya repartidos; None si no alcanzan"""
+        if self.ultimo is None:
+            return None
+        with self.pool.conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.SQL_ULTIMO)
+            _, minimo = cursor.fetchone()
+            if minimo and desde < minimo - 1:
+                # Los eventos intermedios ya se purgaron
+                cursor.close()
+                return None
+            # Solo hasta lo ya repartido: lo posterior llega por la suscripción
+            cursor.execute(self.SQL_DESDE, (desde, self.ultimo, maximo + 1))
+            filas = cursor.fetchall()
+            cursor.close()
+        return None if len(filas) > maximo else filas
+
+    def iniciar(self):
+        if self._hilo:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="difusor-eventos", daemon=True)
+        self._hilo.start()
+
+    def _posicionar(self):
+        """Empezar a repartir desde el evento más reciente"""
+        with self.pool.conexion() as conn:
+            cursor = conn.cursor()
+            if self.paso is None:
+                cursor.execute(self.SQL_PASO)
+                self.paso = int(cursor.fetchone()[0]) or 1
+            cursor.execute(self.SQL_ULTIMO)
+            self.ultimo = cursor.fetchone()[0]
+            cursor.close()
+        self._hueco_desde = None
+
+    def _bucle(self):
+        ultima_purga = 0.0
+        while True:
+            try:
+                with self._lock_lectura:
+                    with self._lock:
+                        hay_suscriptores = bool(self._suscriptores)
+                    if not hay_suscriptores:
+                        self.ultimo = None
+                    else:
+                        if self.ultimo is None:
+                            self._posicionar()
+                        self._leer()
+                if time.monotonic() - ultima_purga > 600:
+                    ultima_purga = time.monotonic()
+                    with self.pool.conexion() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute(self.SQL_PURGAR, (self.retencion_horas,))
+                        cursor.close()
+            except Exception as e:
+                logger.error("❌ Error leyendo eventos: %s", e)
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def _leer(self):
+        with self.pool.conexion() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.SQL_DESDE, (self.ultimo, 2 ** 63 - 1, self.lote))
+            filas = cursor.fetchall()
+            cursor.close()
+
+        nuevos = []
+        for fila in filas:
+            # Un id que falta puede ser una transacción aún sin commit: se espera
+            # hasta hueco_seg antes de darlo por perdido (rollback) y seguir
+            if fila[0] != self.ultimo + self.paso:
+                if self._hueco_desde is None:
+                    self._hueco_desde = time.monotonic()
+                if time.monotonic() - self._hueco_desde < self.hueco_seg:
+                    break
+            self._hueco_desde = None
+            self.ultimo = fila[0]
+            nuevos.append(fila)
+        if not nuevos:
+            return
+
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for cola in suscriptores:
+            try:
+                for evento in nuevos:
+                    cola.put_nowait(evento)
+            except queue.Full:
+                # Cliente demasiado lento: se corta y al reconectar se pone al día
+                self.desuscribir(cola)
+
+def evento_inscripcion(inscripcion, inscripcion_id, fecha_registro, correos_encolados):
+    """Evento del panel para una inscripción recién guardada"""
+    inscripcion.id = inscripcion_id
+    inscripcion.fecha_registro = fecha_registro
+    datos = inscripcion.resumen()
+    datos['correos'] = {'pendiente': correos_encolados} if correos_encolados else {}
+    return ('inscripcion', inscripcion_id, datos)
+
+class VerificadorSalud:
+    """Verifica MySQL y SMTP en segundo plano y guarda el último resultado"""
+
+    def __init__(self, intervalo_db=15, intervalo_email=300, profundo_min_seg=30, timeout_email=10):
+        self.intervalos = {'db': intervalo_db, 'email': intervalo_email}
+        self.profundo_min_seg = profundo_min_seg
+        self.timeout_email = timeout_email
+        self._estado = {
+            'db': {'ok': None, 'verificado': None, 'error': None},
+            'email': {'ok': None, 'verificado': None, 'error': None}
+        }
+        self._proxima = {'db': 0.0, 'email': 0.0}
+        self._ultimo_profundo = 0.0
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _registrar(self, servicio, ok, error=None):
+        with self._lock:
+            self._estado[servicio] = {
+                'ok': ok,
+                'verificado': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+                'error': error
+            }
+            self._proxima[servicio] = time.monotonic() + self.intervalos[servicio]
+
+    def verificar_db(self):
+        ok = test_db_connection()
+        self._registrar('db', ok, None if ok else "No se pudo conectar a la base de datos")
+        return ok
+
+    def verificar_email(self):
+        if not email_service:
+            self._registrar('email', False, "Servicio de email no configurado")
+            return False
+        ok = email_service.test_smtp_connection(timeout=self.timeout_email)
+        self._registrar('email', ok, None if ok else "No se pudo conectar al servidor SMTP")
+        return ok
+
+    def verificar(self):
+        self.verificar_db()
+        self.verificar_email()
+
+    def verificar_profundo(self):
+        """Verificación inmediata, limitada a una cada profundo_min_seg; devuelve (ejecutada, espera)"""
+        with self._lock:
+            espera = self._ultimo_profundo + self.profundo_min_seg - time.monotonic()
+            if espera > 0:
+                return False, espera
+            self._ultimo_profundo = time.monotonic()
+        self.verificar()
+        return True, 0
+
+    def estado(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self._estado.items()}
+
+    def listo(self):
+        """La aplicación puede atender inscripciones si MySQL responde (el email es opcional)"""
+        with self._lock:
+            return self._estado['db']['ok'] is True
+
+    def iniciar(self):
+        if self._hilo:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="verificador-salud", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def _bucle(self):
+        verificaciones = {'db': self.verificar_db, 'email': self.verificar_email}
+        while not self._detener.is_set():
+            for servicio, verificar in verificaciones.items():
+                if time.monotonic() >= self._proxima[servicio]:
+                    try:
+                        verificar()
+                    except Exception as e:
+                        logger.error("❌ Error verificando %s: %s", servicio, e)
+                        self._registrar(servicio, False, str(e))
+            espera = min(self._proxima.values()) - time.monotonic()
+            self._detener.wait(max(espera, 1))
+
+# Servicios del proceso; los crea create_app() sin tocar la red
 email_service = None
-try:
-    email_service = EmailService()
-    if email_service.test_smtp_connection():
-        logger.info("✅ Servicio de email listo")
-    else:
-        logger.warning("⚠️ Email configurado pero no se puede conectar")
+cola_correos = None
+verificador_salud = None
+difusor_eventos = None
+
+def por_minuto_por_proceso():
+    """Parte de MAIL_MAX_POR_MINUTO (límite total) que corresponde a este proceso
+
+    Cada proceso de gunicorn/uvicorn envía con su propio limitador, así que el
+    total se divide entre MAIL_PROCESOS (por defecto WEB_CONCURRENCY, que es el
+    número de workers que usa gunicorn si no se pasa --workers).
+    """
+    total = int(os.getenv('MAIL_MAX_POR_MINUTO', '60'))
+    procesos = max(1, int(os.getenv('MAIL_PROCESOS', os.getenv('WEB_CONCURRENCY', '1'))))
+    if total <= 0:
+        return 0
+    return max(1, total // procesos)
+
+# Argumento con el que se iniciaron los servicios en este proceso (None: sin iniciar)
+_servicios_iniciados = None
+
+def iniciar_servicios(workers_correo=True):
+    """Crear los servicios de email y salud; las verificaciones de red van en segundo plano"""
+    global email_service, cola_correos, verificador_salud, difusor_eventos, _servicios_iniciados
+    if verificador_salud:
+        return
+    _servicios_iniciados = workers_correo
+
+    difusor_eventos = DifusorEventos(
+        db_pool,
+        intervalo=float(os.getenv('EVENTOS_INTERVALO_SEG', '1')),
+        retencion_horas=int(os.getenv('EVENTOS_RETENCION_HORAS', '24'))
+    )
+    difusor_eventos.iniciar()
+
+    try:
+        email_service = EmailService()
+    except Exception as e:
+        logger.warning("⚠️ Email no configurado: %s", e)
         email_service = None
-except Exception as e:
-    logger.warning(f"⚠️ Email no configurado: {e}")
-    email_service = None
 
-@app.route('/')
+    if email_service:
+        cola_correos = ColaCorreos(
+            db_pool, email_service,
+            workers=int(os.getenv('MAIL_WORKERS', '2')),
+            max_intentos=int(os.getenv('MAIL_MAX_INTENTOS', '5')),
+            backoff_base=int(os.getenv('MAIL_BACKOFF_SEG', '30')),
+            por_minuto=por_minuto_por_proceso()
+        )
+        if workers_correo:
+            cola_correos.iniciar()
+
+    verificador_salud = VerificadorSalud(
+        intervalo_db=int(os.getenv('SALUD_INTERVALO_DB_SEG', '15')),
+        intervalo_email=int(os.getenv('SALUD_INTERVALO_EMAIL_SEG', '300')),
+        profundo_min_seg=int(os.getenv('SALUD_PROFUNDO_MIN_SEG', '30')),
+        timeout_email=float(os.getenv('SALUD_TIMEOUT_EMAIL_SEG', '10'))
+    )
+    verificador_salud.iniciar()
+
+def _reiniciar_tras_fork():
+    """gunicorn --preload crea la app en el master: los hilos no sobreviven al fork
+
+    Cada worker empieza con pools vacíos (las conexiones heredadas comparten
+    socket con el master), candados nuevos (un hilo del master pudo dejarlos
+    tomados) y sus propios servicios en segundo plano.
+    """
+    global email_service, cola_correos, verificador_salud, difusor_eventos
+    db_pool.tras_fork()
+    db_lecturas.tras_fork()
+    metricas._lock = threading.Lock()
+    cache_estadisticas._lock = threading.Lock()
+    cache_idempotencia._lock = threading.Lock()
+    if _servicios_iniciados is None:
+        return
+    # Las sesiones SMTP heredadas tampoco se cierran: se descartan con su servicio
+    email_service = cola_correos = verificador_salud = difusor_eventos = None
+    iniciar_servicios(_servicios_iniciados)
+
+os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+@bp.before_app_request
+def asignar_peticion_id():
+    """Respetar el X-Request-ID del proxy (si es válido) o generar uno para correlacionar los logs"""
+    peticion_id = request.headers.get('X-Request-ID', '')
+    if not PATRON_PETICION_ID.match(peticion_id):
+        peticion_id = uuid.uuid4().hex[:16]
+    g.peticion_id = peticion_id
+    g.token_peticion = peticion_id_actual.set(peticion_id)
+
+@bp.before_app_request
+def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+    g.ruta_metricas = request.url_rule.rule if request.url_rule else 'no_encontrada'
+    metricas.incrementar('http_requests_en_curso', ruta=g.ruta_metricas)
+
+def leer_del_primario():
+    """Leer del primario si este cliente escribió hace poco (o lo pide con ?consistente=1)"""
+    return (request.cookies.get(COOKIE_LEER_PRIMARIO) == '1'
+            or request.args.get('consistente') == '1')
+
+@bp.after_app_request
+def marcar_escritura(response):
+    """Las réplicas pueden ir atrasadas: tras escribir, el cliente lee del primario un rato"""
+    if g.get('escritura') and db_lecturas.replicas:
+        response.set_cookie(
+            COOKIE_LEER_PRIMARIO, '1', max_age=LEER_PRIMARIO_SEG, httponly=True, samesite='Lax'
+        )
+    return response
+
+@bp.after_app_request
+def devolver_peticion_id(response):
+    if 'peticion_id' in g:
+        response.headers['X-Request-ID'] = g.peticion_id
+    return response
+
+@bp.after_app_request
+def registrar_medicion(response):
+    if 'inicio_peticion' in g:
+        metricas.observar(
+            'http_request_duracion_segundos', time.perf_counter() - g.inicio_peticion,
+            ruta=g.ruta_metricas, metodo=request.method
+        )
+        metricas.incrementar(
+            'http_requests_total',
+            ruta=g.ruta_metricas, metodo=request.method, codigo=response.status_code
+        )
+    return response
+
+@bp.teardown_app_request
+def finalizar_medicion(exc):
+    if 'ruta_metricas' in g:
+        metricas.incrementar('http_requests_en_curso', -1, ruta=g.ruta_metricas)
+    if 'token_peticion' in g:
+        # Los hilos del servidor se reutilizan: el id no debe pasar a la siguiente petición
+        peticion_id_actual.reset(g.pop('token_peticion'))
+
+# Assets compilados por build_assets.py (static/dist + manifest.json)
+DIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'dist')
+manifest_assets = {}
+
+def cargar_manifest():
+    global manifest_assets
+    try:
+        with open(os.path.join(DIST_DIR, 'manifest.json'), encoding='utf-8') as f:
+            manifest_assets = json.load(f)
+        logger.info("📦 Assets compilados: %s archivos", len(manifest_assets))
+    except FileNotFoundError:
+        manifest_assets = {}
+        logger.info("📦 Sin assets compilados; se usan static/src y el CDN (ejecuta build_assets.py)")
+
+def asset_url(nombre):
+    """URL con huella de contenido si hay build; si no, el archivo fuente"""
+    if nombre in manifest_assets:
+        return url_for('inscripciones.assets', nombre=manifest_assets[nombre])
+    return url_for('static', filename=f'src/{nombre}')
+
+@bp.app_context_processor
+def contexto_assets():
+    return {"asset_url": asset_url, "assets_compilados": bool(manifest_assets)}
+
+def codificacion_aceptada(disponibles):
+    """Elegir br/gzip según Accept-Encoding entre las codificaciones disponibles"""
+    aceptadas = request.headers.get('Accept-Encoding', '')
+    for codificacion in ('br', 'gzip'):
+        if codificacion in disponibles and codificacion in aceptadas:
+            return codificacion
+    return None
+
+@bp.route('/assets/<path:nombre>')
+def assets(nombre):
+    """Assets con huella: precomprimidos, caché de un año, ETag/304"""
+    ruta = safe_join(DIST_DIR, nombre)
+    if not ruta or not os.path.isfile(ruta):
+        abort(404)
+
+    extensiones = {'br': '.br', 'gzip': '.gz'}
+    disponibles = [c for c, ext in extensiones.items() if os.path.isfile(ruta + ext)]
+    codificacion = codificacion_aceptada(disponibles)
+    archivo = ruta + extensiones[codificacion] if codificacion else ruta
+
+    response = send_file(
+        archivo,
+        mimetype=mimetypes.guess_type(ruta)[0] or 'application/octet-stream',
+        conditional=True,
+        etag=True,
+        max_age=31536000
+    )
+    if codificacion:
+        response.headers['Content-Encoding'] = codificacion
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.immutable = True
+    return response
+
+# Página principal renderizada una vez por proceso: {codificacion: (cuerpo, etag)}
+_index_cache = {}
+_index_lock = threading.Lock()
+
+def pagina_index(codificacion):
+    with _index_lock:
+        if codificacion not in _index_cache:
+            if None not in _index_cache:
+                with metricas.medir('template_render'):
+                    html = render_template('main.html').encode('utf-8')
+                _index_cache[None] = (html, hashlib.sha256(html).hexdigest()[:16])
+            if codificacion == 'gzip':
+                html, etag = _index_cache[None]
+                _index_cache['gzip'] = (gzip.compress(html, compresslevel=9, mtime=0), f"{etag}-gz")
+        return _index_cache[codificacion]
+
+@bp.route('/')
 def index():
-    return render_template('main.html')
+    if current_app.debug:
+        # En desarrollo se renderiza siempre para ver los cambios de la plantilla
+        with metricas.medir('template_render'):
+            return render_template('main.html')
 
-@app.route('/test_email', methods=['GET'])
+    codificacion = codificacion_aceptada(['gzip'])
+    cuerpo, etag = pagina_index(codificacion)
+    response = Response(cuerpo, mimetype='text/html')
+    if codificacion:
+        response.headers['Content-Encoding'] = codificacion
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    # Revalidar siempre: la página cambia cuando cambian los assets
+    response.cache_control.no_cache = True
+    response.cache_control.public = True
+    return response.make_conditional(request)
+
+@bp.route('/test_email', methods=['GET'])
 def test_email():
-    """Endpoint para probar configuración de email"""
+    """Endpoint para probar configuración de email (último resultado del verificador)"""
     if not email_service:
         return jsonify({
             "success": False, 
@@ -224,180 +1926,805 @@ def test_email():
             "help": "Configura MAIL_USER y MAIL_PASS en .env"
         }), 500
     
-    try:
-        conexion_ok = email_service.test_smtp_connection()
-        return jsonify({
-            "success": conexion_ok,
-            "message": "✅ Gmail configurado correctamente" if conexion_ok else "❌ Error de conexión Gmail",
-            "username": email_service.username
-        })
-    except Exception as e:
-        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+    estado = verificador_salud.estado()['email']
+    conexion_ok = bool(estado['ok'])
+    return jsonify({
+        "success": conexion_ok,
+        "message": "✅ Gmail configurado correctamente" if conexion_ok else "❌ Error de conexión Gmail",
+        "username": email_service.username,
+        "verificado": estado['verificado']
+    })
 
-@app.route('/test_db', methods=['GET'])
+@bp.route('/test_db', methods=['GET'])
 def test_db():
-    """Endpoint para probar conexión a base de datos"""
-    try:
-        conexion_ok = test_db_connection()
-        return jsonify({
-            "success": conexion_ok,
-            "message": "✅ Base de datos OK" if conexion_ok else "❌ Error de conexión DB"
+    """Endpoint para probar conexión a base de datos (último resultado del verificador)"""
+    estado = verificador_salud.estado()['db']
+    conexion_ok = bool(estado['ok'])
+    return jsonify({
+        "success": conexion_ok,
+        "message": "✅ Base de datos OK" if conexion_ok else "❌ Error de conexión DB",
+        "verificado": estado['verificado']
+    })
+
+@bp.route('/health', methods=['GET'])
+def health():
+    """Liveness y readiness a partir de los resultados en caché (no abre conexiones)"""
+    listo = verificador_salud.listo()
+    return jsonify({
+        "vivo": True,
+        "listo": listo,
+        "servicios": verificador_salud.estado()
+    }), 200 if listo else 503
+
+@bp.route('/health/vivo', methods=['GET'])
+def health_vivo():
+    """Liveness: el proceso responde"""
+    return jsonify({"vivo": True})
+
+@bp.route('/health/listo', methods=['GET'])
+def health_listo():
+    """Readiness: MySQL respondió en la última verificación"""
+    listo = verificador_salud.listo()
+    return jsonify({"listo": listo}), 200 if listo else 503
+
+@bp.route('/health/profundo', methods=['GET'])
+def health_profundo():
+    """Verificación real de MySQL y SMTP, limitada por SALUD_PROFUNDO_MIN_SEG"""
+    ejecutada, espera = verificador_salud.verificar_profundo()
+    estado = verificador_salud.estado()
+    if not ejecutada:
+        respuesta = jsonify({
+            "success": False,
+            "message": f"Verificación profunda limitada; reintente en {int(espera) + 1}s",
+            "servicios": estado
         })
-    except Exception as e:
-        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+        respuesta.headers['Retry-After'] = str(int(espera) + 1)
+        return respuesta, 429
+    listo = verificador_salud.listo()
+    return jsonify({"success": listo, "listo": listo, "servicios": estado}), 200 if listo else 503
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas de este worker en formato de texto de Prometheus"""
+    estado = db_pool.estadisticas()
+    metricas.fijar('db_pool_conexiones', estado['en_uso'], estado='en_uso')
+    metricas.fijar('db_pool_conexiones', estado['libres'], estado='libres')
+    metricas.fijar('db_pool_esperando', estado['esperando'])
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/estado_pool', methods=['GET'])
+def estado_pool():
+    """Estadísticas del pool de conexiones MySQL de este worker (y de sus réplicas)"""
+    return jsonify({"success": True, "pool": db_pool.estadisticas(), "replicas": db_lecturas.estadisticas()})
 
-@app.route('/enviar_inscripcion', methods=['POST'])
+def respuesta_duplicada(inscripcion_id):
+    """Respuesta para un envío repetido: no se guarda ni se envían correos de nuevo"""
+    logger.info("🔁 Envío repetido de la inscripción %s", inscripcion_id, extra={'inscripcion_id': inscripcion_id})
+    return jsonify({
+        "success": True,
+        "message": f"✅ Esta inscripción ya fue registrada (ID: {inscripcion_id}).",
+        "inscripcion_id": inscripcion_id,
+        "correos_encolados": 0,
+        "duplicada": True
+    }), 200
+
+@bp.route('/enviar_inscripcion', methods=['POST'])
 def enviar_inscripcion():
     try:
         # Obtener datos
         data = request.get_json(force=True)
-        logger.info(f"📝 Procesando inscripción: {data.get('nombres')} {data.get('apellidos')}")
-
-        # Validar campos obligatorios
-        campos_obligatorios = ['nombres', 'apellidos', 'fechaNacimiento', 'grado', 'anoEscolar', 'direccion']
-        for campo in campos_obligatorios:
-            if not data.get(campo):
-                return jsonify({
-                    "success": False,
-                    "message": f"El campo {campo} es obligatorio"
-                }), 400
-
-        # Validar emails
-        emails = []
-        if data.get('emailPadre') and validar_email(data.get('emailPadre')):
-            emails.append(data.get('emailPadre').strip())
-        if data.get('emailMadre') and validar_email(data.get('emailMadre')):
-            emails.append(data.get('emailMadre').strip())
+        logger.info("📝 Procesando inscripción: %s %s", data.get('nombres'), data.get('apellidos'))
+
+        # Validar todos los campos de una vez
+        try:
+            inscripcion = Inscripcion.desde_dict(data)
+        except ErrorValidacion as e:
+            return jsonify({
+                "success": False,
+                "message": str(e),
+                "errores": e.errores
+            }), 400
+
+        # Reintentos del mismo envío devuelven la inscripción original
+        clave = inscripcion.clave_idempotencia(request.headers.get('Idempotency-Key'))
+        inscripcion_existente = cache_idempotencia.leer(clave)
+        if inscripcion_existente:
+            return respuesta_duplicada(inscripcion_existente)
+
+        emails = inscripcion.emails
 
         # Guardar en base de datos
         try:
-            conn = mysql.connector.connect(**db_config)
-            cursor = conn.cursor()
-            
-            query = """
-                INSERT INTO inscripciones 
-                (nombres, apellidos, fecha_nacimiento, grado, ano_escolar, 
-                 padre_nombres, madre_nombres, padre_telefono, madre_telefono, 
-                 email_padre, email_madre, direccion, profesion, fecha_registro)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
+            fecha_registro = datetime.now()
+            valores = inscripcion.valores(fecha_registro, clave)
             
-            valores = (
-                data.get('nombres', ''), data.get('apellidos', ''),
-                data.get('fechaNacimiento', ''), data.get('grado', ''),
-                data.get('anoEscolar', ''), data.get('padreNombres', ''),
-                data.get('madreNombres', ''), data.get('padreTelefono', ''),
-                data.get('madreTelefono', ''), data.get('emailPadre', ''),
-                data.get('emailMadre', ''), data.get('direccion', ''),
-                data.get('profesion', ''), datetime.now()
-            )
-            
-            cursor.execute(query, valores)
-            inscripcion_id = cursor.lastrowid
-            conn.commit()
-            cursor.close()
-            conn.close()
+            # Preparar correos antes de abrir la transacción
+            asunto = contenido_html = contenido_texto = None
+            if cola_correos and emails:
+                asunto = inscripcion.asunto
+                contenido_html, contenido_texto = email_service.crear_mensaje_inscripcion(inscripcion)
+
+            # La inscripción y sus correos se guardan en la misma transacción
+            correos_encolados = 0
+            with db_pool.conexion() as conn:
+                conn.start_transaction()
+                cursor = conn.cursor()
+                with metricas.medir('db_query'):
+                    cursor.execute(INSERT_INSCRIPCION, valores)
+                    inscripcion_id = cursor.lastrowid
+                    if asunto:
+                        correos_encolados = cola_correos.encolar(
+                            cursor, inscripcion_id, emails, asunto, contenido_html, contenido_texto
+                        )
+                    DifusorEventos.registrar(cursor, [
+                        evento_inscripcion(inscripcion, inscripcion_id, fecha_registro, correos_encolados)
+                    ])
+                with metricas.medir('db_commit'):
+                    conn.commit()
+                cursor.close()
+            cache_estadisticas.invalidar()
+            if difusor_eventos:
+                difusor_eventos.notificar()
+            cache_idempotencia.guardar(clave, inscripcion_id)
+            g.escritura = True
             
-            logger.info(f"💾 Inscripción guardada con ID: {inscripcion_id}")
+            logger.info("💾 Inscripción guardada con ID: %s", inscripcion_id, extra={'inscripcion_id': inscripcion_id})
             
+        except mysql.connector.IntegrityError as e:
+            inscripcion_existente = buscar_por_clave(clave) if e.errno == ER_DUP_ENTRY else None
+            if not inscripcion_existente:
+                raise
+            cache_idempotencia.guardar(clave, inscripcion_existente)
+            return respuesta_duplicada(inscripcion_existente)
         except mysql.connector.Error as e:
-            logger.error(f"❌ Error de base de datos: {e}")
+            logger.error("❌ Error de base de datos: %s", e)
             return jsonify({
                 "success": False,
                 "message": f"Error guardando en base de datos: {str(e)}"
             }), 500
 
-        # Intentar enviar correos
-        mensaje_final = ""
-        correos_enviados = 0
-        
-        if email_service and emails:
-            try:
-                asunto = f"✅ Confirmación de Inscripción - {data.get('nombres', '')} {data.get('apellidos', '')} - Colegio XYZ"
-                contenido_html = email_service.crear_mensaje_inscripcion(data)
-                resultado_envio = email_service.enviar_correo_masivo(emails, asunto, contenido_html)
-                
-                correos_enviados = resultado_envio["total_enviados"]
-                
-                if correos_enviados > 0:
-                    mensaje_final = f"🎉 ¡Inscripción registrada exitosamente! Se enviaron {correos_enviados} correos de confirmación."
-                else:
-                    mensaje_final = f"✅ Inscripción registrada (ID: {inscripcion_id}) pero hubo problemas enviando los correos."
-                    
-            except Exception as e:
-                logger.error(f"❌ Error enviando correos: {e}")
-                mensaje_final = f"✅ Inscripción registrada correctamente (ID: {inscripcion_id}) pero no se pudieron enviar los correos."
-        
+        # Los correos se envían en segundo plano desde la cola
+        if correos_encolados:
+            cola_correos.notificar()
+            mensaje_final = f"🎉 ¡Inscripción registrada exitosamente! Se enviarán {correos_encolados} correos de confirmación."
         elif not email_service:
             mensaje_final = f"✅ Inscripción registrada correctamente (ID: {inscripcion_id}). Para recibir emails, configure el servicio de correo en .env"
-        
-        elif not emails:
+        else:
             mensaje_final = f"✅ Inscripción registrada correctamente (ID: {inscripcion_id}). No se proporcionaron emails válidos."
 
         return jsonify({
             "success": True,
             "message": mensaje_final,
             "inscripcion_id": inscripcion_id,
-            "correos_enviados": correos_enviados
+            "correos_encolados": correos_encolados
         }), 200
 
     except Exception as e:
-        logger.error(f"❌ Error general: {e}")
+        logger.error("❌ Error general: %s", e)
         return jsonify({
             "success": False,
             "message": f"Error interno del servidor: {str(e)}"
         }), 500
 
-@app.route('/consultar_inscripciones')
+def leer_filas_importacion(stream, formato):
+    """Leer un CSV (con encabezados) o JSON Lines fila por fila desde el stream"""
+    texto = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(texto), start=1):
+            yield numero, {k.strip(): (v or '').strip() for k, v in fila.items() if k}, None
+    else:
+        for numero, linea in enumerate(texto, start=1):
+            if not linea.strip():
+                continue
+            try:
+                data = json.loads(linea)
+            except ValueError as e:
+                yield numero, None, f"JSON inválido: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield numero, None, "Cada línea debe ser un objeto JSON"
+                continue
+            yield numero, data, None
+
+def guardar_lote_importacion(lote):
+    """Insertar un lote [(fila, Inscripcion)] en una transacción; devuelve (guardadas, errores, correos)"""
+    fecha_registro = datetime.now()
+    try:
+        with db_pool.conexion() as conn:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            claves = [inscripcion.clave_idempotencia() for _, inscripcion in lote]
+            with metricas.medir('db_query'):
+                cursor.executemany(
+                    INSERT_INSCRIPCION,
+                    [inscripcion.valores(fecha_registro, clave) for (_, inscripcion), clave in zip(lote, claves)]
+                )
+                # Los ids se leen por clave de idempotencia (única dentro del lote):
+                # que sean consecutivos depende del conector y de la configuración
+                # de auto_increment, y un id equivocado asignaría correos a otro alumno
+                cursor.execute(
+                    "SELECT clave_idempotencia, id FROM inscripciones WHERE clave_idempotencia IN (%s)"
+                    % ', '.join(['%s'] * len(claves)), claves
+                )
+                ids = dict(cursor.fetchall())
+            correos = []
+            eventos = []
+            for (_, inscripcion), clave in zip(lote, claves):
+                inscripcion_id = ids[clave]
+                emails = inscripcion.emails if cola_correos else []
+                if emails:
+                    asunto = inscripcion.asunto
+                    contenido_html, contenido_texto = email_service.crear_mensaje_inscripcion(inscripcion)
+                    correos.extend(
+                        (inscripcion_id, e, asunto, contenido_html, contenido_texto) for e in emails
+                    )
+                eventos.append(evento_inscripcion(inscripcion, inscripcion_id, fecha_registro, len(emails)))
+            with metricas.medir('db_query'):
+                if cola_correos:
+                    cola_correos.encolar_lote(cursor, correos)
+                DifusorEventos.registrar(cursor, eventos)
+            with metricas.medir('db_commit'):
+                conn.commit()
+            cursor.close()
+        return len(lote), [], len(correos)
+    except mysql.connector.Error as e:
+        if len(lote) == 1:
+            if e.errno == ER_DUP_ENTRY:
+                mensaje = "Inscripción duplicada (ya registrada)"
+            else:
+                mensaje = f"Error de base de datos: {e}"
+            return 0, [{"fila": lote[0][0], "message": mensaje}], 0
+
+    # Si el lote falla, reintentar fila por fila para aislar las filas con error
+    guardadas, errores, correos = 0, [], 0
+    for item in lote:
+        guardadas_fila, errores_fila, correos_fila = guardar_lote_importacion([item])
+        guardadas += guardadas_fila
+        errores.extend(errores_fila)
+        correos += correos_fila
+    return guardadas, errores, correos
+
+@bp.route('/importar_inscripciones', methods=['POST'])
+def importar_inscripciones():
+    """Importación masiva de inscripciones desde CSV o JSON Lines
+
+    El cuerpo se lee como stream. Formato por ?formato=csv|jsonl o por Content-Type.
+    Las columnas usan los mismos nombres que el formulario (nombres, apellidos,
+    fechaNacimiento, grado, anoEscolar, direccion, emailPadre, ...).
+    """
+    formato = request.args.get('formato')
+    if not formato:
+        formato = 'csv' if 'csv' in (request.content_type or '') else 'jsonl'
+    if formato not in ('csv', 'jsonl'):
+        return jsonify({"success": False, "message": "Formato debe ser csv o jsonl"}), 400
+
+    tamano_lote = int(os.getenv('IMPORT_LOTE', '500'))
+    importadas = 0
+    correos_encolados = 0
+    errores = []
+    lote = []
+
+    try:
+        for numero, data, error in leer_filas_importacion(request.stream, formato):
+            if error:
+                errores.append({"fila": numero, "message": error})
+                continue
+            try:
+                lote.append((numero, Inscripcion.desde_dict(data)))
+            except ErrorValidacion as e:
+                errores.append({"fila": numero, "message": str(e), "errores": e.errores})
+                continue
+            if len(lote) >= tamano_lote:
+                guardadas_lote, errores_lote, correos_lote = guardar_lote_importacion(lote)
+                importadas += guardadas_lote
+                errores.extend(errores_lote)
+                correos_encolados += correos_lote
+                lote = []
+        if lote:
+            guardadas_lote, errores_lote, correos_lote = guardar_lote_importacion(lote)
+            importadas += guardadas_lote
+            errores.extend(errores_lote)
+            correos_encolados += correos_lote
+    except Exception as e:
+        logger.error("❌ Error en importación masiva: %s", e)
+        return jsonify({
+            "success": False,
+            "message": f"Error interno del servidor: {str(e)}",
+            "importadas": importadas,
+            "errores": errores
+        }), 500
+
+    if importadas:
+        cache_estadisticas.invalidar()
+        g.escritura = True
+        if difusor_eventos:
+            difusor_eventos.notificar()
+    if correos_encolados:
+        cola_correos.notificar()
+    logger.info("📥 Importación masiva: %s guardadas, %s con error", importadas, len(errores))
+
+    return jsonify({
+        "success": not errores,
+        "importadas": importadas,
+        "total_errores": len(errores),
+        "errores": errores,
+        "correos_encolados": correos_encolados
+    }), 200
+
+# Conexiones /eventos: se cierran tras EVENTOS_MAX_SEG y el navegador reconecta
+# con Last-Event-ID (así no retienen un worker indefinidamente)
+EVENTOS_MAX_SEG = int(os.getenv('EVENTOS_MAX_SEG', '300'))
+EVENTOS_MAX_PENDIENTES = 1000
+
+def formato_sse(evento_id, tipo, datos):
+    return f"id: {evento_id}\nevent: {tipo}\ndata: {datos}\n\n"
+
+@bp.route('/eventos')
+def eventos():
+    """Server-Sent Events del panel: inscripciones nuevas y cambios de estado de correos
+
+    Parámetro since (o cabecera Last-Event-ID): id del último evento recibido,
+    para ponerse al día al reconectar sin recargar todo. Si ya no se puede
+    (eventos purgados o demasiados), se envía un evento 'recargar'.
+    """
+    if not difusor_eventos:
+        return jsonify({"success": False, "message": "❌ Eventos no disponibles"}), 503
+    desde = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        desde = int(desde) if desde else None
+    except ValueError:
+        return jsonify({"success": False, "message": "since debe ser un número"}), 400
+
+    # Suscribirse antes de leer lo pendiente para no perder nada entre ambos
+    cola = difusor_eventos.suscribir()
+    try:
+        pendientes = [] if desde is None else difusor_eventos.pendientes_desde(desde, EVENTOS_MAX_PENDIENTES)
+    except Exception as e:
+        difusor_eventos.desuscribir(cola)
+        logger.error("❌ Error leyendo eventos pendientes: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    def generar():
+        fin = time.monotonic() + EVENTOS_MAX_SEG
+        try:
+            yield "retry: 3000\n\n"
+            if desde is None or pendientes is None:
+                ultimo = difusor_eventos.ultimo or 0
+                yield formato_sse(ultimo, 'inicio' if desde is None else 'recargar', '{}')
+            else:
+                ultimo = desde
+                for evento_id, tipo, datos in pendientes:
+                    ultimo = evento_id
+                    yield formato_sse(evento_id, tipo, datos)
+
+            while time.monotonic() < fin and difusor_eventos.suscrito(cola):
+                try:
+                    evento_id, tipo, datos = cola.get(timeout=15)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if evento_id <= ultimo:
+                    continue
+                ultimo = evento_id
+                yield formato_sse(evento_id, tipo, datos)
+        finally:
+            difusor_eventos.desuscribir(cola)
+
+    return Response(generar(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@bp.route('/estado_correos/<int:inscripcion_id>', methods=['GET'])
+def estado_correos(inscripcion_id):
+    """Estado de entrega de los correos de una inscripción"""
+    if not cola_correos:
+        return jsonify({"success": False, "message": "❌ Servicio de email no disponible"}), 500
+    try:
+        correos = cola_correos.estado_inscripcion(inscripcion_id)
+        for correo in correos:
+            for campo in ('fecha_creacion', 'fecha_envio'):
+                if correo[campo]:
+                    correo[campo] = correo[campo].strftime('%d/%m/%Y %H:%M:%S')
+        return jsonify({"success": True, "inscripcion_id": inscripcion_id, "correos": correos})
+    except Exception as e:
+        logger.error("❌ Error consultando estado de correos: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+def consulta_listado(args):
+    """SQL y parámetros del listado paginado; ValueError si los filtros son inválidos"""
+    limite = min(max(int(args.get('limite', 50)), 1), 200)
+    condiciones, params = construir_filtros(args)
+    if args.get('cursor'):
+        fecha_cursor, id_cursor = decodificar_cursor(args['cursor'])
+        condiciones.append("(fecha_registro < %s OR (fecha_registro = %s AND id < %s))")
+        params.extend([fecha_cursor, fecha_cursor, id_cursor])
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = f"""
+        SELECT id, nombres, apellidos, fecha_nacimiento, grado, ano_escolar,
+               padre_nombres, madre_nombres, padre_telefono, madre_telefono,
+               email_padre, email_madre, direccion, profesion, fecha_registro
+        FROM inscripciones 
+        {where}
+        ORDER BY fecha_registro DESC, id DESC
+        LIMIT %s
+    """
+    # Se pide una fila extra para saber si hay más páginas
+    return sql, params + [limite + 1], limite
+
+def sql_resumen_correos(n):
+    """Conteo de correos por estado para n inscripciones (columna ?correos=1 del listado)
+
+    Cuenta solo el último correo de cada destinatario (un reenvío reemplaza al
+    fallido) y añade el total de reenvíos como estado 'reenviado'. Los ids se
+    pasan dos veces.
+    """
+    marcadores = ', '.join(['%s'] * n)
+    return f"""
+        SELECT c.inscripcion_id, c.estado, COUNT(*)
+        FROM cola_correos c
+        WHERE c.inscripcion_id IN ({marcadores})
+          AND {SQL_ULTIMO_CORREO}
+        GROUP BY c.inscripcion_id, c.estado
+        UNION ALL
+        SELECT inscripcion_id, 'reenviado', COUNT(*)
+        FROM cola_correos
+        WHERE inscripcion_id IN ({marcadores}) AND reenvio = 1
+        GROUP BY inscripcion_id
+    """
+
+def resumen_por_inscripcion(resumen_correos):
+    """{inscripcion_id: {estado: n}} a partir de las filas de sql_resumen_correos"""
+    por_inscripcion = {}
+    for inscripcion_id, estado, n in resumen_correos:
+        # 'enviando' es transitorio: para el panel sigue pendiente
+        estado = 'pendiente' if estado == 'enviando' else estado
+        correos = por_inscripcion.setdefault(inscripcion_id, {})
+        correos[estado] = correos.get(estado, 0) + int(n)
+    return por_inscripcion
+
+def pagina_listado(filas, limite, resumen_correos=None):
+    """Recortar la fila extra, calcular el siguiente cursor y formatear con Inscripcion
+
+    resumen_correos: filas (inscripcion_id, estado, n) de sql_resumen_correos, o None
+    """
+    siguiente_cursor = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente_cursor = codificar_cursor(ultima['fecha_registro'], ultima['id'])
+    
+    inscripciones = [Inscripcion.desde_fila(fila).resumen() for fila in filas]
+    if resumen_correos is not None:
+        por_inscripcion = resumen_por_inscripcion(resumen_correos)
+        for inscripcion in inscripciones:
+            inscripcion['correos'] = por_inscripcion.get(inscripcion['id'], {})
+    
+    return {
+        "success": True,
+        "inscripciones": inscripciones,
+        "total": len(inscripciones),
+        "siguiente_cursor": siguiente_cursor
+    }
+
+@bp.route('/consultar_inscripciones')
 def consultar_inscripciones():
-    """Consultar inscripciones registradas"""
+    """Consultar inscripciones registradas (paginación por cursor y filtros)
+
+    Parámetros: limite, cursor, grado, ano_escolar, desde, hasta (AAAA-MM-DD), nombre,
+    correos=1 (añade el conteo de correos por estado de cada inscripción)
+    """
     try:
-        conn = mysql.connector.connect(**db_config)
+        try:
+            sql, params, limite = consulta_listado(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        resumen_correos = None
+        with db_lecturas.conexion(leer_del_primario()) as conn, metricas.medir('db_query'):
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            inscripciones = cursor.fetchall()
+            cursor.close()
+            if request.args.get('correos') == '1':
+                ids = [fila['id'] for fila in inscripciones[:limite]]
+                resumen_correos = []
+                if ids:
+                    cursor = conn.cursor()
+                    cursor.execute(sql_resumen_correos(len(ids)), ids * 2)
+                    resumen_correos = cursor.fetchall()
+                    cursor.close()
+
+        return jsonify(pagina_listado(inscripciones, limite, resumen_correos))
+    
+    except Exception as e:
+        logger.error("❌ Error consultando inscripciones: %s", e)
+        return jsonify({"success": False, "message": str(e)}), 500
+
+COLUMNAS_EXPORTACION = [
+    'id', 'nombres', 'apellidos', 'fecha_nacimiento', 'grado', 'ano_escolar',
+    'padre_nombres', 'madre_nombres', 'padre_telefono', 'madre_telefono',
+    'email_padre', 'email_madre', 'direccion', 'profesion', 'fecha_registro'
+]
+
+def generar_exportacion(formato, condiciones, params, tamano_lote=1000, primario=False):
+    """Generador que lee con un cursor sin buffer y emite CSV/JSONL por lotes"""
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    i_nacimiento = COLUMNAS_EXPORTACION.index('fecha_nacimiento')
+    i_registro = COLUMNAS_EXPORTACION.index('fecha_registro')
+
+    pool, conn = db_lecturas.obtener(primario)
+    completo = False
+    try:
+        cursor = conn.cursor(buffered=False)
+        with metricas.medir('db_query'):
+            cursor.execute(f"""
+                SELECT {', '.join(COLUMNAS_EXPORTACION)}
+                FROM inscripciones
+                {where}
+                ORDER BY fecha_registro DESC, id DESC
+            """, params)
+
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        if formato == 'csv':
+            escritor.writerow(COLUMNAS_EXPORTACION)
+
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            for fila in filas:
+                fila = list(fila)
+                if fila[i_nacimiento]:
+                    fila[i_nacimiento] = fila[i_nacimiento].strftime('%d/%m/%Y')
+                if fila[i_registro]:
+                    fila[i_registro] = fila[i_registro].strftime('%d/%m/%Y %H:%M:%S')
+                if formato == 'csv':
+                    escritor.writerow(fila)
+                else:
+                    buffer.write(json.dumps(dict(zip(COLUMNAS_EXPORTACION, fila)), ensure_ascii=False))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        cursor.close()
+        completo = True
+    finally:
+        # Si el cliente cortó la descarga quedan filas sin leer: descartar la conexión
+        pool.devolver(conn, descartar=not completo)
+
+@bp.route('/exportar_inscripciones')
+def exportar_inscripciones():
+    """Exportar inscripciones como CSV o JSON Lines en streaming
+
+    Parámetros: formato (csv|jsonl) y los mismos filtros que /consultar_inscripciones
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'jsonl'):
+        return jsonify({"success": False, "message": "Formato debe ser csv o jsonl"}), 400
+    try:
+        condiciones, params = construir_filtros(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    nombre = f"inscripciones_{datetime.now().strftime('%Y-%m-%d')}.{formato}"
+    tipo = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    return Response(
+        generar_exportacion(formato, condiciones, params, primario=leer_del_primario()),
+        mimetype=tipo,
+        headers={"Content-Disposition": f"attachment; filename={nombre}"}
+    )
+
+# Máximo de inscripciones por llamada a /reenviar_correos
+REENVIO_MAX = int(os.getenv('REENVIO_MAX', '500'))
+
+def cargar_para_reenvio(ids, filtro):
+    """Inscripciones a reenviar en una sola consulta; devuelve ([(Inscripcion, destinatarios)], truncado)
+
+    Con filtro['estado_correo'] solo se reenvía a los destinatarios cuyo último
+    correo está en ese estado (y, con filtro['correo_desde'], cuyo último intento
+    es de esa fecha en adelante); si no, a todos los emails de la inscripción.
+    """
+    columnas = ', '.join(f"inscripciones.{c}" for c in COLUMNAS_EXPORTACION)
+    estado_correo = None
+    if ids is not None:
+        condiciones = [f"inscripciones.id IN ({', '.join(['%s'] * len(ids))})"]
+        params = list(ids)
+    else:
+        condiciones, params = construir_filtros(filtro)
+        estado_correo = filtro.get('estado_correo')
+
+    if estado_correo:
+        if estado_correo not in ('pendiente', 'enviado', 'fallido'):
+            raise ValueError("estado_correo debe ser pendiente, enviado o fallido")
+        if filtro.get('correo_desde'):
+            try:
+                correo_desde = datetime.strptime(filtro['correo_desde'], '%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise ValueError("El filtro correo_desde debe tener formato AAAA-MM-DD")
+            # fecha_reclamo es el último intento (también el que marcó el correo como fallido)
+            condiciones.append("COALESCE(c.fecha_reclamo, c.fecha_creacion) >= %s")
+            params.append(correo_desde)
+        and_where = f"AND {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
+            SELECT {columnas}, c.destinatario
+            FROM inscripciones
+            JOIN cola_correos c ON c.inscripcion_id = inscripciones.id
+            WHERE c.estado = %s
+              AND {SQL_ULTIMO_CORREO}
+              {and_where}
+            ORDER BY inscripciones.id
+            LIMIT %s
+        """
+        # Como mucho dos destinatarios (padre y madre) por inscripción
+        params = [estado_correo] + params + [(REENVIO_MAX + 1) * 2]
+    else:
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        sql = f"""
+            SELECT {columnas}, NULL AS destinatario
+            FROM inscripciones
+            {where}
+            ORDER BY inscripciones.id
+            LIMIT %s
+        """
+        params = params + [REENVIO_MAX + 1]
+
+    with db_pool.conexion() as conn, metricas.medir('db_query'):
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT id, nombres, apellidos, fecha_nacimiento, grado, ano_escolar,
-                   padre_nombres, madre_nombres, email_padre, email_madre, 
-                   fecha_registro
-            FROM inscripciones 
-            ORDER BY fecha_registro DESC 
-            LIMIT 50
-        """)
-        inscripciones = cursor.fetchall()
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
         cursor.close()
-        conn.close()
-        
-        # Convertir datetime a string
-        for inscripcion in inscripciones:
-            if inscripcion['fecha_registro']:
-                inscripcion['fecha_registro'] = inscripcion['fecha_registro'].strftime('%d/%m/%Y %H:%M:%S')
-            if inscripcion['fecha_nacimiento']:
-                inscripcion['fecha_nacimiento'] = inscripcion['fecha_nacimiento'].strftime('%d/%m/%Y')
-        
+
+    seleccion = {}
+    for fila in filas:
+        if fila['id'] not in seleccion:
+            if len(seleccion) == REENVIO_MAX:
+                return list(seleccion.values()), True
+            inscripcion = Inscripcion.desde_fila(fila)
+            destinatarios = [] if estado_correo else [e for e in inscripcion.emails if validar_email(e)]
+            seleccion[fila['id']] = (inscripcion, destinatarios)
+        if fila['destinatario']:
+            seleccion[fila['id']][1].append(fila['destinatario'])
+    return list(seleccion.values()), False
+
+@bp.route('/reenviar_correos', methods=['POST'])
+def reenviar_correos():
+    """Reenviar las confirmaciones de un conjunto de inscripciones
+
+    Cuerpo JSON: {"ids": [1, 2, ...]} o {"filtro": {...}} con los filtros del
+    listado más estado_correo y correo_desde (fecha del último intento de
+    envío; desde/hasta filtran por fecha de inscripción), p. ej. los correos
+    que fallaron esta semana:
+    {"filtro": {"estado_correo": "fallido", "correo_desde": "2026-10-12"}}.
+    Los correos se encolan (cada destinatario guarda su resultado en
+    cola_correos) y los workers los envían por lotes, una sesión SMTP por
+    lote, a un máximo de MAIL_MAX_POR_MINUTO entre todos los procesos.
+    """
+    if not cola_correos:
+        return jsonify({"success": False, "message": "❌ Servicio de email no disponible"}), 500
+
+    data = request.get_json(force=True, silent=True) or {}
+    ids, filtro = data.get('ids'), data.get('filtro')
+    if (ids is None) == (filtro is None):
+        return jsonify({"success": False, "message": "Indique ids o filtro"}), 400
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+            return jsonify({"success": False, "message": "ids debe ser una lista de números"}), 400
+        if len(ids) > REENVIO_MAX:
+            return jsonify({"success": False, "message": f"Máximo {REENVIO_MAX} inscripciones por llamada"}), 400
+    elif not isinstance(filtro, dict):
+        return jsonify({"success": False, "message": "filtro debe ser un objeto"}), 400
+    elif not all(isinstance(valor, str) for valor in filtro.values()):
+        # construir_filtros espera texto, como en los parámetros de la URL del listado
+        return jsonify({"success": False, "message": "Los valores de filtro deben ser texto"}), 400
+
+    try:
+        try:
+            seleccion, truncado = cargar_para_reenvio(ids, filtro)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        correos = []
+        encolados = {}
+        for inscripcion, destinatarios in seleccion:
+            if not destinatarios:
+                continue
+            asunto = inscripcion.asunto
+            contenido_html, contenido_texto = email_service.crear_mensaje_inscripcion(inscripcion)
+            correos.extend((inscripcion.id, d, asunto, contenido_html, contenido_texto) for d in destinatarios)
+            encolados[inscripcion.id] = len(destinatarios)
+
+        if correos:
+            with db_pool.conexion() as conn:
+                conn.start_transaction()
+                cursor = conn.cursor()
+                with metricas.medir('db_query'):
+                    cola_correos.encolar_lote(cursor, correos, reenvio=True)
+                    # Estado actualizado de cada inscripción para los paneles abiertos
+                    afectadas = list(encolados)
+                    cursor.execute(sql_resumen_correos(len(afectadas)), afectadas * 2)
+                    resumen = resumen_por_inscripcion(cursor.fetchall())
+                    DifusorEventos.registrar(cursor, [
+                        ('correos', i, {'inscripcion_id': i, 'correos': resumen.get(i, {}), 'encolados': n})
+                        for i, n in encolados.items()
+                    ])
+                with metricas.medir('db_commit'):
+                    conn.commit()
+                cursor.close()
+            cache_estadisticas.invalidar()
+            cola_correos.notificar()
+            if difusor_eventos:
+                difusor_eventos.notificar()
+            g.escritura = True
+
+        encontradas = {inscripcion.id for inscripcion, _ in seleccion}
+        omitidas = sorted((set(ids) - encontradas) if ids else set())
+        omitidas += sorted(i for i in encontradas if i not in encolados)
+        logger.info("🔁 Reenvío: %s correos encolados para %s inscripciones", len(correos), len(encolados),
+                    extra={'correos_encolados': len(correos), 'inscripciones': len(encolados)})
+
         return jsonify({
             "success": True,
-            "inscripciones": inscripciones,
-            "total": len(inscripciones)
-        })
-    
+            "message": f"Se reenviarán {len(correos)} correos de {len(encolados)} inscripciones.",
+            "inscripciones": len(encolados),
+            "correos_encolados": len(correos),
+            "omitidas": omitidas,
+            "truncado": truncado
+        }), 200
+
     except Exception as e:
-        logger.error(f"❌ Error consultando inscripciones: {e}")
+        logger.error("❌ Error reenviando correos: %s", e)
+        return jsonify({"success": False, "message": f"Error interno del servidor: {str(e)}"}), 500
+
+@bp.route('/estadisticas')
+def estadisticas():
+    """Estadísticas agregadas para el panel (inscripciones por día, por grado y correos)
+
+    Parámetros: dias (por defecto 30), grado, ano_escolar, desde, hasta (AAAA-MM-DD)
+    """
+    try:
+        try:
+            dias = min(max(int(request.args.get('dias', 30)), 1), 366)
+            condiciones, params = construir_filtros(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        clave = (dias, tuple(sorted(request.args.items())))
+        datos = cache_estadisticas.obtener(
+            clave, lambda: calcular_estadisticas(condiciones, params, dias, leer_del_primario())
+        )
+        return jsonify({"success": True, "estadisticas": datos})
+
+    except Exception as e:
+        logger.error("❌ Error calculando estadísticas: %s", e)
         return jsonify({"success": False, "message": str(e)}), 500
 
+def create_app(workers_correo=True):
+    """Fábrica de la aplicación (gunicorn "app:create_app()" o flask run)
+
+    No se conecta a MySQL ni a SMTP: el pool abre conexiones al primer uso y
+    la verificación de servicios corre en segundo plano. En modo asíncrono
+    (app_async.py) la cola de correos la vacía el event loop, no estos workers.
+    """
+    configurar_logging()
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    cargar_manifest()
+    iniciar_servicios(workers_correo)
+    logger.info("📋 DB: %s | Mail: %s", os.getenv('DB_NAME', 'colegio'), os.getenv('MAIL_USER', 'NO CONFIGURADO'))
+    return app
+
 if __name__ == '__main__':
+    configurar_logging()
     logger.info("🚀 Iniciando aplicación...")
-    
-    # Mostrar estado
-    logger.info(f"📋 DB: {os.getenv('DB_NAME', 'colegio')} | Mail: {os.getenv('MAIL_USER', 'NO CONFIGURADO')}")
-    
-    # Probar conexiones
-    db_ok = test_db_connection()
-    email_ok = email_service is not None
-    
-    if db_ok and email_ok:
-        logger.info("✅ Sistema completamente funcional")
-    elif db_ok:
-        logger.info("⚠️ Sistema funcional (sin emails)")
+    if os.getenv('APP_MODO', 'sync') == 'async':
+        # Modo asíncrono: rutas de inscripción con aiomysql/aiosmtplib bajo ASGI
+        import uvicorn
+        uvicorn.run('app_async:create_app', factory=True, host='0.0.0.0', port=5000)
     else:
-        logger.error("❌ Problemas de configuración")
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+        app = create_app()
+        app.run(debug=True, host='0.0.0.0', port=5000)
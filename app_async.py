@@ -0,0 +1,434 @@
+"""Modo asíncrono (APP_MODO=async) para picos de inscripción
+
+Las rutas de inscripción y listado corren en un event loop con aiomysql y la
+cola de correos se vacía con aiosmtplib. El resto de rutas (página, panel,
+exportación, métricas...) las sigue atendiendo la app Flask de app.py a
+través de WsgiToAsgi.
+
+    uvicorn app_async:create_app --factory --port 5000
+    APP_MODO=async python app.py
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+
+import aiomysql
+import aiosmtplib
+import pymysql
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, request, jsonify, g
+
+import app as app_sync
+from app import (
+    db_config, metricas, cache_idempotencia, cache_estadisticas, ColaCorreos,
+    Inscripcion, ErrorValidacion, consulta_listado, pagina_listado, sql_resumen_correos,
+    DifusorEventos, evento_inscripcion, INSERT_INSCRIPCION, ER_DUP_ENTRY,
+    peticion_id_actual, PATRON_PETICION_ID, COOKIE_LEER_PRIMARIO, LEER_PRIMARIO_SEG
+)
+
+logger = logging.getLogger(__name__)
+
+# Rutas que atiende el event loop; las demás van a la app Flask. Con réplicas
+# (DB_READ_HOSTS) el listado va a Flask, que reparte las lecturas con RouterLecturas
+RUTAS_ASYNC = {'/enviar_inscripcion', '/health/vivo'}
+if not app_sync.db_lecturas.replicas:
+    RUTAS_ASYNC.add('/consultar_inscripciones')
+
+class SesionSMTPAsync:
+    """Sesión aiosmtplib autenticada de larga duración (una por worker de la cola)"""
+
+    def __init__(self, servicio, max_mensajes=100, noop_seg=30):
+        self.servicio = servicio
+        self.max_mensajes = max_mensajes
+        self.noop_seg = noop_seg
+        self.smtp = None
+        self.mensajes = 0
+        self.ultimo_uso = 0.0
+
+    async def _conectar(self):
+        await self.cerrar()
+        with metricas.medir('smtp_connect'):
+            smtp = aiosmtplib.SMTP(
+                hostname=self.servicio.smtp_server, port=self.servicio.smtp_port,
+                start_tls=self.servicio.usar_tls, timeout=30
+            )
+            await smtp.connect()
+            await smtp.login(self.servicio.username, self.servicio.password)
+        self.smtp = smtp
+        self.mensajes = 0
+        self.ultimo_uso = time.monotonic()
+
+    async def _lista(self):
+        """Conectar, o comprobar con NOOP si la sesión estuvo inactiva"""
+        if self.smtp is None or self.mensajes >= self.max_mensajes:
+            await self._conectar()
+        elif time.monotonic() - self.ultimo_uso > self.noop_seg:
+            try:
+                await self.smtp.noop()
+            except aiosmtplib.SMTPException:
+                await self._conectar()
+
+    async def enviar(self, remitente, destinatario, datos):
+        await self._lista()
+        try:
+            with metricas.medir('smtp_send'):
+                await self.smtp.sendmail(remitente, [destinatario], datos)
+        except aiosmtplib.SMTPServerDisconnected:
+            await self._conectar()
+            with metricas.medir('smtp_send'):
+                await self.smtp.sendmail(remitente, [destinatario], datos)
+        self.mensajes += 1
+        self.ultimo_uso = time.monotonic()
+
+    async def cerrar(self):
+        if self.smtp is None:
+            return
+        try:
+            await self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+        self.smtp = None
+
+class ColaCorreosAsync:
+    """Workers asyncio que vacían cola_correos (mismas sentencias que ColaCorreos)"""
+
+    def __init__(self, pool, cola, servicio, workers=2, max_mensajes=100, noop_seg=30):
+        self.pool = pool
+        self.cola = cola
+        self.servicio = servicio
+        self.workers = workers
+        self.max_mensajes = max_mensajes
+        self.noop_seg = noop_seg
+        self._despertar = asyncio.Event()
+        self._tareas = []
+
+    def notificar(self):
+        self._despertar.set()
+
+    def iniciar(self):
+        for i in range(self.workers):
+            self._tareas.append(asyncio.create_task(self._bucle(i == 0)))
+        logger.info("📬 Cola de correos asíncrona iniciada con %s workers", self.workers)
+
+    async def detener(self):
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+
+    async def _recuperar_abandonados(self):
+        try:
+            async with self.pool.acquire() as conn, conn.cursor() as cursor:
+                await cursor.execute(ColaCorreos.SQL_RECUPERAR, (ColaCorreos.RECLAMO_EXPIRA_SEG,))
+            return True
+        except Exception as e:
+            logger.error("❌ Error recuperando correos abandonados: %s", e)
+            return False
+
+    async def _bucle(self, recuperar):
+        sesion = SesionSMTPAsync(self.servicio, self.max_mensajes, self.noop_seg)
+        ultima_recuperacion = None
+        try:
+            while True:
+                # Igual que ColaCorreos._bucle: periódica y reintentada si falla
+                if recuperar and (ultima_recuperacion is None
+                                  or time.monotonic() - ultima_recuperacion > ColaCorreos.RECLAMO_EXPIRA_SEG / 2):
+                    if await self._recuperar_abandonados():
+                        ultima_recuperacion = time.monotonic()
+                try:
+                    procesados = await self.procesar_lote(sesion)
+                except Exception as e:
+                    logger.error("❌ Error en worker de correos: %s", e)
+                    procesados = 0
+                if procesados < self.cola.lote:
+                    try:
+                        await asyncio.wait_for(self._despertar.wait(), self.cola.intervalo)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._despertar.clear()
+        finally:
+            await sesion.cerrar()
+
+    async def procesar_lote(self, sesion):
+        token = uuid.uuid4().hex
+        async with self.pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(ColaCorreos.SQL_RECLAMAR, (token, self.cola.lote))
+            if cursor.rowcount == 0:
+                return 0
+            await cursor.execute(ColaCorreos.SQL_RECLAMADOS, (token,))
+            correos = await cursor.fetchall()
+        # La tarea del worker procesa muchos lotes: el id se restaura al terminar cada uno
+        contexto = peticion_id_actual.set(f"correos-{token[:8]}")
+        try:
+            await self._enviar_lote(sesion, correos)
+        finally:
+            peticion_id_actual.reset(contexto)
+        return len(correos)
+
+    async def _enviar_lote(self, sesion, correos):
+        resultados = []
+        preparados = {}
+        for correo in correos:
+            try:
+                clave = (correo['asunto'], correo['contenido_html'], correo['contenido_texto'])
+                preparado = preparados.get(clave)
+                if preparado is None:
+                    preparado = preparados[clave] = self.servicio.preparar_mensaje(*clave)
+                destinatario = correo['destinatario']
+                await asyncio.sleep(self.cola.limitador.reservar())
+                await sesion.enviar(preparado.remitente, destinatario, preparado.para(destinatario))
+                resultados.append((correo, None))
+                logger.debug("✅ Correo enviado a: %s", destinatario)
+            except Exception as e:
+                resultados.append((correo, str(e)))
+                logger.error("❌ Error enviando a %s: %s", correo['destinatario'], e,
+                             extra={'correo_id': correo['id']})
+
+        enviados, reintentos, fallidos = self.cola.clasificar_resultados(resultados)
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    for sql, parametros in ((ColaCorreos.SQL_ENVIADO, enviados),
+                                            (ColaCorreos.SQL_REINTENTO, reintentos),
+                                            (ColaCorreos.SQL_FALLIDO, fallidos)):
+                        if parametros:
+                            await cursor.executemany(sql, parametros)
+                    eventos = self.cola.eventos_resultados(resultados)
+                    if eventos:
+                        await cursor.executemany(
+                            DifusorEventos.SQL_REGISTRAR, [DifusorEventos.fila(*e) for e in eventos]
+                        )
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+        if app_sync.difusor_eventos:
+            app_sync.difusor_eventos.notificar()
+        self.cola.resumir_lote(resultados)
+
+def respuesta_duplicada(inscripcion_id):
+    logger.info("🔁 Envío repetido de la inscripción %s", inscripcion_id, extra={'inscripcion_id': inscripcion_id})
+    return jsonify({
+        "success": True,
+        "message": f"✅ Esta inscripción ya fue registrada (ID: {inscripcion_id}).",
+        "inscripcion_id": inscripcion_id,
+        "correos_encolados": 0,
+        "duplicada": True
+    }), 200
+
+def crear_app_async():
+    """App Quart con las rutas del camino crítico"""
+    app = Quart(__name__)
+    estado = {}
+
+    @app.before_serving
+    async def iniciar():
+        estado['pool'] = await aiomysql.create_pool(
+            host=db_config['host'], user=db_config['user'], password=db_config['password'],
+            db=db_config['database'], charset=db_config['charset'], autocommit=True,
+            minsize=1, maxsize=int(os.getenv('DB_POOL_SIZE_ASYNC', '20')),
+            pool_recycle=3600
+        )
+        estado['cola'] = None
+        if app_sync.cola_correos:
+            estado['cola'] = ColaCorreosAsync(
+                estado['pool'], app_sync.cola_correos, app_sync.email_service,
+                workers=int(os.getenv('MAIL_WORKERS', '2')),
+                max_mensajes=int(os.getenv('MAIL_MAX_MENSAJES_SESION', '100')),
+                noop_seg=int(os.getenv('MAIL_NOOP_SEG', '30'))
+            )
+            estado['cola'].iniciar()
+
+    @app.after_serving
+    async def detener():
+        if estado.get('cola'):
+            await estado['cola'].detener()
+        estado['pool'].close()
+        await estado['pool'].wait_closed()
+
+    @app.before_request
+    async def asignar_peticion_id():
+        # Cada petición corre en su propia tarea: no hace falta restaurar el contextvar
+        peticion_id = request.headers.get('X-Request-ID', '')
+        if not PATRON_PETICION_ID.match(peticion_id):
+            peticion_id = uuid.uuid4().hex[:16]
+        g.peticion_id = peticion_id
+        peticion_id_actual.set(peticion_id)
+
+    @app.before_request
+    async def iniciar_medicion():
+        g.inicio_peticion = time.perf_counter()
+        metricas.incrementar('http_requests_en_curso', ruta=request.path)
+
+    @app.after_request
+    async def registrar_medicion(response):
+        metricas.incrementar('http_requests_en_curso', -1, ruta=request.path)
+        metricas.observar(
+            'http_request_duracion_segundos', time.perf_counter() - g.inicio_peticion,
+            ruta=request.path, metodo=request.method
+        )
+        metricas.incrementar(
+            'http_requests_total',
+            ruta=request.path, metodo=request.method, codigo=response.status_code
+        )
+        response.headers['X-Request-ID'] = g.peticion_id
+        # Igual que marcar_escritura en Flask: las lecturas siguientes van al primario
+        if g.get('escritura') and app_sync.db_lecturas.replicas:
+            response.set_cookie(
+                COOKIE_LEER_PRIMARIO, '1', max_age=LEER_PRIMARIO_SEG, httponly=True, samesite='Lax'
+            )
+        return response
+
+    @app.route('/health/vivo')
+    async def health_vivo():
+        return jsonify({"vivo": True, "modo": "async"})
+
+    @app.route('/enviar_inscripcion', methods=['POST'])
+    async def enviar_inscripcion():
+        try:
+            data = await request.get_json(force=True)
+            logger.info("📝 Procesando inscripción: %s %s", data.get('nombres'), data.get('apellidos'))
+
+            try:
+                inscripcion = Inscripcion.desde_dict(data)
+            except ErrorValidacion as e:
+                return jsonify({"success": False, "message": str(e), "errores": e.errores}), 400
+
+            clave = inscripcion.clave_idempotencia(request.headers.get('Idempotency-Key'))
+            inscripcion_existente = cache_idempotencia.leer(clave)
+            if inscripcion_existente:
+                return respuesta_duplicada(inscripcion_existente)
+
+            emails = inscripcion.emails
+            fecha_registro = datetime.now()
+            valores = inscripcion.valores(fecha_registro, clave)
+            cola = app_sync.cola_correos
+            correos = []
+            if cola and emails:
+                asunto = inscripcion.asunto
+                contenido_html, contenido_texto = app_sync.email_service.crear_mensaje_inscripcion(inscripcion)
+                correos = [(d, asunto, contenido_html, contenido_texto) for d in emails]
+
+            try:
+                async with estado['pool'].acquire() as conn:
+                    await conn.begin()
+                    try:
+                        async with conn.cursor() as cursor:
+                            with metricas.medir('db_query'):
+                                await cursor.execute(INSERT_INSCRIPCION, valores)
+                                inscripcion_id = cursor.lastrowid
+                                if correos:
+                                    await cursor.executemany(
+                                        ColaCorreos.SQL_ENCOLAR,
+                                        [(inscripcion_id,) + c for c in correos]
+                                    )
+                                await cursor.execute(DifusorEventos.SQL_REGISTRAR, DifusorEventos.fila(
+                                    *evento_inscripcion(inscripcion, inscripcion_id, fecha_registro, len(correos))
+                                ))
+                        with metricas.medir('db_commit'):
+                            await conn.commit()
+                    except BaseException:
+                        await conn.rollback()
+                        raise
+            except pymysql.err.IntegrityError as e:
+                if e.args[0] != ER_DUP_ENTRY:
+                    raise
+                async with estado['pool'].acquire() as conn, conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT id FROM inscripciones WHERE clave_idempotencia = %s", (clave,)
+                    )
+                    fila = await cursor.fetchone()
+                if not fila:
+                    raise
+                cache_idempotencia.guardar(clave, fila[0])
+                return respuesta_duplicada(fila[0])
+
+            cache_estadisticas.invalidar()
+            cache_idempotencia.guardar(clave, inscripcion_id)
+            g.escritura = True
+            if app_sync.difusor_eventos:
+                app_sync.difusor_eventos.notificar()
+            logger.info("💾 Inscripción guardada con ID: %s", inscripcion_id, extra={'inscripcion_id': inscripcion_id})
+
+            if correos and estado.get('cola'):
+                estado['cola'].notificar()
+            if correos:
+                mensaje_final = f"🎉 ¡Inscripción registrada exitosamente! Se enviarán {len(correos)} correos de confirmación."
+            elif not app_sync.email_service:
+                mensaje_final = f"✅ Inscripción registrada correctamente (ID: {inscripcion_id}). Para recibir emails, configure el servicio de correo en .env"
+            else:
+                mensaje_final = f"✅ Inscripción registrada correctamente (ID: {inscripcion_id}). No se proporcionaron emails válidos."
+
+            return jsonify({
+                "success": True,
+                "message": mensaje_final,
+                "inscripcion_id": inscripcion_id,
+                "correos_encolados": len(correos)
+            }), 200
+
+        except pymysql.err.MySQLError as e:
+            logger.error("❌ Error de base de datos: %s", e)
+            return jsonify({
+                "success": False,
+                "message": f"Error guardando en base de datos: {str(e)}"
+            }), 500
+        except Exception as e:
+            logger.error("❌ Error general: %s", e)
+            return jsonify({
+                "success": False,
+                "message": f"Error interno del servidor: {str(e)}"
+            }), 500
+
+    @app.route('/consultar_inscripciones')
+    async def consultar_inscripciones():
+        try:
+            try:
+                sql, params, limite = consulta_listado(request.args)
+            except ValueError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
+
+            resumen_correos = None
+            async with estado['pool'].acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    with metricas.medir('db_query'):
+                        await cursor.execute(sql, params)
+                        inscripciones = list(await cursor.fetchall())
+                if request.args.get('correos') == '1':
+                    ids = [fila['id'] for fila in inscripciones[:limite]]
+                    resumen_correos = []
+                    if ids:
+                        async with conn.cursor() as cursor:
+                            with metricas.medir('db_query'):
+                                await cursor.execute(sql_resumen_correos(len(ids)), ids * 2)
+                                resumen_correos = await cursor.fetchall()
+
+            return jsonify(pagina_listado(inscripciones, limite, resumen_correos))
+
+        except Exception as e:
+            logger.error("❌ Error consultando inscripciones: %s", e)
+            return jsonify({"success": False, "message": str(e)}), 500
+
+    return app
+
+class Despachador:
+    """ASGI: rutas del camino crítico al event loop, el resto a la app Flask"""
+
+    def __init__(self, app_async, app_wsgi):
+        self.app_async = app_async
+        self.app_wsgi = WsgiToAsgi(app_wsgi)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in RUTAS_ASYNC:
+            await self.app_async(scope, receive, send)
+        else:
+            await self.app_wsgi(scope, receive, send)
+
+def create_app():
+    """Fábrica ASGI (uvicorn app_async:create_app --factory)"""
+    # La app Flask no arranca sus hilos de correo: la cola la vacía el event loop
+    app_wsgi = app_sync.create_app(workers_correo=False)
+    return Despachador(crear_app_async(), app_wsgi)
@@ -0,0 +1,332 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import re
+import socketserver
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINES_DIR = os.path.join(BASE_DIR, 'benchmarks')
+
+# La base de benchmark se borra y se recrea: solo se aceptan nombres con este sufijo
+PATRON_DB_BENCH = re.compile(r'^[A-Za-z0-9_]+_bench$')
+
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Diego', 'Valeria', 'Mateo']
+APELLIDOS = ['García', 'Rodríguez', 'Quispe', 'Flores', 'Sánchez', 'Ramírez', 'Torres', 'Mamani']
+
+class ServidorSMTPFalso(socketserver.ThreadingTCPServer):
+    """Servidor SMTP local que acepta todo y solo cuenta los mensajes"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, direccion):
+        super().__init__(direccion, ManejadorSMTP)
+        self.mensajes = 0
+        self.lock = threading.Lock()
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+
+    def responder(self, linea):
+        self.wfile.write(linea.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.responder('220 localhost SMTP de pruebas')
+        en_datos = False
+        while True:
+            linea = self.rfile.readline()
+            if not linea:
+                return
+            if en_datos:
+                if linea in (b'.\r\n', b'.\n'):
+                    en_datos = False
+                    with self.server.lock:
+                        self.server.mensajes += 1
+                    self.responder('250 OK')
+                continue
+            comando = linea.decode('ascii', 'replace').strip().upper()
+            if comando.startswith('EHLO'):
+                self.responder('250-localhost')
+                self.responder('250 AUTH PLAIN LOGIN')
+            elif comando.startswith('AUTH'):
+                self.responder('235 Autenticado')
+            elif comando.startswith('DATA'):
+                en_datos = True
+                self.responder('354 Fin con <CRLF>.<CRLF>')
+            elif comando.startswith('QUIT'):
+                self.responder('221 Adios')
+                return
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                self.responder('250 OK')
+
+def iniciar_smtp_falso():
+    servidor = ServidorSMTPFalso(('127.0.0.1', 0))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def preparar_base_datos(nombre):
+    """Crear la base de datos de benchmark a partir de database.sql"""
+    import mysql.connector
+
+    if not PATRON_DB_BENCH.match(nombre):
+        raise ValueError(f"La base de benchmark debe terminar en _bench: {nombre}")
+    with open(os.path.join(BASE_DIR, 'database.sql'), encoding='utf-8') as f:
+        script = f.read().replace('colegio', nombre)
+    conn = mysql.connector.connect(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASS', '')
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {nombre}")
+    script = '\n'.join(l for l in script.splitlines() if not l.strip().startswith('--'))
+    for sentencia in script.split(';'):
+        if sentencia.strip():
+            cursor.execute(sentencia)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+def iniciar_app_local():
+    """Levantar la app en este proceso con el servidor WSGI de werkzeug (multihilo)"""
+    from werkzeug.serving import make_server
+    import app as aplicacion
+
+    servidor = make_server('127.0.0.1', 0, aplicacion.create_app(), threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+def inscripcion_aleatoria(rng):
+    nacimiento = date(2008, 1, 1) + timedelta(days=rng.randint(0, 365 * 10))
+    apellido = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+    return {
+        'nombres': rng.choice(NOMBRES),
+        'apellidos': f"{apellido} {rng.randint(1, 10**9)}",
+        'fechaNacimiento': nacimiento.isoformat(),
+        'grado': str(rng.randint(1, 11)),
+        'anoEscolar': rng.choice(['2025', '2026']),
+        'direccion': f"Av. Alameda Eden {rng.randint(1, 999)}, Nueva Cajamarca",
+        'padreNombres': f"{rng.choice(NOMBRES)} {apellido.split()[0]}",
+        'madreNombres': f"{rng.choice(NOMBRES)} {apellido.split()[1]}",
+        'padreTelefono': f"9{rng.randint(10**7, 10**8 - 1)}",
+        'madreTelefono': f"9{rng.randint(10**7, 10**8 - 1)}",
+        'emailPadre': f"padre{rng.randint(1, 10**6)}@ejemplo.com",
+        'emailMadre': f"madre{rng.randint(1, 10**6)}@ejemplo.com",
+        'profesion': 'Docente'
+    }
+
+class Cliente:
+    """Cliente HTTP con conexión keep-alive (uno por hilo)"""
+
+    def __init__(self, url_base):
+        partes = urlsplit(url_base)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.conn = None
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.puerto, timeout=30)
+        cabeceras = {'Content-Type': 'application/json'} if cuerpo is not None else {}
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+        try:
+            self.conn.request(metodo, ruta, body=datos, headers=cabeceras)
+            respuesta = self.conn.getresponse()
+            contenido = respuesta.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = None
+            raise
+        return respuesta.status, contenido
+
+def escenario_inscripcion(cliente, rng, estado):
+    return cliente.pedir('POST', '/enviar_inscripcion', inscripcion_aleatoria(rng))
+
+def escenario_listado(cliente, rng, estado):
+    params = {'limite': 50}
+    filtro = rng.random()
+    if filtro < 0.3:
+        params['grado'] = str(rng.randint(1, 11))
+    elif filtro < 0.5:
+        params['ano_escolar'] = rng.choice(['2025', '2026'])
+    elif filtro < 0.6:
+        params['nombre'] = rng.choice(NOMBRES)[:3]
+    # Seguir paginando a veces con el cursor de la página anterior
+    cursor = estado.get('cursor')
+    if cursor and rng.random() < 0.5:
+        params = {'limite': 50, 'cursor': cursor}
+    status, contenido = cliente.pedir('GET', f"/consultar_inscripciones?{urlencode(params)}")
+    if status == 200:
+        estado['cursor'] = json.loads(contenido).get('siguiente_cursor')
+    return status, contenido
+
+ESCENARIOS = {
+    'inscripcion': escenario_inscripcion,
+    'listado': escenario_listado,
+}
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    # Método del rango más cercano
+    indice = min(len(ordenados) - 1, max(0, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+def ejecutar_escenario(url_base, nombre, peticiones, concurrencia, semilla):
+    funcion = ESCENARIOS[nombre]
+    por_hilo = [peticiones // concurrencia + (1 if i < peticiones % concurrencia else 0) for i in range(concurrencia)]
+
+    def trabajador(indice):
+        rng = random.Random(semilla + indice)
+        cliente = Cliente(url_base)
+        estado = {}
+        latencias = []
+        errores = 0
+        for _ in range(por_hilo[indice]):
+            inicio = time.perf_counter()
+            try:
+                status, _ = funcion(cliente, rng, estado)
+                if status >= 400:
+                    errores += 1
+            except Exception:
+                errores += 1
+            latencias.append(time.perf_counter() - inicio)
+        return latencias, errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+        resultados = list(ejecutor.map(trabajador, range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    latencias = [l for lat, _ in resultados for l in lat]
+    errores = sum(e for _, e in resultados)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "concurrencia": concurrencia,
+        "duracion_seg": round(duracion, 3),
+        "throughput_rps": round(len(latencias) / duracion, 2) if duracion else None,
+        "latencia_ms": {
+            "media": ms(statistics.fmean(latencias)) if latencias else None,
+            "p50": ms(percentil(latencias, 50)),
+            "p95": ms(percentil(latencias, 95)),
+            "p99": ms(percentil(latencias, 99)),
+            "max": ms(max(latencias)) if latencias else None
+        }
+    }
+
+def comparar(resultados, baseline, tolerancia):
+    """Devolver las regresiones (p95 o throughput peor que la tolerancia) frente al baseline"""
+    regresiones = []
+    for nombre, actual in resultados['escenarios'].items():
+        anterior = baseline.get('escenarios', {}).get(nombre)
+        if not anterior:
+            continue
+        p95_antes, p95_ahora = anterior['latencia_ms']['p95'], actual['latencia_ms']['p95']
+        if p95_antes and p95_ahora and p95_ahora > p95_antes * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {p95_antes} ms -> {p95_ahora} ms")
+        rps_antes, rps_ahora = anterior['throughput_rps'], actual['throughput_rps']
+        if rps_antes and rps_ahora and rps_ahora < rps_antes * (1 - tolerancia):
+            regresiones.append(f"{nombre}: throughput {rps_antes} -> {rps_ahora} req/s")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inscripción y listado")
+    parser.add_argument('--url', help="Probar un servidor ya levantado en vez de la app local")
+    parser.add_argument('--escenarios', default='inscripcion,listado')
+    parser.add_argument('--peticiones', type=int, default=500)
+    parser.add_argument('--concurrencia', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', help="Guardar resultados en benchmarks/<nombre>.json")
+    parser.add_argument('--baseline', help="Comparar con benchmarks/<nombre>.json")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Regresión permitida (0.2 = 20%%)")
+    parser.add_argument('--no-preparar-db', action='store_true', help="No recrear la base de datos de benchmark")
+    parser.add_argument('--db', default='colegio_bench',
+                        help="Base de datos de benchmark (se BORRA y recrea; debe terminar en _bench)")
+    args = parser.parse_args()
+
+    print("⏱️  Benchmark del sistema de inscripciones")
+    url_base = args.url
+    smtp = None
+    if not url_base:
+        if not PATRON_DB_BENCH.match(args.db):
+            print(f"❌ --db debe terminar en _bench (se borra y recrea): {args.db}")
+            return 2
+        from dotenv import load_dotenv
+
+        # Mismo servidor y credenciales que usará app.py; la base y el correo
+        # se fijan después para que el .env no los pise
+        load_dotenv()
+        smtp = iniciar_smtp_falso()
+        os.environ.update({
+            'DB_NAME': args.db,
+            'MAIL_SERVER': '127.0.0.1',
+            'MAIL_PORT': str(smtp.server_address[1]),
+            'MAIL_TLS': 'false',
+            'MAIL_USER': 'benchmark@colegio.test',
+            'MAIL_PASS': 'benchmark',
+            # Sin límite de ritmo: se mide el envío, no el limitador
+            'MAIL_MAX_POR_MINUTO': '0'
+        })
+        if not args.no_preparar_db:
+            print(f"🗄️  Preparando base de datos {args.db}...")
+            preparar_base_datos(args.db)
+        url_base = iniciar_app_local()
+        print(f"🚀 App local en {url_base} | SMTP falso en puerto {smtp.server_address[1]}")
+
+    resultados = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "url": args.url or "local",
+        "escenarios": {}
+    }
+    for nombre in args.escenarios.split(','):
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            print(f"❌ Escenario desconocido: {nombre}")
+            return 2
+        print(f"▶️  {nombre}: {args.peticiones} peticiones, concurrencia {args.concurrencia}")
+        r = ejecutar_escenario(url_base, nombre, args.peticiones, args.concurrencia, args.semilla)
+        resultados['escenarios'][nombre] = r
+        lat = r['latencia_ms']
+        print(f"   {r['throughput_rps']} req/s | p50 {lat['p50']} ms | p95 {lat['p95']} ms | "
+              f"p99 {lat['p99']} ms | errores {r['errores']}")
+
+    if smtp:
+        # Dar tiempo a la cola para vaciarse y reportar cuántos correos llegaron
+        time.sleep(2)
+        resultados['correos_recibidos_smtp'] = smtp.mensajes
+        print(f"📬 Correos recibidos por el SMTP falso: {smtp.mensajes}")
+
+    if args.guardar:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        ruta = os.path.join(BASELINES_DIR, f"{args.guardar}.json")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados guardados en {os.path.relpath(ruta, BASE_DIR)}")
+
+    if args.baseline:
+        with open(os.path.join(BASELINES_DIR, f"{args.baseline}.json"), encoding='utf-8') as f:
+            baseline = json.load(f)
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print("❌ Regresiones frente al baseline:")
+            for regresion in regresiones:
+                print(f"   - {regresion}")
+            return 1
+        print("✅ Sin regresiones frente al baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BASE_DIR, 'static', 'src')
+VENDOR_DIR = os.path.join(BASE_DIR, 'static', 'vendor')
+DIST_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+PLANTILLA = os.path.join(BASE_DIR, 'templates', 'main.html')
+
+# Librerías de terceros (versiones fijas) que antes se cargaban desde el CDN
+VENDOR = {
+    'tailwind.min.css': 'https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css',
+    'chart.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js',
+    'fontawesome/css/all.min.css': 'https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.4.0/css/all.min.css',
+}
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.ttf', '.eot')
+
+def descargar(url, destino):
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    print(f"⬇️  Descargando {url}")
+    with urllib.request.urlopen(url, timeout=60) as respuesta, open(destino, 'wb') as f:
+        shutil.copyfileobj(respuesta, f)
+
+def descargar_vendor():
+    """Descargar las librerías a static/vendor (solo si no están ya)"""
+    for nombre, url in VENDOR.items():
+        destino = os.path.join(VENDOR_DIR, nombre)
+        if not os.path.exists(destino):
+            descargar(url, destino)
+
+    # Las fuentes de Font Awesome se referencian desde su CSS con rutas relativas
+    css_fa = os.path.join(VENDOR_DIR, 'fontawesome', 'css', 'all.min.css')
+    base_url = VENDOR['fontawesome/css/all.min.css'].rsplit('/', 1)[0] + '/'
+    for ruta in sorted(set(re.findall(r'url\(([^)]+)\)', leer(css_fa)))):
+        ruta = ruta.strip('\'"')
+        if ruta.startswith('data:'):
+            continue
+        destino = os.path.normpath(os.path.join(os.path.dirname(css_fa), ruta))
+        if not os.path.exists(destino):
+            descargar(urllib.request.urljoin(base_url, ruta), destino)
+
+def leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return f.read()
+
+def huella(contenido):
+    if isinstance(contenido, str):
+        contenido = contenido.encode('utf-8')
+    return hashlib.sha256(contenido).hexdigest()[:10]
+
+def clases_usadas(*rutas):
+    """Todas las palabras que podrían ser clases (en exceso, nunca de menos)"""
+    usadas = set()
+    for ruta in rutas:
+        usadas.update(re.findall(r'[A-Za-z0-9_:/.%-]+', leer(ruta)))
+    return usadas
+
+def _bloques(css):
+    """Separar CSS en (prelude, cuerpo) de primer nivel respetando llaves anidadas"""
+    i = 0
+    while i < len(css):
+        inicio_cuerpo = css.find('{', i)
+        if inicio_cuerpo == -1:
+            break
+        profundidad = 0
+        for j in range(inicio_cuerpo, len(css)):
+            if css[j] == '{':
+                profundidad += 1
+            elif css[j] == '}':
+                profundidad -= 1
+                if profundidad == 0:
+                    break
+        yield css[i:inicio_cuerpo].strip(), css[inicio_cuerpo + 1:j]
+        i = j + 1
+
+def _selector_usado(selector, usadas):
+    clases = re.findall(r'\.((?:\\.|[A-Za-z0-9_-])+)', selector)
+    return all(clase.replace('\\', '') in usadas for clase in clases)
+
+def purgar_css(css, usadas):
+    """Eliminar las reglas cuyos selectores usan clases que no aparecen en la página"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    salida = []
+    for prelude, cuerpo in _bloques(css):
+        if prelude.startswith('@media') or prelude.startswith('@supports'):
+            interno = purgar_css(cuerpo, usadas)
+            if interno:
+                salida.append(f"{prelude}{{{interno}}}")
+        elif prelude.startswith('@'):
+            # @font-face, @keyframes, ... se conservan tal cual
+            salida.append(f"{prelude}{{{cuerpo}}}")
+        else:
+            selectores = [s for s in prelude.split(',') if _selector_usado(s, usadas)]
+            if selectores:
+                salida.append(f"{','.join(selectores)}{{{cuerpo}}}")
+    return ''.join(salida)
+
+def escribir(nombre, contenido, manifest, clave=None):
+    """Guardar un archivo con huella de contenido en dist y registrarlo en el manifest"""
+    if isinstance(contenido, str):
+        contenido = contenido.encode('utf-8')
+    base, extension = os.path.splitext(nombre)
+    if base.endswith('.min'):
+        base, extension = base[:-4], '.min' + extension
+    con_huella = f"{base}.{huella(contenido)}{extension}"
+    destino = os.path.join(DIST_DIR, con_huella)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, 'wb') as f:
+        f.write(contenido)
+    manifest[clave or nombre] = con_huella
+    return con_huella
+
+def compilar_fontawesome(manifest):
+    """Copiar Font Awesome con huella en fuentes y CSS (reescribiendo sus url())"""
+    css_origen = os.path.join(VENDOR_DIR, 'fontawesome', 'css', 'all.min.css')
+    css = leer(css_origen)
+
+    def reemplazar(match):
+        ruta = match.group(1).strip('\'"')
+        if ruta.startswith('data:'):
+            return match.group(0)
+        ruta_limpia = ruta.split('?')[0].split('#')[0]
+        origen = os.path.normpath(os.path.join(os.path.dirname(css_origen), ruta_limpia))
+        with open(origen, 'rb') as f:
+            datos = f.read()
+        relativo = os.path.relpath(origen, VENDOR_DIR)
+        con_huella = escribir(relativo, datos, {})
+        return f"url({os.path.relpath(con_huella, 'fontawesome/css')})"
+
+    css = re.sub(r'url\(([^)]+)\)', reemplazar, css)
+    escribir('fontawesome/css/all.min.css', css, manifest)
+
+def comprimir(ruta):
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    with open(ruta + '.gz', 'wb') as f:
+        # mtime=0 para que el resultado sea reproducible
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(datos)
+    if brotli:
+        with open(ruta + '.br', 'wb') as f:
+            f.write(brotli.compress(datos, quality=11))
+
+def compilar():
+    print("🏗️  Compilando assets estáticos...")
+    descargar_vendor()
+
+    if os.path.exists(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+    manifest = {}
+
+    usadas = clases_usadas(PLANTILLA, os.path.join(SRC_DIR, 'main.js'))
+    tailwind = leer(os.path.join(VENDOR_DIR, 'tailwind.min.css'))
+    tailwind_purgado = purgar_css(tailwind, usadas)
+    print(f"✂️  Tailwind: {len(tailwind) // 1024} KB -> {len(tailwind_purgado) // 1024} KB")
+
+    escribir('app.css', tailwind_purgado + '\n' + leer(os.path.join(SRC_DIR, 'main.css')), manifest)
+    escribir('main.js', leer(os.path.join(SRC_DIR, 'main.js')), manifest)
+    with open(os.path.join(VENDOR_DIR, 'chart.umd.min.js'), 'rb') as f:
+        escribir('chart.js', f.read(), manifest)
+    compilar_fontawesome(manifest)
+
+    for carpeta, _, archivos in os.walk(DIST_DIR):
+        for archivo in archivos:
+            if archivo.endswith(EXTENSIONES_COMPRIMIBLES):
+                comprimir(os.path.join(carpeta, archivo))
+
+    with open(os.path.join(DIST_DIR, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"✅ Assets compilados en {os.path.relpath(DIST_DIR, BASE_DIR)}")
+    if not brotli:
+        print("💡 Instala 'brotli' para generar también archivos .br")
+    return True
+
+if __name__ == "__main__":
+    try:
+        compilar()
+    except Exception as e:
+        print(f"❌ Error compilando assets: {e}")
+        sys.exit(1)
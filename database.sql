@@ -3,6 +3,9 @@ CREATE DATABASE IF NOT EXISTS colegio CHARACTER SET utf8mb4 COLLATE utf8mb4_unic
 USE colegio;
 
 -- Crear tabla de inscripciones
+-- Para particionarla por año escolar y archivar los años cerrados:
+--   python mantenimiento_db.py particionar
+--   python mantenimiento_db.py archivar 2024 [--destino archivo --formato csv|parquet]
 CREATE TABLE IF NOT EXISTS inscripciones (
     id INT AUTO_INCREMENT PRIMARY KEY,
     nombres VARCHAR(100) NOT NULL,
@@ -19,6 +22,68 @@ CREATE TABLE IF NOT EXISTS inscripciones (
     direccion TEXT,
     profesion VARCHAR(100),
     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_fecha_registro (fecha_registro),
-    INDEX idx_nombres (nombres, apellidos)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
+    -- SHA-256 del Idempotency-Key del cliente o de nombres+apellidos+fecha_nacimiento+ano_escolar
+    clave_idempotencia CHAR(64) NOT NULL,
+    UNIQUE KEY uq_clave_idempotencia (clave_idempotencia),
+    INDEX idx_fecha_registro (fecha_registro, id),
+    INDEX idx_nombres (nombres, apellidos),
+    INDEX idx_apellidos (apellidos),
+    -- Índices compuestos para el listado paginado por (fecha_registro, id) con filtros
+    INDEX idx_grado_fecha (grado, fecha_registro, id),
+    INDEX idx_ano_fecha (ano_escolar, fecha_registro, id),
+    INDEX idx_ano_grado_fecha (ano_escolar, grado, fecha_registro, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Migración para bases de datos ya creadas (ejecutar una sola vez):
+-- ALTER TABLE inscripciones
+--     DROP INDEX idx_fecha_registro,
+--     ADD INDEX idx_fecha_registro (fecha_registro, id),
+--     ADD INDEX idx_apellidos (apellidos),
+--     ADD INDEX idx_grado_fecha (grado, fecha_registro, id),
+--     ADD INDEX idx_ano_fecha (ano_escolar, fecha_registro, id),
+--     ADD INDEX idx_ano_grado_fecha (ano_escolar, grado, fecha_registro, id);
+-- ALTER TABLE inscripciones ADD COLUMN clave_idempotencia CHAR(64) NULL AFTER fecha_registro;
+-- UPDATE inscripciones SET clave_idempotencia = SHA2(CONCAT('legado|', id), 256);
+-- ALTER TABLE inscripciones
+--     MODIFY clave_idempotencia CHAR(64) NOT NULL,
+--     ADD UNIQUE KEY uq_clave_idempotencia (clave_idempotencia);
+
+-- Cola persistente de correos salientes (la procesan los workers de app.py)
+CREATE TABLE IF NOT EXISTS cola_correos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    inscripcion_id INT NOT NULL,
+    destinatario VARCHAR(100) NOT NULL,
+    asunto VARCHAR(255) NOT NULL,
+    contenido_html MEDIUMTEXT NOT NULL,
+    contenido_texto MEDIUMTEXT,
+    estado ENUM('pendiente', 'enviando', 'enviado', 'fallido') NOT NULL DEFAULT 'pendiente',
+    intentos INT NOT NULL DEFAULT 0,
+    ultimo_error VARCHAR(500),
+    reclamado_por CHAR(32),
+    fecha_reclamo TIMESTAMP NULL,
+    proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_envio TIMESTAMP NULL,
+    -- 1 si es un reenvío desde el panel (/reenviar_correos)
+    reenvio TINYINT(1) NOT NULL DEFAULT 0,
+    INDEX idx_estado_proximo (estado, proximo_intento),
+    INDEX idx_reclamado (reclamado_por),
+    INDEX idx_inscripcion (inscripcion_id),
+    FOREIGN KEY (inscripcion_id) REFERENCES inscripciones(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Migración para bases de datos ya creadas (ejecutar una sola vez):
+-- ALTER TABLE cola_correos ADD COLUMN reenvio TINYINT(1) NOT NULL DEFAULT 0 AFTER fecha_envio;
+
+-- Eventos del panel administrativo (/eventos, Server-Sent Events).
+-- Se escriben en la misma transacción que la inscripción o el cambio de estado
+-- del correo; el id sirve de cursor (since / Last-Event-ID). Se purgan tras
+-- EVENTOS_RETENCION_HORAS.
+CREATE TABLE IF NOT EXISTS eventos (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    inscripcion_id INT NOT NULL,
+    datos TEXT NOT NULL,
+    fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_fecha (fecha)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -34,12 +34,66 @@ DB_HOST=localhost
 DB_USER=root
 DB_PASS=
 DB_NAME=colegio
+# Pool de conexiones (por worker de gunicorn)
+DB_POOL_SIZE=5
+DB_POOL_TIMEOUT=10
+# Réplicas de lectura opcionales para listado, estadísticas y exportación (host o host:puerto).
+# En modo async (APP_MODO=async) el listado pasa a la app Flask cuando hay réplicas
+DB_READ_HOSTS=
+DB_READ_POOL_SIZE=5
+# Segundos fuera de la rotación de una réplica que falla
+DB_REPLICA_EXPULSION_SEG=30
+# Tras inscribir, el mismo navegador lee del primario durante estos segundos
+DB_LEER_PRIMARIO_SEG=10
+# Filas por transacción en la importación masiva
+IMPORT_LOTE=500
+# Segundos que se recuerda una inscripción para responder a envíos repetidos
+IDEMPOTENCIA_TTL_SEG=600
 
 # Configuración de Gmail (OBLIGATORIO para envío de correos)
 MAIL_USER=tu_email@gmail.com
 MAIL_PASS=tu_contraseña_de_aplicacion_gmail
 MAIL_ADMIN=admin@colegio-xyz.edu.pe
 
+# Servidor SMTP (para pruebas locales: MAIL_SERVER=localhost, MAIL_PORT=8025, MAIL_TLS=false)
+MAIL_SERVER=smtp.gmail.com
+MAIL_PORT=587
+MAIL_TLS=true
+
+# Pool de sesiones SMTP reutilizables
+MAIL_POOL_SIZE=2
+MAIL_MAX_MENSAJES_SESION=100
+MAIL_NOOP_SEG=30
+
+# Cola de correos en segundo plano
+MAIL_WORKERS=2
+MAIL_MAX_INTENTOS=5
+MAIL_BACKOFF_SEG=30
+# Ritmo máximo de envío entre todos los procesos (Gmail bloquea ráfagas grandes); 0 = sin límite.
+# Se reparte entre MAIL_PROCESOS (por defecto WEB_CONCURRENCY): igual al número de workers de gunicorn
+MAIL_MAX_POR_MINUTO=60
+MAIL_PROCESOS=1
+# Máximo de inscripciones por llamada a /reenviar_correos
+REENVIO_MAX=500
+
+# Verificación de MySQL y SMTP en segundo plano (resultados servidos por /health)
+SALUD_INTERVALO_DB_SEG=15
+SALUD_INTERVALO_EMAIL_SEG=300
+# Mínimo de segundos entre llamadas a /health/profundo
+SALUD_PROFUNDO_MIN_SEG=30
+# La prueba SMTP abre su propia conexión (no usa el pool de la cola de correos)
+SALUD_TIMEOUT_EMAIL_SEG=10
+
+# Eventos en vivo del panel (/eventos)
+EVENTOS_INTERVALO_SEG=1
+EVENTOS_RETENCION_HORAS=24
+# Duración máxima de cada conexión SSE (el navegador reconecta solo)
+EVENTOS_MAX_SEG=300
+
+# Logs: texto o json (una línea JSON por evento, para agregadores de logs)
+LOG_FORMATO=texto
+LOG_NIVEL=INFO
+
 # INSTRUCCIONES PARA CONFIGURAR GMAIL:
 # 1. Ve a tu cuenta de Google (https://myaccount.google.com/)
 # 2. Seguridad > Verificación en 2 pasos (ACTIVAR)
@@ -92,17 +146,34 @@ def show_setup_instructions():
     print("   ├── app.py")
     print("   ├── install.py")
     print("   ├── database.sql")
+    print("   ├── build_assets.py")
     print("   ├── .env")
+    print("   ├── static/")
+    print("   │   └── src/ (main.css, main.js)")
     print("   └── templates/")
     print("       └── main.html")
     
-    print("\n4️⃣ EJECUTAR:")
+    print("\n4️⃣ COMPILAR ASSETS (opcional, recomendado en producción):")
+    print("   python build_assets.py")
+    
+    print("\n5️⃣ EJECUTAR:")
     print("   python app.py")
+    print("   (producción: gunicorn \"app:create_app()\" --worker-class gthread --threads 8,")
+    print("    cada panel abierto mantiene una conexión /eventos en un hilo)")
+    print("   (modo asíncrono: pip install quart aiomysql aiosmtplib asgiref uvicorn")
+    print("    y luego: uvicorn app_async:create_app --factory --port 5000)")
     
-    print("\n5️⃣ PROBAR:")
+    print("\n6️⃣ PROBAR:")
     print("   - Ve a http://localhost:5000")
     print("   - Prueba http://localhost:5000/test_db")
     print("   - Prueba http://localhost:5000/test_email")
+    print("   - Estado general: http://localhost:5000/health")
+    print("   - Benchmark: python benchmark.py --guardar base (y luego --baseline base)")
+
+    print("\n7️⃣ MANTENIMIENTO (al cerrar cada año escolar):")
+    print("   - python mantenimiento_db.py particionar   (una sola vez)")
+    print("   - python mantenimiento_db.py nuevo-ano 2027")
+    print("   - python mantenimiento_db.py archivar 2025")
 
 if __name__ == "__main__":
     print("🏫 Sistema de Inscripciones - Colegio SAN JUAN BAUTISTA")
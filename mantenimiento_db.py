@@ -0,0 +1,393 @@
+import argparse
+import csv
+import gzip
+import os
+import sys
+from datetime import datetime
+
+import mysql.connector
+from dotenv import load_dotenv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_DIR = os.path.join(BASE_DIR, 'archivo')
+
+COLUMNAS = [
+    'id', 'nombres', 'apellidos', 'fecha_nacimiento', 'grado', 'ano_escolar',
+    'padre_nombres', 'madre_nombres', 'padre_telefono', 'madre_telefono',
+    'email_padre', 'email_madre', 'direccion', 'profesion', 'fecha_registro',
+    'clave_idempotencia'
+]
+
+# Años cerrados: misma estructura que inscripciones, sin particiones y comprimida
+SQL_TABLA_ARCHIVO = """
+    CREATE TABLE IF NOT EXISTS inscripciones_archivo (
+        id INT NOT NULL PRIMARY KEY,
+        nombres VARCHAR(100) NOT NULL,
+        apellidos VARCHAR(100) NOT NULL,
+        fecha_nacimiento DATE NOT NULL,
+        grado VARCHAR(10) NOT NULL,
+        ano_escolar VARCHAR(10) NOT NULL,
+        padre_nombres VARCHAR(150),
+        madre_nombres VARCHAR(150),
+        padre_telefono VARCHAR(20),
+        madre_telefono VARCHAR(20),
+        email_padre VARCHAR(100),
+        email_madre VARCHAR(100),
+        direccion TEXT,
+        profesion VARCHAR(100),
+        fecha_registro TIMESTAMP NULL,
+        clave_idempotencia CHAR(64) NOT NULL,
+        fecha_archivo TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_ano_grado (ano_escolar, grado),
+        INDEX idx_nombres (nombres, apellidos)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+      ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8
+"""
+
+def esquema_parquet():
+    """Esquema fijo: inferirlo por lote tipa como null las columnas vacías y el writer lo rechaza"""
+    texto = pa.string()
+    tipos = {'id': pa.int64(), 'fecha_nacimiento': pa.date32(), 'fecha_registro': pa.timestamp('us')}
+    return pa.schema([pa.field(columna, tipos.get(columna, texto)) for columna in COLUMNAS])
+
+def conectar():
+    load_dotenv()
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASS', ''),
+        database=os.getenv('DB_NAME', 'colegio'),
+        charset='utf8mb4',
+        collation='utf8mb4_unicode_ci',
+        autocommit=True
+    )
+
+def ejecutar(cursor, sql, params=(), simular=False):
+    if simular:
+        print(sql.strip() + ';\n')
+    else:
+        cursor.execute(sql, params)
+
+def particiones(cursor):
+    """[(nombre, límite, filas estimadas)] de inscripciones; vacío si no está particionada"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'inscripciones'
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return cursor.fetchall()
+
+def definiciones_particiones(desde, hasta):
+    """Una partición por año (p2025 < '2026') y pfuturo para los posteriores"""
+    definiciones = [f"PARTITION p{ano} VALUES LESS THAN ('{ano + 1}')" for ano in range(desde, hasta + 1)]
+    definiciones.append("PARTITION pfuturo VALUES LESS THAN (MAXVALUE)")
+    return ',\n            '.join(definiciones)
+
+def mostrar_estado(cursor, args):
+    """Filas por año escolar, particiones y archivo"""
+    cursor.execute("SELECT ano_escolar, COUNT(*) FROM inscripciones GROUP BY ano_escolar ORDER BY ano_escolar")
+    print("📊 inscripciones por año escolar:")
+    for ano, total in cursor.fetchall():
+        print(f"   {ano}: {total}")
+
+    actuales = particiones(cursor)
+    if actuales:
+        print("🧱 Particiones (filas estimadas):")
+        for nombre, limite, filas in actuales:
+            print(f"   {nombre} < {limite}: ~{filas}")
+    else:
+        print("🧱 inscripciones no está particionada (python mantenimiento_db.py particionar)")
+
+    cursor.execute("SHOW TABLES LIKE 'inscripciones_archivo'")
+    if cursor.fetchone():
+        cursor.execute("SELECT ano_escolar, COUNT(*) FROM inscripciones_archivo GROUP BY ano_escolar ORDER BY ano_escolar")
+        print("🗄️  inscripciones_archivo:")
+        for ano, total in cursor.fetchall():
+            print(f"   {ano}: {total}")
+    return True
+
+def particionar(cursor, args):
+    """RANGE COLUMNS(ano_escolar): una partición por año y pfuturo para el resto
+
+    Se particiona por año escolar y no por fecha_registro porque MySQL exige que
+    la columna de partición forme parte de toda clave única: la clave derivada
+    de los datos ya incluye el año en su hash, así que sigue siendo única,
+    mientras que con fecha_registro cada reintento tendría otra clave. Una
+    Idempotency-Key enviada por el cliente no incluye el año: tras particionar
+    solo se deduplica dentro del mismo año escolar. Las
+    tablas particionadas no admiten claves foráneas, así que se elimina la de
+    cola_correos (el archivado borra los correos explícitamente).
+    """
+    if particiones(cursor):
+        print("✅ inscripciones ya está particionada")
+        return True
+
+    cursor.execute("SELECT MIN(ano_escolar), MAX(ano_escolar) FROM inscripciones WHERE ano_escolar REGEXP '^[0-9]{4}$'")
+    minimo, maximo = cursor.fetchone()
+    ano_actual = datetime.now().year
+    desde = args.desde or int(minimo or ano_actual)
+    hasta = max(args.hasta or ano_actual + 1, int(maximo or 0))
+
+    cursor.execute("""
+        SELECT TABLE_NAME, CONSTRAINT_NAME
+        FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = 'inscripciones'
+    """)
+    for tabla, restriccion in cursor.fetchall():
+        print(f"🔗 Eliminando clave foránea {tabla}.{restriccion}")
+        ejecutar(cursor, f"ALTER TABLE {tabla} DROP FOREIGN KEY {restriccion}", simular=args.simular)
+
+    print("🔑 Añadiendo ano_escolar a la clave primaria y a la clave de idempotencia")
+    ejecutar(cursor, """
+        ALTER TABLE inscripciones
+            DROP PRIMARY KEY, ADD PRIMARY KEY (id, ano_escolar),
+            DROP INDEX uq_clave_idempotencia,
+            ADD UNIQUE KEY uq_clave_idempotencia (clave_idempotencia, ano_escolar)
+    """, simular=args.simular)
+
+    print(f"🧱 Particionando inscripciones por año escolar ({desde}-{hasta})")
+    ejecutar(cursor, f"""
+        ALTER TABLE inscripciones
+        PARTITION BY RANGE COLUMNS (ano_escolar) (
+            {definiciones_particiones(desde, hasta)}
+        )
+    """, simular=args.simular)
+    print("✅ Migración completada" if not args.simular else "💡 Sin cambios (--simular)")
+    return True
+
+def nuevo_ano(cursor, args):
+    """Separar de pfuturo las particiones hasta el año indicado (antes de abrir inscripciones)"""
+    actuales = particiones(cursor)
+    if not actuales:
+        print("❌ inscripciones no está particionada")
+        return False
+    anos = [int(nombre[1:]) for nombre, _, _ in actuales if nombre[1:].isdigit()]
+    siguiente = max(anos) + 1 if anos else datetime.now().year
+    if siguiente > args.ano:
+        print(f"✅ Ya existe la partición de {args.ano}")
+        return True
+
+    print(f"🧱 Creando particiones {siguiente}-{args.ano}")
+    ejecutar(cursor, f"""
+        ALTER TABLE inscripciones REORGANIZE PARTITION pfuturo INTO (
+            {definiciones_particiones(siguiente, args.ano)}
+        )
+    """, simular=args.simular)
+    return True
+
+def lotes_ids(cursor, ano, tamano):
+    """Rangos (primer_id, ultimo_id) de las inscripciones del año, en orden"""
+    ultimo = 0
+    while True:
+        cursor.execute("""
+            SELECT MIN(id), MAX(id) FROM (
+                SELECT id FROM inscripciones
+                WHERE ano_escolar = %s AND id > %s
+                ORDER BY id
+                LIMIT %s
+            ) lote
+        """, (ano, ultimo, tamano))
+        primero, ultimo_lote = cursor.fetchone()
+        if primero is None:
+            return
+        yield primero, ultimo_lote
+        ultimo = ultimo_lote
+
+def borrar_rango(conn, ano, primero, ultimo):
+    """Borrar un rango de inscripciones del año junto con sus correos"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        DELETE c FROM cola_correos c
+        JOIN inscripciones i ON i.id = c.inscripcion_id
+        WHERE i.ano_escolar = %s AND i.id BETWEEN %s AND %s
+    """, (ano, primero, ultimo))
+    cursor.execute(
+        "DELETE FROM inscripciones WHERE ano_escolar = %s AND id BETWEEN %s AND %s",
+        (ano, primero, ultimo)
+    )
+    cursor.close()
+
+def borrar_ids(conn, ano, ids):
+    """Borrar inscripciones concretas del año junto con sus correos"""
+    marcas = ', '.join(['%s'] * len(ids))
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        DELETE c FROM cola_correos c
+        JOIN inscripciones i ON i.id = c.inscripcion_id
+        WHERE i.ano_escolar = %s AND i.id IN ({marcas})
+    """, [ano] + ids)
+    cursor.execute(f"DELETE FROM inscripciones WHERE ano_escolar = %s AND id IN ({marcas})", [ano] + ids)
+    cursor.close()
+
+def archivar_en_tabla(conn, ano, tamano):
+    """Copiar y borrar por lotes; cada lote en su propia transacción"""
+    cursor = conn.cursor(buffered=True)
+    cursor.execute(SQL_TABLA_ARCHIVO)
+    columnas = ', '.join(COLUMNAS)
+    movidas = 0
+    for primero, ultimo in list(lotes_ids(cursor, ano, tamano)):
+        conn.start_transaction()
+        cursor.execute(f"""
+            INSERT INTO inscripciones_archivo ({columnas})
+            SELECT {columnas} FROM inscripciones
+            WHERE ano_escolar = %s AND id BETWEEN %s AND %s
+        """, (ano, primero, ultimo))
+        movidas += cursor.rowcount
+        borrar_rango(conn, ano, primero, ultimo)
+        conn.commit()
+        print(f"   📦 {movidas} inscripciones archivadas")
+    cursor.close()
+    return movidas
+
+def archivar_en_archivo(conn, ano, formato, tamano):
+    """Volcar el año a archivo/ (CSV gzip o Parquet) y después borrarlo por lotes"""
+    os.makedirs(ARCHIVO_DIR, exist_ok=True)
+    extension = 'csv.gz' if formato == 'csv' else 'parquet'
+    destino = os.path.join(ARCHIVO_DIR, f"inscripciones_{ano}.{extension}")
+    if os.path.exists(destino):
+        # Nunca se sobrescribe un archivo: puede contener filas que ya no están
+        # en la tabla (una ejecución interrumpida o filas tardías del año)
+        destino = os.path.join(
+            ARCHIVO_DIR, f"inscripciones_{ano}_{datetime.now():%Y%m%d%H%M%S}.{extension}"
+        )
+        print(f"   ⚠️  Ya existe un archivo de {ano}: se escribe uno nuevo")
+    temporal = destino + '.tmp'
+
+    cursor = conn.cursor(buffered=False)
+    cursor.execute(
+        f"SELECT {', '.join(COLUMNAS)} FROM inscripciones WHERE ano_escolar = %s ORDER BY id", (ano,)
+    )
+    escritas = 0
+    ids_escritos = []
+    if formato == 'csv':
+        with gzip.open(temporal, 'wt', encoding='utf-8', newline='', compresslevel=9) as f:
+            escritor = csv.writer(f)
+            escritor.writerow(COLUMNAS)
+            while True:
+                filas = cursor.fetchmany(tamano)
+                if not filas:
+                    break
+                escritor.writerows(filas)
+                ids_escritos.extend(fila[0] for fila in filas)
+                escritas += len(filas)
+    else:
+        escritor = None
+        esquema = esquema_parquet()
+        while True:
+            filas = cursor.fetchmany(tamano)
+            if not filas:
+                break
+            tabla = pa.Table.from_pylist([dict(zip(COLUMNAS, fila)) for fila in filas], schema=esquema)
+            if escritor is None:
+                escritor = pq.ParquetWriter(temporal, esquema, compression='zstd')
+            escritor.write_table(tabla)
+            ids_escritos.extend(fila[0] for fila in filas)
+            escritas += len(filas)
+        if escritor:
+            escritor.close()
+    cursor.close()
+
+    if not escritas:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        return 0
+    os.replace(temporal, destino)
+    print(f"   💾 {escritas} inscripciones en {os.path.relpath(destino, BASE_DIR)}")
+
+    # Solo se borran los ids que quedaron en el archivo: las filas insertadas
+    # después del volcado siguen en la tabla para el próximo archivado
+    for i in range(0, len(ids_escritos), tamano):
+        conn.start_transaction()
+        borrar_ids(conn, ano, ids_escritos[i:i + tamano])
+        conn.commit()
+    return escritas
+
+def archivar(cursor, args):
+    """Mover un año escolar cerrado fuera de la tabla inscripciones"""
+    ano = str(args.ano)
+    if args.ano >= datetime.now().year and not args.forzar:
+        print(f"❌ El año escolar {ano} no está cerrado (use --forzar si está seguro)")
+        return False
+    if args.formato == 'parquet' and pa is None:
+        print("❌ Instala 'pyarrow' para archivar en Parquet (o usa --formato csv)")
+        return False
+
+    cursor.execute("SELECT COUNT(*) FROM inscripciones WHERE ano_escolar = %s", (ano,))
+    total = cursor.fetchone()[0]
+    print(f"🗄️  Archivando {total} inscripciones de {ano} en {args.destino if args.destino == 'tabla' else args.formato}")
+    if not total or args.simular:
+        return True
+
+    conn = conectar()
+    try:
+        if args.destino == 'tabla':
+            movidas = archivar_en_tabla(conn, ano, args.lote)
+        else:
+            movidas = archivar_en_archivo(conn, ano, args.formato, args.lote)
+    finally:
+        conn.close()
+
+    # La partición del año quedó vacía: quitarla (es instantáneo)
+    nombres = [nombre for nombre, _, _ in particiones(cursor)]
+    if f"p{ano}" in nombres and nombres[-1] != f"p{ano}":
+        cursor.execute(f"SELECT COUNT(*) FROM inscripciones PARTITION (p{ano})")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE inscripciones DROP PARTITION p{ano}")
+            print(f"🧱 Partición p{ano} eliminada")
+
+    print(f"✅ {movidas} inscripciones de {ano} archivadas")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Particionado y archivo de la tabla inscripciones")
+    parser.add_argument('--simular', action='store_true', help="Mostrar el SQL sin ejecutarlo")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    comandos.add_parser('estado', help="Filas por año, particiones y archivo")
+
+    p = comandos.add_parser('particionar', help="Particionar inscripciones por año escolar")
+    p.add_argument('--desde', type=int, help="Primer año con partición propia (por defecto el más antiguo)")
+    p.add_argument('--hasta', type=int, help="Último año con partición propia (por defecto el próximo)")
+
+    p = comandos.add_parser('nuevo-ano', help="Crear las particiones hasta un año")
+    p.add_argument('ano', type=int)
+
+    p = comandos.add_parser('archivar', help="Mover un año escolar cerrado al archivo")
+    p.add_argument('ano', type=int)
+    p.add_argument('--destino', choices=['tabla', 'archivo'], default='tabla',
+                   help="tabla comprimida inscripciones_archivo o archivo en archivo/")
+    p.add_argument('--formato', choices=['csv', 'parquet'], default='csv', help="Con --destino archivo")
+    p.add_argument('--lote', type=int, default=5000, help="Filas por transacción")
+    p.add_argument('--forzar', action='store_true', help="Permitir archivar el año en curso")
+
+    args = parser.parse_args()
+    acciones = {
+        'estado': mostrar_estado,
+        'particionar': particionar,
+        'nuevo-ano': nuevo_ano,
+        'archivar': archivar,
+    }
+
+    conn = conectar()
+    try:
+        cursor = conn.cursor(buffered=True)
+        ok = acciones[args.comando](cursor, args)
+        cursor.close()
+    finally:
+        conn.close()
+    return ok
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except mysql.connector.Error as e:
+        print(f"❌ Error de base de datos: {e}")
+        sys.exit(1)
@@ -0,0 +1,871 @@
+// Variables globales
+let currentSection = 1;
+const totalSections = 3;
+// Últimas inscripciones del servidor; se mantienen al día con /eventos
+let inscripcionesData = [];
+const maxFilasTabla = 50;
+let gradosChart, inscripcionesChart;
+
+// Respuestas predefinidas del chatbot
+const chatbotResponses = {
+    'requisitos': 'Los requisitos para la inscripción son: 1) Llenar el formulario completo, 2) Proporcionar al menos un email de contacto, 3) Indicar el grado y año escolar deseado. ¿Hay algo específico sobre los requisitos que te gustaría saber?',
+    'documentos': 'Después de enviar la inscripción online, necesitarás presentar: partida de nacimiento, DNI del estudiante, boletas de notas del colegio anterior (si aplica), y fotos tamaño carnet. Te contactaremos para coordinar la entrega.',
+    'costos': 'Los costos varían según el grado. Contáctanos al (01) 234-5678 para información detallada sobre pensiones y matrícula. También podemos agendar una cita para explicarte nuestros planes de pago.',
+    'edad': 'Para calcular la edad automáticamente, solo selecciona la fecha de nacimiento en el formulario. El sistema calculará la edad exacta. Si tienes dudas sobre el grado apropiado según la edad, podemos ayudarte.',
+    'grados': 'Ofrecemos desde 1° de primaria hasta 5° de secundaria. Cada grado tiene un programa académico específico adaptado a la edad. ¿Para qué grado estás consultando?',
+    'contacto': 'Puedes contactarnos por: Teléfono: (01) 234-5678, Celular: 987-654-321, Email: sanjuanbautista@colegio.edu.pe, o visitarnos en Av. Alameda Eden, San Martin, Nueva Cajamarca.',
+    'horarios': 'Nuestros horarios de atención son: Lunes a Viernes de 7:10 AM a 3:00 PM, Sábados de 8:00 AM a 1:00 PM. Para inscripciones, recomendamos agendar cita previa.',
+    'instalaciones': 'Contamos con aulas tecnológicas con pizarras inteligentes, laboratorios de ciencias completamente equipados, instalaciones deportivas incluyendo canchas y gimnasio, biblioteca moderna y espacios recreativos.',
+    'proceso': 'El proceso es: 1) Completar el formulario online, 2) Recibir confirmación por email, 3) Recibir llamada de nuestro personal (2-3 días), 4) Agendar visita a las instalaciones, 5) Presentar documentos físicos, 6) Confirmación de vacante.',
+    'ayuda': 'Puedo ayudarte con información sobre: requisitos de inscripción, documentos necesarios, costos y pensiones, proceso de admisión, instalaciones del colegio, horarios de atención, y cualquier duda sobre el formulario.',
+    'default': 'Entiendo tu consulta. Te recomiendo que: 1) Revises la información en nuestra página web, 2) Llames directamente al (01) 234-5678 para consultas específicas, o 3) Nos visites en nuestras instalaciones. ¿Hay algo más en lo que pueda ayudarte?'
+};
+
+// Inicialización
+document.addEventListener('DOMContentLoaded', function() {
+    setupFadeInAnimations();
+    setupFormValidation();
+    setupCharts();
+    actualizarEstadisticas();
+    // Suscribirse antes de la carga inicial para no perder inscripciones intermedias
+    conectarEventos();
+    cargarInscripciones();
+
+    // Calcular edad automáticamente
+    document.getElementById('fecha-nacimiento').addEventListener('change', calcularEdad);
+});
+
+function setupFadeInAnimations() {
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('visible');
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.fade-in').forEach(el => {
+        observer.observe(el);
+    });
+
+    // Navegación suave
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+}
+
+function setupFormValidation() {
+    // Validación de emails
+    const emailInputs = document.querySelectorAll('input[type="email"]');
+    emailInputs.forEach(input => {
+        input.addEventListener('blur', function() {
+            validateEmail(this);
+        });
+    });
+
+    // Validación de teléfonos
+    const phoneInputs = document.querySelectorAll('input[type="tel"]');
+    phoneInputs.forEach(input => {
+        input.addEventListener('input', function() {
+            this.value = this.value.replace(/[^0-9\s\-\(\)]/g, '');
+        });
+    });
+
+    // Validación de nombres
+    const nameInputs = document.querySelectorAll('input[name*="ombres"], input[name*="apellidos"]');
+    nameInputs.forEach(input => {
+        input.addEventListener('input', function() {
+            this.value = this.value.replace(/[^a-zA-ZáéíóúÁÉÍÓÚñÑ\s]/g, '');
+        });
+    });
+}
+
+function setupCharts() {
+    // Gráfico de inscripciones por día
+    const inscripcionesCtx = document.getElementById('inscripcionesChart').getContext('2d');
+    inscripcionesChart = new Chart(inscripcionesCtx, {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: 'Inscripciones',
+                data: [],
+                borderColor: '#667eea',
+                backgroundColor: 'rgba(102, 126, 234, 0.1)',
+                tension: 0.4,
+                fill: true
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    display: false
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+
+    // Gráfico de distribución por grados
+    const gradosCtx = document.getElementById('gradosChart').getContext('2d');
+    gradosChart = new Chart(gradosCtx, {
+        type: 'doughnut',
+        data: {
+            labels: [],
+            datasets: [{
+                data: [],
+                backgroundColor: [
+                    '#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', 
+                    '#9966FF', '#FF9F40', '#FF6384', '#C9CBCF',
+                    '#4BC0C0', '#FF6384', '#C9CBCF'
+                ]
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'right'
+                }
+            }
+        }
+    });
+
+    actualizarGraficos();
+}
+
+// Funciones del formulario
+function calcularEdad() {
+    const fechaNacimiento = document.getElementById('fecha-nacimiento').value;
+    if (fechaNacimiento) {
+        const hoy = new Date();
+        const nacimiento = new Date(fechaNacimiento);
+        let edad = hoy.getFullYear() - nacimiento.getFullYear();
+        const mes = hoy.getMonth() - nacimiento.getMonth();
+
+        if (mes < 0 || (mes === 0 && hoy.getDate() < nacimiento.getDate())) {
+            edad--;
+        }
+
+        document.getElementById('edad').value = edad + ' años';
+    }
+}
+
+function validateEmail(input) {
+    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+    if (input.value && !emailRegex.test(input.value)) {
+        input.classList.add('input-error');
+        showFieldError(input, 'Formato de email inválido');
+    } else {
+        input.classList.remove('input-error');
+        hideFieldError(input);
+    }
+}
+
+function showFieldError(input, message) {
+    hideFieldError(input);
+    const errorDiv = document.createElement('div');
+    errorDiv.className = 'field-error text-red-500 text-sm mt-1';
+    errorDiv.textContent = message;
+    input.parentNode.appendChild(errorDiv);
+}
+
+function hideFieldError(input) {
+    const existingError = input.parentNode.querySelector('.field-error');
+    if (existingError) {
+        existingError.remove();
+    }
+}
+
+function nextSection() {
+    if (validateCurrentSection()) {
+        if (currentSection < totalSections) {
+            document.getElementById(`section-${currentSection}`).classList.remove('active');
+            currentSection++;
+            document.getElementById(`section-${currentSection}`).classList.add('active');
+            updateProgressBar();
+            document.getElementById('formulario').scrollIntoView({
+                behavior: 'smooth',
+                block: 'start'
+            });
+        }
+    }
+}
+
+function prevSection() {
+    if (currentSection > 1) {
+        document.getElementById(`section-${currentSection}`).classList.remove('active');
+        currentSection--;
+        document.getElementById(`section-${currentSection}`).classList.add('active');
+        updateProgressBar();
+        document.getElementById('formulario').scrollIntoView({
+            behavior: 'smooth',
+            block: 'start'
+        });
+    }
+}
+
+function updateProgressBar() {
+    const progress = (currentSection / totalSections) * 100;
+    document.getElementById('progress-bar').style.width = progress + '%';
+}
+
+function validateCurrentSection() {
+    let isValid = true;
+    const currentSectionElement = document.getElementById(`section-${currentSection}`);
+    const requiredFields = currentSectionElement.querySelectorAll('[required]');
+
+    currentSectionElement.querySelectorAll('.input-error').forEach(input => {
+        input.classList.remove('input-error');
+    });
+    currentSectionElement.querySelectorAll('.field-error').forEach(error => {
+        error.remove();
+    });
+
+    requiredFields.forEach(field => {
+        if (!field.value.trim()) {
+            field.classList.add('input-error');
+            showFieldError(field, 'Este campo es obligatorio');
+            isValid = false;
+        }
+    });
+
+    if (currentSection === 2) {
+        const emailPadre = currentSectionElement.querySelector('input[name="emailPadre"]').value;
+        const emailMadre = currentSectionElement.querySelector('input[name="emailMadre"]').value;
+
+        if (!emailPadre && !emailMadre) {
+            showMessage('error', 'Debe proporcionar al menos un correo electrónico (padre o madre)');
+            isValid = false;
+        }
+    }
+
+    if (!isValid) {
+        showMessage('error', 'Por favor, complete todos los campos requeridos correctamente');
+    }
+
+    return isValid;
+}
+
+function showMessage(type, message) {
+    hideMessages();
+    const messageElement = document.getElementById(`${type}-message`);
+    const textElement = document.getElementById(`${type}-text`);
+
+    textElement.textContent = message;
+    messageElement.style.display = 'block';
+
+    setTimeout(() => {
+        messageElement.style.display = 'none';
+    }, 5000);
+
+    messageElement.scrollIntoView({
+        behavior: 'smooth',
+        block: 'center'
+    });
+}
+
+function hideMessages() {
+    document.getElementById('success-message').style.display = 'none';
+    document.getElementById('error-message').style.display = 'none';
+}
+
+function showNotification(type, message) {
+    const notification = document.getElementById('notification');
+    const notificationText = document.getElementById('notification-text');
+
+    notification.className = `notification ${type}`;
+    notificationText.textContent = message;
+    notification.classList.add('show');
+
+    setTimeout(() => {
+        notification.classList.remove('show');
+    }, 4000);
+}
+
+// Manejo del formulario principal
+document.getElementById('form-inscripcion').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    if (!validateCurrentSection()) {
+        return;
+    }
+
+    const submitBtn = document.getElementById('submit-btn');
+    const submitText = document.getElementById('submit-text');
+    const loadingText = document.getElementById('loading-text');
+
+    submitBtn.disabled = true;
+    submitText.style.display = 'none';
+    loadingText.style.display = 'inline';
+    hideMessages();
+
+    try {
+        // Obtener datos del formulario
+        const formData = new FormData(this);
+        const data = {};
+        formData.forEach((value, key) => {
+            data[key] = value;
+        });
+
+        // La tabla y los gráficos se actualizan con el evento que emite el servidor
+        const response = await fetch('/enviar_inscripcion', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+        const result = await response.json();
+        if (!result.success) {
+            showMessage('error', result.message);
+            showNotification('error', 'Revise los datos de la inscripción');
+            return;
+        }
+
+        showMessage('success', 
+            '¡Inscripción enviada exitosamente! Se han enviado correos de confirmación a los emails proporcionados. Recibirán una llamada en los próximos 2-3 días hábiles para coordinar la visita a las instalaciones.'
+        );
+
+        showNotification('success', 'Inscripción registrada correctamente');
+
+        setTimeout(() => {
+            this.reset();
+            currentSection = 1;
+            document.querySelectorAll('.form-section').forEach(section => {
+                section.classList.remove('active');
+            });
+            document.getElementById('section-1').classList.add('active');
+            updateProgressBar();
+            document.getElementById('edad').value = '';
+        }, 3000);
+
+    } catch (error) {
+        showMessage('error', 'Error al enviar la inscripción. Por favor, intente nuevamente.');
+        showNotification('error', 'Error al procesar la inscripción');
+    } finally {
+        submitBtn.disabled = false;
+        submitText.style.display = 'inline';
+        loadingText.style.display = 'none';
+    }
+});
+
+// Funciones del chatbot
+function handleChatbotKeypress(event) {
+    if (event.key === 'Enter') {
+        sendChatbotMessage();
+    }
+}
+
+function sendChatbotMessage() {
+    const input = document.getElementById('chatbot-input');
+    const message = input.value.trim();
+
+    if (message) {
+        addChatbotMessage(message, 'user');
+        input.value = '';
+
+        // Simular respuesta del bot
+        setTimeout(() => {
+            const response = getChatbotResponse(message);
+            addChatbotMessage(response, 'bot');
+        }, 1000);
+    }
+}
+
+function addChatbotMessage(message, sender) {
+    const messagesContainer = document.getElementById('chatbot-messages');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${sender}`;
+    messageDiv.textContent = message;
+
+    messagesContainer.appendChild(messageDiv);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+}
+
+function getChatbotResponse(message) {
+    const lowerMessage = message.toLowerCase();
+
+    for (const [key, response] of Object.entries(chatbotResponses)) {
+        if (lowerMessage.includes(key)) {
+            return response;
+        }
+    }
+
+    return chatbotResponses.default;
+}
+
+// Funciones del panel administrativo
+function toggleAdminPanel() {
+    const adminContent = document.getElementById('admin-content');
+    const adminArrow = document.getElementById('admin-arrow');
+
+    if (adminContent.classList.contains('active')) {
+        adminContent.classList.remove('active');
+        adminArrow.classList.remove('fa-chevron-up');
+        adminArrow.classList.add('fa-chevron-down');
+    } else {
+        adminContent.classList.add('active');
+        adminArrow.classList.remove('fa-chevron-down');
+        adminArrow.classList.add('fa-chevron-up');
+    }
+}
+
+// Inscripciones del servidor con los campos que usan la tabla y el detalle
+// Los datos vienen del formulario público y de la importación: nunca se
+// interpolan en innerHTML sin escapar
+function escaparHTML(valor) {
+    return String(valor ?? '').replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[c]);
+}
+
+function desdeServidor(ins) {
+    return {
+        id: ins.id,
+        fecha: ins.fecha_registro,
+        estudiante: `${ins.nombres} ${ins.apellidos}`,
+        nombres: ins.nombres,
+        apellidos: ins.apellidos,
+        fechaNacimiento: ins.fecha_nacimiento,
+        grado: ins.grado,
+        anoEscolar: ins.ano_escolar,
+        emails: [ins.email_padre, ins.email_madre].filter(email => email),
+        padreNombres: ins.padre_nombres || 'No especificado',
+        padreTelefono: ins.padre_telefono || 'No especificado',
+        madreNombres: ins.madre_nombres || 'No especificado',
+        madreTelefono: ins.madre_telefono || 'No especificado',
+        direccion: ins.direccion,
+        profesion: ins.profesion || 'No especificada',
+        correos: ins.correos || {},
+        estado: estadoCorreos(ins.correos || {}),
+        emailsReenviados: (ins.correos || {}).reenviado || 0
+    };
+}
+
+function estadoCorreos(correos) {
+    if (correos.pendiente) return 'Pendiente';
+    if (correos.fallido) return 'Fallido';
+    if (correos.enviado) return 'Entregado';
+    return 'Sin email';
+}
+
+async function cargarInscripciones() {
+    try {
+        const response = await fetch(`/consultar_inscripciones?limite=${maxFilasTabla}&correos=1`);
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.message);
+        }
+        inscripcionesData = data.inscripciones.map(desdeServidor);
+    } catch (error) {
+        console.error('Error cargando inscripciones:', error);
+    }
+    actualizarTablaEmails();
+}
+
+// Cambios en vivo (Server-Sent Events). El navegador reconecta solo y envía
+// Last-Event-ID, así el servidor reenvía lo que se perdió mientras tanto.
+let fuenteEventos = null;
+
+function conectarEventos() {
+    if (!window.EventSource || fuenteEventos) {
+        return;
+    }
+    fuenteEventos = new EventSource('/eventos');
+
+    fuenteEventos.addEventListener('inscripcion', e => aplicarInscripcion(JSON.parse(e.data)));
+    fuenteEventos.addEventListener('correo', e => aplicarCorreo(JSON.parse(e.data)));
+    fuenteEventos.addEventListener('correos', e => aplicarReenvio(JSON.parse(e.data)));
+    fuenteEventos.addEventListener('recargar', () => {
+        // Demasiado atrasado para ponerse al día evento por evento
+        estadisticasActuales = null;
+        cargarInscripciones();
+        actualizarEstadisticas();
+        actualizarGraficos();
+    });
+}
+
+function aplicarInscripcion(datos) {
+    // Puede llegar una inscripción que ya vino en la carga inicial
+    if (inscripcionesData.some(item => item.id === datos.id)) {
+        return;
+    }
+    inscripcionesData.unshift(desdeServidor(datos));
+    if (inscripcionesData.length > maxFilasTabla) {
+        inscripcionesData.pop();
+    }
+    actualizarTablaEmails();
+
+    if (estadisticasActuales) {
+        const est = estadisticasActuales;
+        est.total_inscripciones += 1;
+        est.correos.pendientes += datos.correos.pendiente || 0;
+
+        const dia = datos.fecha_registro.slice(0, 10);
+        const porDia = est.por_dia.find(item => item.fecha === dia);
+        if (porDia) {
+            porDia.total += 1;
+        } else {
+            est.por_dia.push({ fecha: dia, total: 1 });
+        }
+
+        const porGrado = est.por_grado.find(item => item.grado === datos.grado);
+        if (porGrado) {
+            porGrado.total += 1;
+        } else {
+            est.por_grado.push({ grado: datos.grado, total: 1 });
+        }
+        est.por_grado.sort((a, b) => b.total - a.total);
+
+        pintarEstadisticas(est);
+        pintarGraficos(est);
+    }
+}
+
+function aplicarCorreo(datos) {
+    const inscripcion = inscripcionesData.find(item => item.id === datos.inscripcion_id);
+    if (inscripcion) {
+        const correos = inscripcion.correos;
+        correos.pendiente = Math.max((correos.pendiente || 0) - 1, 0);
+        correos[datos.estado] = (correos[datos.estado] || 0) + 1;
+        inscripcion.estado = estadoCorreos(correos);
+        actualizarTablaEmails();
+    }
+
+    if (estadisticasActuales) {
+        const correos = estadisticasActuales.correos;
+        correos.pendientes = Math.max(correos.pendientes - 1, 0);
+        if (datos.estado === 'enviado') {
+            correos.enviados += 1;
+        } else {
+            correos.fallidos += 1;
+        }
+        pintarEstadisticas(estadisticasActuales);
+    }
+}
+
+function aplicarReenvio(datos) {
+    const inscripcion = inscripcionesData.find(item => item.id === datos.inscripcion_id);
+    if (inscripcion) {
+        inscripcion.correos = datos.correos;
+        inscripcion.estado = estadoCorreos(datos.correos);
+        inscripcion.emailsReenviados = datos.correos.reenviado || 0;
+        actualizarTablaEmails();
+    }
+
+    if (estadisticasActuales) {
+        estadisticasActuales.correos.pendientes += datos.encolados;
+        pintarEstadisticas(estadisticasActuales);
+    }
+}
+
+function actualizarTablaEmails() {
+    const tbody = document.getElementById('emails-table-body');
+    tbody.innerHTML = '';
+
+    if (inscripcionesData.length === 0) {
+        tbody.innerHTML = `
+            <tr>
+                <td colspan="6" class="px-4 py-8 text-center text-gray-500">
+                    <i class="fas fa-inbox text-4xl mb-4 text-gray-300"></i>
+                    <p>No hay inscripciones registradas aún.</p>
+                    <p class="text-sm">Las inscripciones aparecerán aquí cuando se envíen formularios.</p>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    inscripcionesData.forEach(inscripcion => {
+        const row = document.createElement('tr');
+        row.className = 'border-b hover:bg-gray-50';
+
+        const emailsList = inscripcion.emails.map(escaparHTML).join('<br>');
+        const estadoClass = {
+            'Entregado': 'bg-green-100 text-green-800',
+            'Fallido': 'bg-red-100 text-red-800'
+        }[inscripcion.estado] || 'bg-yellow-100 text-yellow-800';
+        const estadoIcon = {
+            'Entregado': 'fas fa-check',
+            'Fallido': 'fas fa-times'
+        }[inscripcion.estado] || 'fas fa-clock';
+
+        row.innerHTML = `
+            <td class="px-4 py-3">${escaparHTML(inscripcion.fecha)}</td>
+            <td class="px-4 py-3 font-medium">${escaparHTML(inscripcion.estudiante)}</td>
+            <td class="px-4 py-3">${emailsList}</td>
+            <td class="px-4 py-3">
+                <span class="${estadoClass} px-2 py-1 rounded-full text-xs">
+                    <i class="${estadoIcon} mr-1"></i>${escaparHTML(inscripcion.estado)}
+                </span>
+            </td>
+            <td class="px-4 py-3">${escaparHTML(inscripcion.grado)}° Grado</td>
+            <td class="px-4 py-3">
+                <button class="text-blue-600 hover:text-blue-800 mr-2" onclick="verDetalle(${Number(inscripcion.id)})" title="Ver detalles">
+                    <i class="fas fa-eye"></i>
+                </button>
+                <button class="text-green-600 hover:text-green-800" onclick="reenviarEmail(${Number(inscripcion.id)})" title="Reenviar email">
+                    <i class="fas fa-redo"></i>
+                </button>
+            </td>
+        `;
+
+        tbody.appendChild(row);
+    });
+}
+
+// Estadísticas calculadas en el servidor (/estadisticas); los eventos las
+// actualizan localmente sin volver a pedirlas
+let estadisticasPromesa = null;
+let estadisticasActuales = null;
+
+function cargarEstadisticas() {
+    // Evitar pedir dos veces cuando se actualizan tarjetas y gráficos juntos
+    if (!estadisticasPromesa) {
+        estadisticasPromesa = fetch('/estadisticas')
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    throw new Error(data.message);
+                }
+                estadisticasActuales = data.estadisticas;
+                return data.estadisticas;
+            })
+            .finally(() => {
+                setTimeout(() => { estadisticasPromesa = null; }, 1000);
+            });
+    }
+    return estadisticasPromesa;
+}
+
+async function actualizarEstadisticas() {
+    let estadisticas;
+    try {
+        estadisticas = await cargarEstadisticas();
+    } catch (error) {
+        console.error('Error cargando estadísticas:', error);
+        return;
+    }
+    pintarEstadisticas(estadisticas);
+}
+
+function pintarEstadisticas(estadisticas) {
+    document.getElementById('total-inscripciones').textContent = estadisticas.total_inscripciones;
+    document.getElementById('emails-enviados').textContent = estadisticas.correos.enviados;
+    document.getElementById('pendientes').textContent = estadisticas.correos.pendientes;
+
+    // El servidor devuelve los grados ordenados de mayor a menor
+    if (estadisticas.por_grado.length > 0) {
+        const gradoMasPopular = estadisticas.por_grado[0];
+        document.getElementById('grados-populares').textContent = `${gradoMasPopular.grado}°`;
+        document.getElementById('grados-count').textContent = gradoMasPopular.total;
+    }
+}
+
+async function actualizarGraficos() {
+    let estadisticas;
+    try {
+        estadisticas = await cargarEstadisticas();
+    } catch (error) {
+        console.error('Error cargando estadísticas:', error);
+        return;
+    }
+    pintarGraficos(estadisticas);
+}
+
+function pintarGraficos(estadisticas) {
+    // Actualizar gráfico de inscripciones por día
+    inscripcionesChart.data.labels = estadisticas.por_dia.map(dia => dia.fecha);
+    inscripcionesChart.data.datasets[0].data = estadisticas.por_dia.map(dia => dia.total);
+    inscripcionesChart.update();
+
+    // Actualizar gráfico de grados
+    const gradosLabels = {
+        '1': '1° Primaria', '2': '2° Primaria', '3': '3° Primaria',
+        '4': '4° Primaria', '5': '5° Primaria', '6': '6° Primaria',
+        '7': '1° Secundaria', '8': '2° Secundaria', '9': '3° Secundaria',
+        '10': '4° Secundaria', '11': '5° Secundaria'
+    };
+
+    gradosChart.data.labels = estadisticas.por_grado.map(item => gradosLabels[item.grado] || `${item.grado}°`);
+    gradosChart.data.datasets[0].data = estadisticas.por_grado.map(item => item.total);
+    gradosChart.update();
+}
+
+function actualizarReportes() {
+    cargarInscripciones();
+    actualizarEstadisticas();
+    actualizarGraficos();
+    showNotification('success', 'Reportes actualizados correctamente');
+}
+
+function exportarReporte() {
+    // El servidor genera el CSV completo en streaming desde la base de datos
+    const link = document.createElement("a");
+    link.setAttribute("href", "/exportar_inscripciones?formato=csv");
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+
+    showNotification('success', 'Reporte exportado correctamente');
+}
+
+function verDetalle(id) {
+    const inscripcion = inscripcionesData.find(item => item.id === id);
+    if (!inscripcion) {
+        showNotification('error', 'No se encontró la inscripción');
+        return;
+    }
+
+    const modalContent = document.getElementById('modal-content');
+    modalContent.innerHTML = `
+        <div class="space-y-6">
+            <div class="grid md:grid-cols-2 gap-6">
+                <div class="bg-blue-50 p-4 rounded-lg">
+                    <h4 class="font-bold text-blue-800 mb-3 flex items-center">
+                        <i class="fas fa-user-graduate mr-2"></i>
+                        Información del Estudiante
+                    </h4>
+                    <div class="space-y-2 text-sm">
+                        <p><strong>Nombres:</strong> ${escaparHTML(inscripcion.nombres)}</p>
+                        <p><strong>Apellidos:</strong> ${escaparHTML(inscripcion.apellidos)}</p>
+                        <p><strong>Fecha de Nacimiento:</strong> ${escaparHTML(inscripcion.fechaNacimiento)}</p>
+                        <p><strong>Grado Solicitado:</strong> ${escaparHTML(inscripcion.grado)}° Grado</p>
+                        <p><strong>Año Escolar:</strong> ${escaparHTML(inscripcion.anoEscolar)}</p>
+                    </div>
+                </div>
+
+                <div class="bg-green-50 p-4 rounded-lg">
+                    <h4 class="font-bold text-green-800 mb-3 flex items-center">
+                        <i class="fas fa-users mr-2"></i>
+                        Información de los Padres
+                    </h4>
+                    <div class="space-y-2 text-sm">
+                        <p><strong>Padre:</strong> ${escaparHTML(inscripcion.padreNombres)}</p>
+                        <p><strong>Teléfono Padre:</strong> ${escaparHTML(inscripcion.padreTelefono)}</p>
+                        <p><strong>Madre:</strong> ${escaparHTML(inscripcion.madreNombres)}</p>
+                        <p><strong>Teléfono Madre:</strong> ${escaparHTML(inscripcion.madreTelefono)}</p>
+                        <p><strong>Profesión:</strong> ${escaparHTML(inscripcion.profesion)}</p>
+                    </div>
+                </div>
+            </div>
+
+            <div class="bg-purple-50 p-4 rounded-lg">
+                <h4 class="font-bold text-purple-800 mb-3 flex items-center">
+                    <i class="fas fa-envelope mr-2"></i>
+                    Información de Contacto
+                </h4>
+                <div class="space-y-2 text-sm">
+                    <p><strong>Emails de Contacto:</strong></p>
+                    <ul class="list-disc list-inside ml-4">
+                        ${inscripcion.emails.map(email => `<li>${escaparHTML(email)}</li>`).join('')}
+                    </ul>
+                    <p><strong>Dirección:</strong> ${escaparHTML(inscripcion.direccion)}</p>
+                </div>
+            </div>
+
+            <div class="bg-gray-50 p-4 rounded-lg">
+                <h4 class="font-bold text-gray-800 mb-3 flex items-center">
+                    <i class="fas fa-info-circle mr-2"></i>
+                    Estado de la Inscripción
+                </h4>
+                <div class="space-y-2 text-sm">
+                    <p><strong>Fecha de Registro:</strong> ${escaparHTML(inscripcion.fecha)}</p>
+                    <p><strong>Estado:</strong> 
+                        <span class="bg-green-100 text-green-800 px-2 py-1 rounded-full text-xs">
+                            <i class="fas fa-check mr-1"></i>${escaparHTML(inscripcion.estado)}
+                        </span>
+                    </p>
+                    <p><strong>Emails Enviados:</strong> ${inscripcion.emails.length}</p>
+                    <p><strong>Emails Reenviados:</strong> ${Number(inscripcion.emailsReenviados) || 0}</p>
+                </div>
+            </div>
+
+            <div class="flex justify-end space-x-3 pt-4 border-t">
+                <button onclick="reenviarEmail(${Number(inscripcion.id)})" class="bg-green-500 text-white px-4 py-2 rounded-lg hover:bg-green-600 transition">
+                    <i class="fas fa-redo mr-2"></i>Reenviar Email
+                </button>
+                <button onclick="cerrarModal()" class="bg-gray-500 text-white px-4 py-2 rounded-lg hover:bg-gray-600 transition">
+                    <i class="fas fa-times mr-2"></i>Cerrar
+                </button>
+            </div>
+        </div>
+    `;
+
+    document.getElementById('modal-detalle').classList.add('active');
+}
+
+function reenviarEmail(id) {
+    const inscripcion = inscripcionesData.find(item => item.id === id);
+    if (!inscripcion) {
+        showNotification('error', 'No se encontró la inscripción');
+        return;
+    }
+
+    if (confirm(`¿Está seguro de reenviar los emails de confirmación para ${inscripcion.estudiante}?`)) {
+        // El estado de la tabla se actualiza con el evento 'correos' del servidor
+        solicitarReenvio({ ids: [id] })
+            .then(() => showNotification('success', `Reenvío en curso a ${inscripcion.emails.join(', ')}`))
+            .catch(error => showNotification('error', error.message));
+
+        // Cerrar modal si está abierto
+        const modal = document.getElementById('modal-detalle');
+        if (modal.classList.contains('active')) {
+            cerrarModal();
+        }
+    }
+}
+
+function reenviarFallidos() {
+    // Correos que fallaron en los últimos 7 días (por fecha del envío, no de la inscripción)
+    const desde = new Date(Date.now() - 6 * 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+    if (confirm('¿Reenviar todos los emails fallidos de los últimos 7 días?')) {
+        solicitarReenvio({ filtro: { estado_correo: 'fallido', correo_desde: desde } })
+            .then(result => showNotification('success', result.message))
+            .catch(error => showNotification('error', error.message));
+    }
+}
+
+async function solicitarReenvio(cuerpo) {
+    const response = await fetch('/reenviar_correos', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(cuerpo)
+    });
+    const result = await response.json();
+    if (!result.success) {
+        throw new Error(result.message);
+    }
+    return result;
+}
+
+function cerrarModal() {
+    document.getElementById('modal-detalle').classList.remove('active');
+}
+
+// Cerrar modal al hacer click fuera de él
+document.getElementById('modal-detalle').addEventListener('click', function(e) {
+    if (e.target === this) {
+        cerrarModal();
+    }
+});
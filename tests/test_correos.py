@@ -0,0 +1,83 @@
+import smtplib
+import time
+
+import app as aplicacion
+
+
+class ServidorFalso:
+    """smtplib.SMTP mínimo que rechaza un destinatario"""
+
+    def __init__(self, rechazado):
+        self.rechazado = rechazado
+        self.entregados = []
+
+    def sendmail(self, remitente, destinatarios, datos):
+        if destinatarios[0] == self.rechazado:
+            raise smtplib.SMTPRecipientsRefused({self.rechazado: (550, b'No such user')})
+        self.entregados.extend(destinatarios)
+
+    def noop(self):
+        return 250, b'OK'
+
+    def quit(self):
+        pass
+
+
+class ServicioFalso:
+    def __init__(self, servidor):
+        self.pool_smtp = aplicacion.PoolSMTP(lambda: servidor, tamano=1)
+
+    def preparar_mensaje(self, asunto, contenido_html, contenido_texto=None):
+        return aplicacion.MensajePreparado('colegio@example.com', 'Colegio', asunto, contenido_html, contenido_texto)
+
+
+def correo(id, destinatario):
+    return {'id': id, 'inscripcion_id': id, 'destinatario': destinatario, 'intentos': 1,
+            'asunto': 'Inscripción', 'contenido_html': '<p>Hola</p>', 'contenido_texto': 'Hola'}
+
+
+def test_destinatario_rechazado_no_aborta_el_lote():
+    servidor = ServidorFalso('malo@example.com')
+    servicio = ServicioFalso(servidor)
+    cola = aplicacion.ColaCorreos(None, servicio)
+    correos = [correo(1, 'a@example.com'), correo(2, 'malo@example.com'), correo(3, 'b@example.com')]
+    registrados = []
+    cola._reclamar = lambda: correos
+    cola._registrar_resultados = registrados.extend
+
+    assert cola.procesar_lote() == 3
+
+    errores = {c['destinatario']: error for c, error in registrados}
+    assert servidor.entregados == ['a@example.com', 'b@example.com']
+    assert errores['a@example.com'] is None and errores['b@example.com'] is None
+    assert 'No such user' in errores['malo@example.com']
+    # La sesión sigue sana y vuelve al pool
+    assert servicio.pool_smtp._libres
+
+
+def test_envio_masivo_conserva_los_exitos():
+    servicio = ServicioFalso(ServidorFalso('malo@example.com'))
+    resultado = aplicacion.EmailService.enviar_correo_masivo(
+        servicio, ['a@example.com', 'malo@example.com', 'b@example.com'], 'Aviso', '<p>Hola</p>'
+    )
+    assert resultado['exitos'] == ['a@example.com', 'b@example.com']
+    assert resultado['total_errores'] == 1
+
+
+def test_prueba_smtp_no_depende_del_pool(monkeypatch):
+    import benchmark
+
+    smtp = benchmark.iniciar_smtp_falso()
+    monkeypatch.setenv('MAIL_SERVER', '127.0.0.1')
+    monkeypatch.setenv('MAIL_PORT', str(smtp.server_address[1]))
+    monkeypatch.setenv('MAIL_TLS', 'false')
+    monkeypatch.setenv('MAIL_USER', 'pruebas@colegio.test')
+    monkeypatch.setenv('MAIL_PASS', 'secreto')
+    monkeypatch.setenv('MAIL_POOL_SIZE', '1')
+    servicio = aplicacion.EmailService()
+    # Un worker de la cola tiene la única sesión del pool
+    with servicio.pool_smtp.sesion():
+        inicio = time.monotonic()
+        assert servicio.test_smtp_connection(timeout=2)
+        assert time.monotonic() - inicio < 2
+    smtp.shutdown()
@@ -0,0 +1,80 @@
+import time
+from contextlib import contextmanager
+
+import app as aplicacion
+
+
+class BaseEventos:
+    """Tabla eventos en memoria con auto_increment_increment configurable"""
+
+    def __init__(self, paso=1):
+        self.paso = paso
+        self.filas = []
+        self.consultas = []
+
+    def insertar(self, n):
+        for _ in range(n):
+            siguiente = self.filas[-1][0] + self.paso if self.filas else 1
+            self.filas.append((siguiente, 'inscripcion', '{}'))
+
+    @contextmanager
+    def conexion(self):
+        yield self
+
+    def cursor(self, **kwargs):
+        return CursorEventos(self)
+
+
+class CursorEventos:
+    def __init__(self, base):
+        self.base = base
+        self.resultado = []
+
+    def execute(self, sql, parametros=None):
+        self.base.consultas.append(sql)
+        if sql == aplicacion.DifusorEventos.SQL_PASO:
+            self.resultado = [(self.base.paso,)]
+        elif sql == aplicacion.DifusorEventos.SQL_ULTIMO:
+            ids = [f[0] for f in self.base.filas]
+            self.resultado = [(max(ids, default=0), min(ids, default=0))]
+        elif sql == aplicacion.DifusorEventos.SQL_DESDE:
+            desde, hasta, limite = parametros
+            self.resultado = [f for f in self.base.filas if desde < f[0] <= hasta][:limite]
+        else:
+            self.resultado = []
+
+    def fetchone(self):
+        return self.resultado[0]
+
+    def fetchall(self):
+        return self.resultado
+
+    def close(self):
+        pass
+
+
+def test_ids_con_paso_mayor_que_uno_no_son_huecos():
+    base = BaseEventos(paso=2)
+    base.insertar(3)
+    difusor = aplicacion.DifusorEventos(base, hueco_seg=60)
+    cola = difusor.suscribir()
+    assert difusor.ultimo == 5
+
+    base.insertar(20)
+    difusor._leer()
+    recibidos = [cola.get_nowait()[0] for _ in range(cola.qsize())]
+    assert recibidos == list(range(7, 46, 2))
+
+
+def test_sin_suscriptores_no_consulta_eventos():
+    base = BaseEventos()
+    difusor = aplicacion.DifusorEventos(base, intervalo=0.01)
+    difusor.iniciar()
+    time.sleep(0.1)
+    assert all(sql == aplicacion.DifusorEventos.SQL_PURGAR for sql in base.consultas)
+
+    base.insertar(2)
+    cola = difusor.suscribir()
+    base.insertar(1)
+    time.sleep(0.1)
+    assert cola.get_nowait()[0] == 3
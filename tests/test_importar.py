@@ -0,0 +1,111 @@
+import json
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+
+import app as aplicacion
+
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def executemany(self, sql, filas):
+        filas = list(filas)
+        if 'INSERT INTO inscripciones' in sql:
+            self.lastrowid = self.base.siguiente_id
+            for fila in filas:
+                self.base.inscripciones.append((self.base.siguiente_id, fila))
+                # Como con auto_increment_increment=2: los ids no son consecutivos
+                self.base.siguiente_id += 2
+        elif 'INSERT INTO eventos' in sql:
+            self.base.eventos.extend(filas)
+        self.rowcount = len(filas)
+
+    def execute(self, sql, parametros=None):
+        self.rowcount = 0
+        self.resultado = []
+        if sql.startswith('SELECT clave_idempotencia, id FROM inscripciones'):
+            self.resultado = [(fila[-1], id) for id, fila in self.base.inscripciones if fila[-1] in parametros]
+
+    def fetchall(self):
+        return self.resultado
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, base):
+        self.base = base
+
+    def start_transaction(self):
+        pass
+
+    def cursor(self, **kwargs):
+        return CursorFalso(self.base)
+
+    def commit(self):
+        self.base.commits += 1
+
+
+class PoolFalso:
+    def __init__(self):
+        self.inscripciones = []
+        self.eventos = []
+        self.siguiente_id = 1
+        self.commits = 0
+
+    @contextmanager
+    def conexion(self):
+        yield ConexionFalsa(self)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    pool = PoolFalso()
+    monkeypatch.setattr(aplicacion, 'db_pool', pool)
+    monkeypatch.setattr(aplicacion, 'cola_correos', None)
+    monkeypatch.setattr(aplicacion, 'difusor_eventos', None)
+    app = Flask(__name__)
+    app.register_blueprint(aplicacion.bp)
+    return app.test_client(), pool
+
+
+def test_importar_una_fila_jsonl(cliente):
+    cliente, pool = cliente
+    fila = {
+        'nombres': 'Ana', 'apellidos': 'Pérez', 'fechaNacimiento': '2015-03-01',
+        'grado': '3', 'anoEscolar': '2025', 'direccion': 'Calle 1',
+        'padreNombres': 'Luis Pérez', 'emailPadre': 'luis@example.com',
+    }
+    respuesta = cliente.post(
+        '/importar_inscripciones?formato=jsonl',
+        data=json.dumps(fila) + '\n', content_type='application/x-ndjson'
+    )
+    assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+    datos = respuesta.get_json()
+    assert datos['importadas'] == 1
+    assert datos['total_errores'] == 0
+    assert len(pool.inscripciones) == 1
+    assert pool.commits == 1
+
+
+def test_importar_lote_usa_los_ids_reales(cliente):
+    cliente, pool = cliente
+    pool.siguiente_id = 10
+    filas = [{
+        'nombres': nombre, 'apellidos': 'Quispe', 'fechaNacimiento': '2014-05-02',
+        'grado': '4', 'anoEscolar': '2025', 'direccion': 'Calle 2',
+    } for nombre in ('Ana', 'Luis', 'Rosa')]
+    respuesta = cliente.post(
+        '/importar_inscripciones?formato=jsonl',
+        data=''.join(json.dumps(f) + '\n' for f in filas), content_type='application/x-ndjson'
+    )
+    assert respuesta.get_json()['importadas'] == 3
+    ids_insertados = [id for id, _ in pool.inscripciones]
+    ids_eventos = [inscripcion_id for _, inscripcion_id, _ in pool.eventos]
+    assert ids_eventos == ids_insertados == [10, 12, 14]
@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+import app as aplicacion
+
+
+def datos(**cambios):
+    base = {
+        'nombres': '  Ana  ', 'apellidos': 'Pérez Quispe', 'fechaNacimiento': '2015-03-01',
+        'grado': '3', 'anoEscolar': '2025', 'direccion': 'Calle 1',
+        'padreTelefono': '987 654 321', 'emailPadre': 'luis@example.com',
+    }
+    base.update(cambios)
+    return base
+
+
+def errores_de(data):
+    with pytest.raises(aplicacion.ErrorValidacion) as excinfo:
+        aplicacion.Inscripcion.desde_dict(data)
+    return excinfo.value.errores
+
+
+def test_desde_dict_valido_recorta_y_convierte():
+    inscripcion = aplicacion.Inscripcion.desde_dict(datos(anoEscolar=2025))
+    assert inscripcion.nombres == 'Ana'
+    assert inscripcion.ano_escolar == '2025'
+    assert inscripcion.fecha_nacimiento == date(2015, 3, 1)
+    assert inscripcion.madre_telefono == ''
+    assert inscripcion.emails == ['luis@example.com']
+
+
+def test_desde_dict_reune_todos_los_errores():
+    errores = errores_de({'nombres': '   ', 'grado': '12', 'anoEscolar': '25', 'emailMadre': 'no-es-email'})
+    assert "El campo nombres es obligatorio" in errores
+    assert "El campo apellidos es obligatorio" in errores
+    assert "El campo direccion es obligatorio" in errores
+    assert "El campo grado debe estar entre 1 y 11" in errores
+    assert "El campo anoEscolar debe ser un año (AAAA)" in errores
+    assert "El campo emailMadre no es un email válido" in errores
+    assert "El campo fechaNacimiento es obligatorio" in errores
+
+
+@pytest.mark.parametrize('grado', ['0', '12', '03', 'tres'])
+def test_grado_fuera_de_rango(grado):
+    assert errores_de(datos(grado=grado)) == ["El campo grado debe estar entre 1 y 11"]
+
+
+@pytest.mark.parametrize('grado', ['1', '9', '10', '11'])
+def test_grado_valido(grado):
+    assert aplicacion.Inscripcion.desde_dict(datos(grado=grado)).grado == grado
+
+
+def test_telefono_invalido():
+    assert errores_de(datos(madreTelefono='llamar luego')) == ["El campo madreTelefono no es un teléfono válido"]
+
+
+@pytest.mark.parametrize('fecha', ['01/03/2015', '2015-02-30'])
+def test_fecha_de_nacimiento_invalida(fecha):
+    assert errores_de(datos(fechaNacimiento=fecha)) == ["El campo fechaNacimiento debe tener formato AAAA-MM-DD"]
+
+
+def test_longitud_maxima():
+    assert errores_de(datos(nombres='A' * 101)) == ["El campo nombres admite como máximo 100 caracteres"]
+
+
+def test_clave_idempotencia_ignora_mayusculas_y_espacios():
+    a = aplicacion.Inscripcion.desde_dict(datos(nombres='Ana  María', apellidos='PÉREZ'))
+    b = aplicacion.Inscripcion.desde_dict(datos(nombres='ana maría', apellidos='pérez'))
+    assert a.clave_idempotencia() == b.clave_idempotencia()
+    assert a.clave_idempotencia('abc') != a.clave_idempotencia()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+import app as aplicacion
+
+
+def test_cursor_ida_y_vuelta():
+    fecha = datetime(2026, 10, 12, 8, 30, 15, 123456)
+    cursor = aplicacion.codificar_cursor(fecha, 42)
+    assert '=' not in cursor
+    assert aplicacion.decodificar_cursor(cursor) == (fecha, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'no-es-base64!', 'c2luLXNlcGFyYWRvcg', 'MjAyNi0xMC0xMnxhYmM'])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError, match="Cursor de paginación inválido"):
+        aplicacion.decodificar_cursor(cursor)
+
+
+def test_filtros_hasta_incluye_el_dia_completo():
+    condiciones, params = aplicacion.construir_filtros({'desde': '2026-10-01', 'hasta': '2026-10-12'})
+    assert condiciones == ["fecha_registro >= %s", "fecha_registro < %s"]
+    assert params == [datetime(2026, 10, 1), datetime(2026, 10, 13)]
+
+
+def test_filtro_fecha_invalida():
+    with pytest.raises(ValueError, match="hasta debe tener formato AAAA-MM-DD"):
+        aplicacion.construir_filtros({'hasta': '12/10/2026'})
+
+
+def test_filtro_nombre_escapa_comodines_like():
+    condiciones, params = aplicacion.construir_filtros({'nombre': ' 50%_a\\b '})
+    assert condiciones == ["(nombres LIKE %s OR apellidos LIKE %s)"]
+    assert params == ['50\\%\\_a\\\\b%', '50\\%\\_a\\\\b%']
+
+
+def test_filtros_vacios():
+    assert aplicacion.construir_filtros({}) == ([], [])
+
+
+def test_consulta_listado_con_cursor_y_limite():
+    cursor = aplicacion.codificar_cursor(datetime(2026, 10, 12), 7)
+    sql, params, limite = aplicacion.consulta_listado({'grado': '3', 'cursor': cursor, 'limite': '500'})
+    assert limite == 200
+    assert "grado = %s AND (fecha_registro < %s OR (fecha_registro = %s AND id < %s))" in sql
+    # Una fila extra para saber si hay más páginas
+    assert params == ['3', datetime(2026, 10, 12), datetime(2026, 10, 12), 7, 201]
@@ -0,0 +1,55 @@
+import pytest
+
+import app as aplicacion
+
+
+def test_exportar_contadores_con_ayuda_tipo_y_etiquetas_escapadas():
+    metricas = aplicacion.Metricas()
+    metricas.describir('peticiones_total', 'counter', 'Peticiones atendidas')
+    metricas.incrementar('peticiones_total', ruta='/a')
+    metricas.incrementar('peticiones_total', 2, ruta='/a')
+    metricas.incrementar('peticiones_total', ruta='di "hola"\n')
+    metricas.fijar('sin_describir', 7)
+
+    assert metricas.exportar().splitlines() == [
+        '# HELP peticiones_total Peticiones atendidas',
+        '# TYPE peticiones_total counter',
+        'peticiones_total{ruta="/a"} 3',
+        'peticiones_total{ruta="di \\"hola\\"\\n"} 1',
+        '# TYPE sin_describir untyped',
+        'sin_describir 7',
+    ]
+
+
+def test_exportar_histograma_acumulado():
+    metricas = aplicacion.Metricas()
+    metricas.describir('duracion_segundos', 'histogram', 'Duración')
+    metricas.observar('duracion_segundos', 0.02, fase='db')
+    metricas.observar('duracion_segundos', 0.3, fase='db')
+    metricas.observar('duracion_segundos', 60, fase='db')
+
+    lineas = metricas.exportar().splitlines()
+    cubetas = {l.split()[0]: int(l.split()[1]) for l in lineas if l.startswith('duracion_segundos_bucket')}
+    assert cubetas['duracion_segundos_bucket{fase="db",le="0.01"}'] == 0
+    assert cubetas['duracion_segundos_bucket{fase="db",le="0.025"}'] == 1
+    assert cubetas['duracion_segundos_bucket{fase="db",le="0.5"}'] == 2
+    assert cubetas['duracion_segundos_bucket{fase="db",le="10.0"}'] == 2
+    assert cubetas['duracion_segundos_bucket{fase="db",le="+Inf"}'] == 3
+    assert len(cubetas) == len(aplicacion.Metricas.BUCKETS) + 1
+    assert 'duracion_segundos_count{fase="db"} 3' in lineas
+    suma = next(l for l in lineas if l.startswith('duracion_segundos_sum'))
+    assert float(suma.split()[1]) == pytest.approx(60.32)
+
+
+def test_medir_cuenta_errores_por_fase():
+    metricas = aplicacion.Metricas()
+    metricas.describir('fase_duracion_segundos', 'histogram', 'Duración por fase')
+    with pytest.raises(ValueError):
+        with metricas.medir('smtp_send'):
+            raise ValueError("fallo")
+    with metricas.medir('smtp_send'):
+        pass
+
+    texto = metricas.exportar()
+    assert 'fase_errores_total{fase="smtp_send"} 1\n' in texto
+    assert 'fase_duracion_segundos_count{fase="smtp_send"} 2\n' in texto
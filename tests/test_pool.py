@@ -0,0 +1,91 @@
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+import app as aplicacion
+
+
+class ConexionFalsa:
+    def __init__(self, numero):
+        self.numero = numero
+        self.in_transaction = False
+        self.cerrada = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.cerrada = True
+
+
+class PoolFalso(aplicacion.PoolConexiones):
+    def __init__(self, tamano=2, timeout=0.2):
+        super().__init__({}, tamano=tamano, timeout=timeout)
+        self.creadas = []
+
+    def _crear_conexion(self):
+        conn = ConexionFalsa(len(self.creadas))
+        self.creadas.append(conn)
+        return conn
+
+
+def test_reutiliza_conexiones_libres():
+    pool = PoolFalso()
+    with pool.conexion() as primera:
+        pass
+    with pool.conexion() as segunda:
+        assert segunda is primera
+    assert len(pool.creadas) == 1
+    assert pool.estadisticas()['libres'] == 1
+
+
+def test_timeout_cuando_el_pool_esta_lleno():
+    pool = PoolFalso(tamano=1, timeout=0.05)
+    with pool.conexion():
+        with pytest.raises(mysql.connector.errors.PoolError):
+            pool.obtener()
+    estadisticas = pool.estadisticas()
+    assert estadisticas['timeouts'] == 1
+    assert estadisticas['esperando'] == 0
+    assert estadisticas['en_uso'] == 0
+
+
+def test_operational_error_descarta_la_conexion():
+    pool = PoolFalso()
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        with pool.conexion() as conn:
+            raise mysql.connector.errors.OperationalError("MySQL se fue")
+    assert conn.cerrada
+    estadisticas = pool.estadisticas()
+    assert estadisticas['creadas'] == 0 and estadisticas['libres'] == 0
+
+
+def test_transaccion_abierta_se_revierte_al_devolver():
+    pool = PoolFalso()
+    with pytest.raises(ValueError):
+        with pool.conexion() as conn:
+            conn.in_transaction = True
+            raise ValueError("fallo en la petición")
+    assert not conn.in_transaction
+    assert pool.estadisticas()['libres'] == 1
+
+
+def test_espera_hasta_que_se_devuelve_una_conexion():
+    pool = PoolFalso(tamano=1, timeout=2)
+    conn = pool.obtener()
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(pool.obtener()))
+    hilo.start()
+    time.sleep(0.05)
+    assert pool.estadisticas()['esperando'] == 1
+    pool.devolver(conn)
+    hilo.join(1)
+    assert resultado == [conn]
+    estadisticas = pool.estadisticas()
+    assert estadisticas['esperando'] == 0
+    assert estadisticas['total_esperas'] == 1
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+
+import app as aplicacion
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(aplicacion, 'cola_correos', object())
+    app = Flask(__name__)
+    app.register_blueprint(aplicacion.bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('filtro', [{'nombre': 5}, {'desde': 20261012}, {'estado_correo': None}])
+def test_filtro_con_valores_no_texto_es_400(cliente, filtro):
+    respuesta = cliente.post('/reenviar_correos', json={'filtro': filtro})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['success'] is False
+
+
+class LecturasFalsas:
+    def __init__(self):
+        self.consultas = []
+
+    @contextmanager
+    def conexion(self, primario=False):
+        yield self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, parametros=None):
+        self.consultas.append(sql)
+
+    def fetchone(self):
+        return (0,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_estadisticas_cuentan_solo_el_ultimo_correo(monkeypatch):
+    lecturas = LecturasFalsas()
+    monkeypatch.setattr(aplicacion, 'db_lecturas', lecturas)
+    aplicacion.calcular_estadisticas(['grado = %s'], ['3'], 7)
+    consulta_correos = next(sql for sql in lecturas.consultas if 'cola_correos c' in sql)
+    # Un reenvío reemplaza al correo fallido, igual que en el listado
+    assert aplicacion.SQL_ULTIMO_CORREO in consulta_correos
+    assert 'AND grado = %s' in consulta_correos
@@ -0,0 +1,75 @@
+import mysql.connector
+import pytest
+
+import app as aplicacion
+
+
+class PoolFalso:
+    """Pool mínimo: obtener() devuelve el nombre del host o lanza el error configurado"""
+
+    def __init__(self, host, error=None):
+        self.config = {'host': host}
+        self.error = error
+        self.devueltas = []
+
+    def obtener(self):
+        if self.error:
+            raise self.error
+        return self.config['host']
+
+    def devolver(self, conn, descartar=False):
+        self.devueltas.append((conn, descartar))
+
+    def estadisticas(self):
+        return {}
+
+
+def router(*replicas):
+    return aplicacion.RouterLecturas(PoolFalso('primario'), replicas, expulsion_seg=60)
+
+
+def test_reparte_en_round_robin():
+    lecturas = router(PoolFalso('r1'), PoolFalso('r2'))
+    assert [lecturas.obtener()[1] for _ in range(4)] == ['r1', 'r2', 'r1', 'r2']
+
+
+def test_sin_replicas_o_pidiendo_primario_lee_del_primario():
+    assert router().obtener()[1] == 'primario'
+    assert router(PoolFalso('r1')).obtener(primario=True)[1] == 'primario'
+
+
+def test_replica_caida_se_expulsa_y_se_usa_la_siguiente():
+    caida = PoolFalso('r1', mysql.connector.errors.InterfaceError("no responde"))
+    lecturas = router(caida, PoolFalso('r2'))
+    assert [lecturas.obtener()[1] for _ in range(3)] == ['r2', 'r2', 'r2']
+    estado = {r['host']: r for r in lecturas.estadisticas()}
+    assert not estado['r1']['disponible'] and estado['r1']['expulsiones'] == 1
+    assert estado['r2']['disponible']
+
+
+def test_todas_expulsadas_vuelve_al_primario():
+    lecturas = router(PoolFalso('r1', mysql.connector.errors.InterfaceError("no responde")))
+    assert lecturas.obtener()[1] == 'primario'
+    assert lecturas.obtener()[1] == 'primario'
+
+
+def test_pool_saturado_no_expulsa():
+    lecturas = router(PoolFalso('r1', mysql.connector.errors.PoolError("sin conexiones libres")))
+    assert lecturas.obtener()[1] == 'primario'
+    assert lecturas.estadisticas()[0]['expulsiones'] == 0
+
+
+def test_error_operacional_en_uso_expulsa_y_descarta():
+    replica = PoolFalso('r1')
+    lecturas = router(replica)
+    with pytest.raises(mysql.connector.errors.OperationalError):
+        with lecturas.conexion():
+            raise mysql.connector.errors.OperationalError("conexión perdida")
+    assert replica.devueltas == [('r1', True)]
+    assert lecturas.obtener()[1] == 'primario'
+
+
+def test_configs_replicas():
+    configs = aplicacion.configs_replicas(' r1 , r2:3307,')
+    assert [(c['host'], c.get('port', 3306)) for c in configs] == [('r1', 3306), ('r2', 3307)]
+    assert configs[0]['database'] == aplicacion.db_config['database']